@@ -1,7 +1,10 @@
 import argparse
+import datetime
 import pathlib
 
-from owasp_dt_sync.sync import handle_sync
+from owasp_dt_sync import config
+from owasp_dt_sync.models import Aggregation
+from owasp_dt_sync.engine import handle_sync
 
 def create_parser():
     parser = argparse.ArgumentParser(
@@ -15,6 +18,36 @@ def create_parser():
     parser.add_argument("--mapper", help="Custom mapper Python script", type=pathlib.Path, default=None)
     parser.add_argument("--template", help="Jinja2 template file path for WorkItems", type=pathlib.Path, default=None)
     parser.add_argument("--fix-references", help="Whether to fix failing WorkItem references", action='store_true', default=False)
+    parser.add_argument("--verify-references", help="Verify all WorkItem references in bulk 'before' the sync or 'only' without syncing (recreates missing WorkItems together with --fix-references)", choices=["before", "only"], default=None)
+    parser.add_argument("--workers", help="Number of concurrent requests for bulk operations and of concurrently synchronized Findings without --targets", type=int, default=4)
+    parser.add_argument("--journal", help="Journal file for checkpointing the sync progress", type=pathlib.Path, default=None)
+    parser.add_argument("--resume", help="Resume an interrupted sync from the journal", action='store_true', default=False)
+    parser.add_argument("--findings-from", help="Load Findings from exported FPF or findings API JSON files (optionally gzipped) instead of OWASP Dependency Track", type=pathlib.Path, action='append', default=None)
+    parser.add_argument("--aggregate", help="Synchronize all Findings with the same key with one shared WorkItem", choices=[aggregation.value for aggregation in Aggregation], default=None)
+    parser.add_argument("--prioritize", help="Synchronize Findings ordered by severity and CVSS score, alternating between projects (loads all Findings before synchronizing)", action='store_true', default=False)
+    parser.add_argument("--max-duration", help="Stop the sync after the given duration (e.g. '90', '30m' or '1h30m') and report the remaining Findings", type=config.parse_duration, default=None)
+    parser.add_argument("--reference-index", help="Load the tagged WorkItems with one query and report orphaned WorkItems", action='store_true', default=False)
+    parser.add_argument("--targets", help="JSON file of Azure DevOps targets to route the Findings to (instead of the AZURE_* environment variables)", type=pathlib.Path, default=None)
+    parser.add_argument("--cache-reads", help="Record read responses to this directory and replay them on later dry-runs (forbids --apply)", type=pathlib.Path, default=None)
+    parser.add_argument("--cache-ttl", help="Maximum age of replayed responses (e.g. '30m' or '12h')", type=config.parse_duration, default=24 * 3600)
+    parser.add_argument("--finding-deadline", help="Skip Findings not synchronized within the given duration (e.g. '30' or '2m')", type=config.parse_duration, default=None)
+    parser.add_argument("--hedge-percentile", help="Send a second request for reads slower than this latency percentile (e.g. 95) and use the first response", type=float, default=None)
+    parser.add_argument("--project", help="Only synchronize the Findings of this project (UUID or name[:version], repeatable)", action='append', default=None)
+    parser.add_argument("--vulnerability", help="Only synchronize the Findings of this vulnerability ([source:]vulnId, repeatable)", action='append', default=None)
+    parser.add_argument("--work-item", help="Only synchronize the Findings referenced by the tags of this WorkItem id (repeatable)", type=int, action='append', default=None)
+    parser.add_argument("--mapper-processes", help="Run the mapper functions in this number of worker processes (for CPU-heavy mappers)", type=int, default=None)
+    parser.add_argument("--severity", help="Only synchronize Findings of these severities (e.g. 'CRITICAL,HIGH', repeatable)", action='append', default=None)
+    parser.add_argument("--analysis-state", help="Only synchronize Findings of these analysis states (e.g. 'NOT_SET,IN_TRIAGE', repeatable)", action='append', default=None)
+    parser.add_argument("--attributed-from", help="Only synchronize Findings attributed on or after this date (e.g. '2025-01-31')", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--attributed-to", help="Only synchronize Findings attributed on or before this date (e.g. '2025-12-31')", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--epss-min-score", help="Minimal EPSS score of Findings to synchronize (e.g. 0.1)", type=float, default=None)
+    parser.add_argument("--project-tag", help="Only synchronize Findings of projects with this tag (repeatable)", action='append', default=None)
+    parser.add_argument("--project-classifier", help="Only synchronize Findings of projects with this classifier (e.g. 'APPLICATION', repeatable)", action='append', default=None)
+    parser.add_argument("--reconcile", help="Find tagged WorkItems of disappeared Findings after a complete sync and 'report', 'tag' or 'close' them", choices=["report", "tag", "close"], default=None)
+    parser.add_argument("--stale-state", help="State of closed stale WorkItems", default="Closed")
+    parser.add_argument("--reconcile-memory-keys", help="Number of Finding keys kept in memory for the reconciliation before spilling them to disk", type=int, default=1_000_000)
+    parser.add_argument("--trace", help="Export spans of every synchronized Finding to the given file", type=pathlib.Path, default=None)
+    parser.add_argument("--trace-format", help="Format of the trace file ('chrome' trace events or 'otlp' JSON)", choices=["chrome", "otlp"], default="chrome")
     parser.add_argument("--load-suppressed", help="Whether to load suppressed Findings", action='store_true', default=False)
     parser.add_argument("--load-inactive", help="Whether to load Findings of inactive projects", action='store_true', default=False)
     parser.set_defaults(func=handle_sync)
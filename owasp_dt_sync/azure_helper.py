@@ -1,23 +1,52 @@
+import itertools
 import re
+import weakref
+from typing import Iterable, Iterator, Callable
 
+import requests
+
+from azure.devops.client import Client
 from azure.devops.connection import Connection
-from azure.devops.released.work_item_tracking import WorkItemTrackingClient, WorkItemType, JsonPatchOperation
+from azure.devops.released.work_item_tracking import WorkItemTrackingClient, WorkItemType, JsonPatchOperation, WorkItem, Wiql, TeamContext, WorkItemQueryResult
 from is_empty import empty
 from msrest.authentication import BasicAuthentication
+from requests.adapters import BaseAdapter
+from urllib3 import Retry
 from tinystream import Stream
 
 from owasp_dt_sync import config
 
 
+def create_connection(org_url: str, api_key: str) -> Connection:
+    credentials = BasicAuthentication('', api_key)
+    return Connection(base_url=org_url, creds=credentials)
+
 def create_connection_from_env() -> Connection:
-    credentials = BasicAuthentication('', config.reqenv("AZURE_API_KEY"))
-    return Connection(base_url=config.reqenv("AZURE_ORG_URL"), creds=credentials)
+    return create_connection(config.reqenv("AZURE_ORG_URL"), config.reqenv("AZURE_API_KEY"))
+
+def mount_adapter(client: Client, create_adapter: Callable[[Retry], BaseAdapter]):
+    # Sessions are created per thread by msrest, so the adapter is mounted on their first use
+    mounted_sessions = weakref.WeakSet()
 
-__preferred_work_item_type: WorkItemType = None
+    def _configure_session(session: requests.Session, global_config, local_config, **kwargs):
+        if session not in mounted_sessions:
+            adapter = create_adapter(session.get_adapter("https://").max_retries)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            mounted_sessions.add(session)
+        return kwargs
 
-def find_best_work_item_type(work_item_tracking_client: WorkItemTrackingClient, azure_project: str) -> WorkItemType:
-    global __preferred_work_item_type
-    if __preferred_work_item_type is None:
+    client.config.session_configuration_callback = _configure_session
+
+def find_best_work_item_type(
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    work_item_types: dict[tuple[str, str], WorkItemType] = None,
+) -> WorkItemType:
+    # Preferred WorkItem types are cached by organisation and project
+    cache_key = (work_item_tracking_client.normalized_url, azure_project)
+    preferred_work_item_type = work_item_types.get(cache_key) if work_item_types is not None else None
+    if preferred_work_item_type is None:
         preferred_type_names = ["Vulnerability", "Bug", "Incident", "Issue", "Task"]
         found_types: dict[str, WorkItemType] = {}
         types: list[WorkItemType] = work_item_tracking_client.get_work_item_types(azure_project)
@@ -29,12 +58,14 @@ def find_best_work_item_type(work_item_tracking_client: WorkItemTrackingClient,
 
         for type_name in preferred_type_names:
             if type_name in found_types:
-                __preferred_work_item_type = found_types[type_name]
+                preferred_work_item_type = found_types[type_name]
                 break
 
-        assert __preferred_work_item_type is not None, f"Could not find a WorkItem type with on of the names: '{preferred_type_names}'. Please define a proper work_item_adapter.work_item_type in your mapper."
+        assert preferred_work_item_type is not None, f"Could not find a WorkItem type with on of the names: '{preferred_type_names}'. Please define a proper work_item_adapter.work_item_type in your mapper."
+        if work_item_types is not None:
+            work_item_types[cache_key] = preferred_work_item_type
 
-    return __preferred_work_item_type
+    return preferred_work_item_type
 
 def pretty_changes(changes: list[JsonPatchOperation]):
     def _map(op: JsonPatchOperation):
@@ -59,3 +90,56 @@ def read_work_item_id(url: str) -> int:
     work_item_id = int(found)
     assert work_item_id > 0
     return work_item_id
+
+def find_existing_work_item_ids(
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    work_item_ids: Iterable[int],
+    batch_size: int = 200,
+) -> set[int]:
+    work_items = get_work_items(work_item_tracking_client, azure_project, work_item_ids, fields=["System.Id"], batch_size=batch_size)
+    return {work_item.id for work_item in work_items}
+
+def escape_wiql(value: str):
+    return value.replace("'", "''")
+
+def query_work_item_ids(
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    condition: str,
+    page_size: int = 10000,
+) -> Iterator[int]:
+    # WIQL results are limited, so page by ascending id
+    last_id = 0
+    while True:
+        wiql = Wiql(query=(
+            "SELECT [System.Id] FROM WorkItems"
+            " WHERE [System.TeamProject] = @project"
+            f" AND {condition}"
+            f" AND [System.Id] > {last_id}"
+            " ORDER BY [System.Id]"
+        ))
+        result: WorkItemQueryResult = work_item_tracking_client.query_by_wiql(wiql, team_context=TeamContext(project=azure_project), top=page_size)
+        work_item_ids = [reference.id for reference in result.work_items]
+        yield from work_item_ids
+        if len(work_item_ids) < page_size:
+            break
+        last_id = work_item_ids[-1]
+
+def find_work_item_ids_by_tag(
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    tag: str,
+) -> list[int]:
+    return list(query_work_item_ids(work_item_tracking_client, azure_project, f"[System.Tags] CONTAINS '{escape_wiql(tag)}'"))
+
+def get_work_items(
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    work_item_ids: Iterable[int],
+    fields: list[str] = None,
+    batch_size: int = 200,
+) -> Iterator[WorkItem]:
+    for batch in itertools.batched(work_item_ids, batch_size):
+        work_items: list[WorkItem] = work_item_tracking_client.get_work_items(ids=list(batch), project=azure_project, fields=fields, error_policy="omit")
+        yield from filter(None, work_items)
@@ -0,0 +1,138 @@
+import threading
+from concurrent.futures import Future
+
+from azure.devops.exceptions import AzureDevOpsServiceError
+from azure.devops.released.work_item_tracking import WorkItemTrackingClient, WorkItem, JsonPatchOperation
+
+from owasp_dt_sync import log, azure_helper, models, validation, tracing
+
+
+# Run-scoped cache of WorkItems by id.
+# Concurrent and repeated reads of the same WorkItem share one request and
+# changes of all Findings referencing the same WorkItem are merged into one update.
+class WorkItemCache:
+    def __init__(
+        self,
+        work_item_tracking_client: WorkItemTrackingClient,
+        azure_project: str,
+        fields: list[str] = None,
+        validator: validation.WorkItemValidator = None,
+    ):
+        self.__client = work_item_tracking_client
+        self.__project = azure_project
+        self.__fields = fields
+        self.__validator = validator
+        # Persisted states and types, the cached WorkItems contain the pending changes
+        self.__persisted: dict[int, tuple[str | None, str | None]] = {}
+        self.__lock = threading.Lock()
+        self.__work_items: dict[int, Future] = {}
+        self.__loaded_fields: dict[int, set[str]] = {}
+        self.__changes: dict[int, dict[str, JsonPatchOperation]] = {}
+        self.__loggers: dict[int, log.Logger] = {}
+
+    @property
+    def fields(self):
+        return self.__fields
+
+    @property
+    def validator(self):
+        return self.__validator
+
+    def __set_persisted(self, work_item: WorkItem):
+        fields = work_item.fields or {}
+        self.__persisted[work_item.id] = (fields.get(models.WorkItemField.STATE), fields.get(models.WorkItemField.WORK_ITEM_TYPE))
+
+    @property
+    def pending_count(self):
+        return len(self.__changes)
+
+    def __coalesce(self, key: any, load: callable):
+        with self.__lock:
+            future = self.__work_items.get(key)
+            is_loader = future is None
+            if is_loader:
+                future = Future()
+                self.__work_items[key] = future
+
+        if is_loader:
+            try:
+                future.set_result(load())
+            except Exception as e:
+                # Failed loads are not cached, so that they can be retried
+                with self.__lock:
+                    self.__work_items.pop(key, None)
+                future.set_exception(e)
+
+        return future.result()
+
+    def get(self, work_item_id: int) -> WorkItem:
+        def _load():
+            work_item = self.__client.get_work_item(id=work_item_id, project=self.__project, fields=self.__fields)
+            self.__loaded_fields[work_item_id] = set(self.__fields) if self.__fields is not None else None
+            self.__set_persisted(work_item)
+            return work_item
+
+        return self.__coalesce(work_item_id, _load)
+
+    def put(self, work_item: WorkItem, loaded_fields: list[str] = None):
+        future = Future()
+        future.set_result(work_item)
+        with self.__lock:
+            self.__work_items[work_item.id] = future
+            self.__loaded_fields[work_item.id] = set(loaded_fields) if loaded_fields is not None else None
+            self.__set_persisted(work_item)
+
+    def load_fields(self, work_item_id: int, fields: list[str]) -> dict[str, any]:
+        work_item = self.get(work_item_id)
+        loaded_fields = self.__loaded_fields.get(work_item_id)
+        missing_fields = [field for field in fields if loaded_fields is not None and field not in loaded_fields]
+        if len(missing_fields) > 0:
+            def _load():
+                return self.__client.get_work_item(id=work_item_id, project=self.__project, fields=missing_fields).fields or {}
+
+            field_values = self.__coalesce((work_item_id, *missing_fields), _load)
+            with self.__lock:
+                if not work_item.fields:
+                    work_item.fields = {}
+                for field in missing_fields:
+                    if field in field_values:
+                        work_item.fields.setdefault(field, field_values[field])
+                loaded_fields.update(missing_fields)
+
+        return {field: work_item.fields[field] for field in fields if work_item.fields and field in work_item.fields}
+
+    def add_changes(self, logger: log.Logger, work_item_id: int, changes: list[JsonPatchOperation]):
+        with self.__lock:
+            merged_changes = self.__changes.setdefault(work_item_id, {})
+            for change in changes:
+                merged_changes[change.path] = change
+            self.__loggers.setdefault(work_item_id, logger)
+
+    def flush(self, apply_changes: bool):
+        with self.__lock:
+            pending_changes = self.__changes
+            loggers = self.__loggers
+            self.__changes = {}
+            self.__loggers = {}
+
+        for work_item_id, merged_changes in pending_changes.items():
+            changes = list(merged_changes.values())
+            logger = loggers[work_item_id]
+            state, work_item_type = self.__persisted.get(work_item_id, (None, None))
+            if self.__validator:
+                changes = self.__validator.validate(logger, work_item_id, work_item_type, state, changes)
+                if len(changes) == 0:
+                    continue
+
+            if apply_changes:
+                try:
+                    with tracing.span("update_work_item", root=True, attributes={"work_item": work_item_id}):
+                        self.__client.update_work_item(id=work_item_id, document=changes, project=self.__project)
+                    logger.info(f"Updated WorkItem: {azure_helper.pretty_changes(changes)}")
+                    for change in changes:
+                        if change.path == models.WorkItemField.STATE.field_path:
+                            self.__persisted[work_item_id] = (change.value, work_item_type)
+                except AzureDevOpsServiceError as e:
+                    logger.error(e)
+            else:
+                logger.info(f"Would update WorkItem: {azure_helper.pretty_changes(changes)}")
@@ -1,4 +1,5 @@
 import os
+import re
 from typing import Callable
 type Mapper = Callable[[str], any]
 
@@ -25,3 +26,12 @@ def getenv(key: str, default: any|Callable = None, mapper: Mapper = None):
 
 def parse_true(param: any) -> bool:
     return str(param).lower() in ["1", "on", "true", "yes"]
+
+__duration_regex = re.compile("^(?:(\\d+(?:\\.\\d+)?)h)?(?:(\\d+(?:\\.\\d+)?)m)?(?:(\\d+(?:\\.\\d+)?)s?)?$")
+
+def parse_duration(param: str) -> float:
+    matches = __duration_regex.match(str(param).strip())
+    if not matches or not any(matches.groups()):
+        raise ValueError(f"Invalid duration: '{param}' (use e.g. '90', '30m' or '1h30m')")
+    hours, minutes, seconds = (float(group) if group else 0 for group in matches.groups())
+    return hours * 3600 + minutes * 60 + seconds
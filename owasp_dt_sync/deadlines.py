@@ -0,0 +1,219 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from typing import Callable
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from owasp_dt_sync import config, stats, http_cache
+
+# Default (connect, read) timeouts in seconds by endpoint class, configurable by HTTP_TIMEOUT_<CLASS>
+DEFAULT_TIMEOUTS = {
+    "findings": (10, 300),
+    "analysis": (10, 30),
+    "work_items": (10, 30),
+    "queries": (10, 120),
+    "default": (10, 60),
+}
+
+__ENDPOINT_PATHS = [
+    ("/v1/finding", "findings"),
+    ("/v1/analysis", "analysis"),
+    ("/_apis/wit/wiql", "queries"),
+    ("/_apis/wit/workitemsbatch", "queries"),
+    ("/_apis/wit/workitems", "work_items"),
+]
+
+__deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("deadline", default=None)
+
+
+class RequestTimeout(TimeoutError):
+    pass
+
+
+class DeadlineExceeded(RequestTimeout):
+    pass
+
+
+def get_endpoint_class(url: str) -> str:
+    path = url.split("?", 1)[0]
+    for endpoint_path, endpoint_class in __ENDPOINT_PATHS:
+        if endpoint_path in path:
+            return endpoint_class
+    return "default"
+
+
+def parse_timeout(param: str) -> tuple[float, float]:
+    values = [float(value) for value in str(param).split(",")]
+    if len(values) == 1:
+        values = values * 2
+    if len(values) != 2 or min(values) <= 0:
+        raise ValueError(f"Invalid timeout: '{param}' (use e.g. '30' or '10,30' for connect and read timeout)")
+    return values[0], values[1]
+
+
+def load_timeouts_from_env() -> dict[str, tuple[float, float]]:
+    return {
+        endpoint_class: config.getenv(f"HTTP_TIMEOUT_{endpoint_class.upper()}", default_timeout, lambda value: parse_timeout(value) if value else "")
+        for endpoint_class, default_timeout in DEFAULT_TIMEOUTS.items()
+    }
+
+
+def timeouts_defined_in_env() -> bool:
+    return any(config.getenv(f"HTTP_TIMEOUT_{endpoint_class.upper()}") for endpoint_class in DEFAULT_TIMEOUTS)
+
+
+@contextmanager
+def deadline(seconds: float | None):
+    if seconds is None:
+        yield
+        return
+
+    token = __deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        __deadline.reset(token)
+
+
+def get_remaining() -> float | None:
+    deadline_time = __deadline.get()
+    if deadline_time is None:
+        return None
+    return deadline_time - time.monotonic()
+
+
+def bind_context(fn: Callable) -> Callable:
+    # Executor threads don't inherit the context (and the deadline) of the submitting thread
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.__lock = threading.Lock()
+        self.__samples: deque[float] = deque(maxlen=window)
+        self.__min_samples = min_samples
+
+    def add(self, latency: float):
+        with self.__lock:
+            self.__samples.append(latency)
+
+    def get_percentile(self, percentile: float) -> float | None:
+        with self.__lock:
+            if len(self.__samples) < self.__min_samples:
+                return None
+            samples = sorted(self.__samples)
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+
+
+# Applies the endpoint timeouts and the current deadline to requests and hedges slow idempotent reads
+class RequestPolicy:
+    def __init__(self, timeouts: dict[str, tuple[float, float]] = None, hedge_percentile: float = None, max_workers: int = 32):
+        assert hedge_percentile is None or 0 < hedge_percentile < 100, "Hedge percentile must be between 0 and 100"
+        self.__timeouts = timeouts or dict(DEFAULT_TIMEOUTS)
+        self.__hedge_percentile = hedge_percentile
+        self.__trackers = {endpoint_class: LatencyTracker() for endpoint_class in self.__timeouts}
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge") if hedge_percentile else None
+
+    def get_timeout(self, endpoint_class: str) -> tuple[float, float]:
+        connect_timeout, read_timeout = self.__timeouts.get(endpoint_class, self.__timeouts["default"])
+        remaining = get_remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                stats.increment("deadlines_exceeded")
+                raise DeadlineExceeded("Finding deadline exceeded")
+            connect_timeout = min(connect_timeout, remaining)
+            read_timeout = min(read_timeout, remaining)
+        return connect_timeout, read_timeout
+
+    def execute[T](self, url: str, idempotent: bool, send: Callable[[tuple[float, float]], T], timeout_errors: tuple[type[Exception], ...]) -> T:
+        endpoint_class = get_endpoint_class(url)
+        timeout = self.get_timeout(endpoint_class)
+        tracker = self.__trackers.setdefault(endpoint_class, LatencyTracker())
+        hedge_delay = tracker.get_percentile(self.__hedge_percentile) if idempotent and self.__executor else None
+
+        start_time = time.monotonic()
+        try:
+            if hedge_delay is None:
+                result = send(timeout)
+            else:
+                result = self.__hedge(endpoint_class, send, timeout, hedge_delay)
+        except timeout_errors as e:
+            stats.increment(f"timeouts.{endpoint_class}")
+            remaining = get_remaining()
+            if remaining is not None and remaining <= 0:
+                stats.increment("deadlines_exceeded")
+                raise DeadlineExceeded(f"Finding deadline exceeded: {url}") from e
+            raise RequestTimeout(f"Request timed out after {timeout} seconds: {url}") from e
+
+        tracker.add(time.monotonic() - start_time)
+        return result
+
+    def __hedge[T](self, endpoint_class: str, send: Callable[[tuple[float, float]], T], timeout: tuple[float, float], hedge_delay: float) -> T:
+        primary = self.__executor.submit(send, timeout)
+        done, _ = wait([primary], timeout=hedge_delay)
+        if done:
+            return primary.result()
+
+        stats.increment(f"hedges.{endpoint_class}")
+        hedge = self.__executor.submit(send, timeout)
+        pending: set[Future] = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        stats.increment(f"hedges_won.{endpoint_class}")
+                    return future.result()
+
+        raise primary.exception()
+
+    def shutdown(self):
+        if self.__executor:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+
+
+# httpx transport of the OWASP Dependency Track client
+class PolicyTransport(httpx.BaseTransport):
+    def __init__(self, transport: httpx.BaseTransport, policy: RequestPolicy):
+        self.__transport = transport
+        self.__policy = policy
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        def _send(timeout: tuple[float, float]):
+            connect_timeout, read_timeout = timeout
+            request.extensions = {**request.extensions, "timeout": {"connect": connect_timeout, "read": read_timeout, "write": read_timeout, "pool": connect_timeout}}
+            response = self.__transport.handle_request(request)
+            # Read within the timeout, so that hedged responses don't block their connections
+            body = response.read()
+            response.close()
+            return httpx.Response(response.status_code, headers=http_cache.filter_headers(response.headers), content=body, request=request)
+
+        url = str(request.url)
+        return self.__policy.execute(url, http_cache.is_read_request(request.method, url), _send, (httpx.TimeoutException,))
+
+    def close(self):
+        self.__transport.close()
+
+
+# requests adapter of the Azure DevOps clients
+class PolicyAdapter(HTTPAdapter):
+    def __init__(self, policy: RequestPolicy, max_retries=0):
+        super().__init__(max_retries=max_retries)
+        self.__policy = policy
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        def _send(timeout: tuple[float, float]):
+            response = super(PolicyAdapter, self).send(request, **{**kwargs, "timeout": timeout})
+            # Read within the timeout, so that hedged responses don't block their connections
+            _ = response.content
+            return response
+
+        return self.__policy.execute(request.url, http_cache.is_read_request(request.method, request.url), _send, (requests.Timeout,))
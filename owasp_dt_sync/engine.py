@@ -0,0 +1,427 @@
+import dataclasses
+import functools
+import itertools
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import dotenv
+from owasp_dt import AuthenticatedClient
+from owasp_dt.models import Finding, Analysis
+
+from owasp_dt_sync import owasp_dt_helper, models, log, globals, mappers, journal, findings_file, scheduler, reference_index, targets, http_cache, deadlines, stats, selection, mapper_pool, sync, reconcile, tracing
+from owasp_dt_sync.filters import FindingFilter
+
+@dataclass
+class SyncOptions:
+    apply_changes: bool = False
+    fix_references: bool = False
+    workers: int = 4
+    mapper_path: Path | None = None
+    template_path: Path | None = None
+    mapper_processes: int | None = None
+    cache_reads: Path | None = None
+    cache_ttl: float = 24 * 3600
+    hedge_percentile: float | None = None
+    finding_deadline: float | None = None
+    verify_references: str | None = None
+    reference_index: bool = False
+    aggregation: models.Aggregation | None = None
+    prioritize: bool = False
+    max_duration: float | None = None
+    journal_path: Path | None = None
+    resume: bool = False
+    cvss_min_score: float | None = None
+    load_suppressed: bool = False
+    load_inactive: bool = False
+    finding_filter: FindingFilter | None = None
+    reconcile: str | None = None
+    stale_state: str = "Closed"
+    reconcile_memory_keys: int = 1_000_000
+    trace_path: Path | None = None
+    trace_format: str = "chrome"
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            apply_changes=args.apply,
+            fix_references=args.fix_references,
+            workers=args.workers,
+            mapper_path=args.mapper,
+            template_path=args.template,
+            mapper_processes=args.mapper_processes,
+            cache_reads=args.cache_reads,
+            cache_ttl=args.cache_ttl,
+            hedge_percentile=args.hedge_percentile,
+            finding_deadline=args.finding_deadline,
+            verify_references=args.verify_references,
+            reference_index=args.reference_index,
+            aggregation=models.Aggregation(args.aggregate) if args.aggregate else None,
+            prioritize=args.prioritize,
+            max_duration=args.max_duration,
+            journal_path=args.journal,
+            resume=args.resume,
+            cvss_min_score=args.cvss_min_score,
+            load_suppressed=args.load_suppressed,
+            load_inactive=args.load_inactive,
+            finding_filter=FindingFilter(
+                severities=args.severity,
+                analysis_states=args.analysis_state,
+                attributed_from=args.attributed_from,
+                attributed_to=args.attributed_to,
+                epss_min_score=args.epss_min_score,
+                project_tags=args.project_tag,
+                project_classifiers=args.project_classifier,
+            ),
+            reconcile=args.reconcile,
+            stale_state=args.stale_state,
+            reconcile_memory_keys=args.reconcile_memory_keys,
+            trace_path=args.trace,
+            trace_format=args.trace_format,
+        )
+
+
+# Synchronizes Findings with its targets. The engine owns its clients, mapper, template env and caches,
+# so that several engines can run concurrently in one process. Runs of one engine are serialized.
+class SyncEngine:
+    def __init__(self, sync_targets: list[targets.Target], options: SyncOptions = None, owasp_dt_client: AuthenticatedClient = None):
+        self.__options = options = options or SyncOptions()
+        assert not (options.cache_reads and options.apply_changes), "Cached reads can only be replayed in dry-run mode (remove --apply parameter)"
+        assert not options.resume or options.journal_path, "Resuming requires a journal file (add --journal parameter)"
+
+        self.__settings = globals.Settings(
+            apply_changes=options.apply_changes,
+            fix_references=options.fix_references,
+            workers=options.workers,
+            template_path=options.template_path or globals.DEFAULT_TEMPLATE_PATH,
+        )
+        self.__stats = stats.Stats()
+        self.__tracer = tracing.Tracer() if options.trace_path else None
+        self.__lock = threading.Lock()
+        if options.mapper_path:
+            mappers.load_custom_mapper_module(options.mapper_path, self.__settings.mapper)
+        # Findings are filtered by the mapper after they have been observed, so that the WorkItems of rejected Findings are neither stale nor orphaned
+        self.__process_finding = self.__settings.mapper.process_finding
+        self.__settings.mapper = dataclasses.replace(self.__settings.mapper, process_finding=lambda finding: True)
+
+        self.__response_store = http_cache.ResponseStore(options.cache_reads, ttl=options.cache_ttl) if options.cache_reads else None
+        # Requests are only sent through the policy when timeouts, deadlines or hedged reads are configured
+        if options.finding_deadline or options.hedge_percentile or deadlines.timeouts_defined_in_env():
+            self.__request_policy = deadlines.RequestPolicy(deadlines.load_timeouts_from_env(), hedge_percentile=options.hedge_percentile)
+        else:
+            self.__request_policy = None
+        if options.mapper_processes:
+            self.__pool = mapper_pool.MapperPool(options.mapper_path, options.mapper_processes, self.__settings.template_path)
+            self.__settings.mapper = self.__pool.create_mapper(self.__settings.mapper)
+        else:
+            self.__pool = None
+        self.__finding_filter = FindingFilter(cvss_min_score=options.cvss_min_score).merge(options.finding_filter).merge(self.__settings.mapper.finding_filter)
+        assert not options.reconcile or self.loads_all_findings, "Reconciliation requires all Findings to be loaded (add --load-suppressed and --load-inactive parameters and remove the Finding filters)"
+
+        with self.activate():
+            fields = sync.get_read_fields()
+            self.__contexts = [targets.TargetContext(target, fields=fields, response_store=self.__response_store, request_policy=self.__request_policy) for target in sync_targets]
+            self.__router = targets.Router(self.__contexts)
+        self.__owasp_dt_client = owasp_dt_client or owasp_dt_helper.create_client_from_env(response_store=self.__response_store, request_policy=self.__request_policy)
+
+    @property
+    def options(self) -> SyncOptions:
+        return self.__options
+
+    @property
+    def settings(self) -> globals.Settings:
+        return self.__settings
+
+    @property
+    def stats(self) -> stats.Stats:
+        return self.__stats
+
+    @property
+    def tracer(self) -> tracing.Tracer | None:
+        return self.__tracer
+
+    @property
+    def finding_filter(self) -> FindingFilter:
+        return self.__finding_filter
+
+    @property
+    def loads_all_findings(self) -> bool:
+        # WorkItems of Findings that are not loaded would be considered stale or orphaned
+        return self.__options.load_suppressed and self.__options.load_inactive and self.__finding_filter == FindingFilter()
+
+    @property
+    def contexts(self) -> list[targets.TargetContext]:
+        return list(self.__contexts)
+
+    @property
+    def router(self) -> targets.Router:
+        return self.__router
+
+    @property
+    def owasp_dt_client(self) -> AuthenticatedClient:
+        return self.__owasp_dt_client
+
+    @contextmanager
+    def activate(self):
+        # Module functions like sync.sync_finding() use the settings of the active engine
+        with globals.use_settings(self.__settings), stats.use_stats(self.__stats), tracing.use_tracer(self.__tracer):
+            yield self
+
+    def load_findings(self) -> Iterable[Finding]:
+        with self.activate():
+            if self.__finding_filter.selects_projects:
+                selected = selection.Selection(self.__owasp_dt_client, load_inactive=self.__options.load_inactive)
+                for project_uuid in selection.find_tagged_project_uuids(self.__owasp_dt_client, self.__finding_filter, self.__options.load_inactive):
+                    selected.add(project_uuid)
+                log.logger.info(f"Loading Findings of {len(selected.project_uuids)} projects matching the project filters")
+                return selected.load_findings(load_suppressed=self.__options.load_suppressed, finding_filter=self.__finding_filter)
+
+            return owasp_dt_helper.load_and_filter_findings(
+                client=self.__owasp_dt_client,
+                load_suppressed=self.__options.load_suppressed,
+                load_inactive=self.__options.load_inactive,
+                finding_filter=self.__finding_filter,
+            )
+
+    def sync_all(self):
+        self.sync_findings(self.load_findings(), complete=True)
+
+    def sync_findings(self, findings: Iterable[Finding], complete: bool = False):
+        # Orphans and stale WorkItems are only reconciled when the Findings are complete
+        with self.__lock, self.activate():
+            self.__stats.reset()
+            if self.__tracer:
+                self.__tracer.reset()
+            if not self.__settings.apply_changes:
+                log.logger.info("Running in dry-run mode (add --apply parameter to perform changes)")
+            seen_keys = reconcile.KeySet(self.__options.reconcile_memory_keys) if self.__options.reconcile else None
+            try:
+                self.__sync(findings, complete, seen_keys)
+            finally:
+                if seen_keys:
+                    seen_keys.close()
+                if self.__settings.journal:
+                    self.__settings.journal.close()
+                    self.__settings.journal = None
+                stats.log_summary()
+                if self.__tracer:
+                    self.__tracer.export(self.__options.trace_path, self.__options.trace_format)
+                    log.logger.info(f"Exported {len(self.__tracer.spans)} spans to '{self.__options.trace_path}'")
+
+    def __sync(self, findings: Iterable[Finding], complete: bool, seen_keys: reconcile.KeySet = None):
+        options = self.__options
+        owasp_dt_client = self.__owasp_dt_client
+        contexts = self.__contexts
+        router = self.__router
+        for context in contexts:
+            context.begin()
+            if options.reference_index:
+                context.reference_index = reference_index.load_reference_index(context.work_item_tracking_client, context.azure_project, fields=sync.get_read_fields(), work_item_cache=context.work_item_cache)
+
+        if options.journal_path:
+            self.__settings.journal = sync_journal = journal.Journal(options.journal_path, resume=options.resume)
+            if options.resume:
+                log.logger.info(f"Resuming from journal '{options.journal_path}': {sync_journal.processed_count} Findings processed, {sync_journal.pending_create_count} WorkItem creations to reconcile")
+                findings = filter(lambda finding: not sync_journal.is_processed(owasp_dt_helper.create_finding_key(finding)), findings)
+
+        if seen_keys or options.reference_index:
+            findings = self.__observe(findings, seen_keys)
+
+        if self.__pool:
+            findings = self.__pool.filter_findings(findings)
+        else:
+            findings = filter(self.__process_finding, findings)
+
+        findings = router.filter_routable(findings)
+
+        aggregation = options.aggregation
+
+        if options.verify_references:
+            findings_with_analysis = []
+            for target_name, target_findings in router.partition(findings).items():
+                context = router.get(target_name)
+                findings_with_analysis.extend(sync.verify_references(
+                    owasp_dt_client=owasp_dt_client,
+                    work_item_tracking_client=context.work_item_tracking_client,
+                    azure_project=context.azure_project,
+                    findings=target_findings,
+                    area_path=context.target.area_path,
+                ))
+            if options.verify_references == "only":
+                return
+        else:
+            findings_with_analysis = map(lambda finding: (finding, None), findings)
+
+        if aggregation:
+            finding_groups = sync.group_findings(aggregation, findings_with_analysis, router)
+        else:
+            finding_groups = map(lambda finding_with_analysis: [finding_with_analysis], findings_with_analysis)
+
+        if options.prioritize:
+            finding_groups = scheduler.prioritize(finding_groups)
+
+        failures: list[BaseException] = []
+
+        def _sync_group(context: targets.TargetContext, finding_group: list[tuple[Finding, Analysis | None]]):
+            if aggregation:
+                logger = models.create_aggregation_logger(aggregation, [finding for finding, _ in finding_group])
+            else:
+                logger = models.create_finding_logger(finding_group[0][0])
+            if len(contexts) > 1:
+                logger = log.get_logger(logger, target=context.name)
+
+            try:
+                with deadlines.deadline(options.finding_deadline):
+                    sync.sync_target_finding_group(logger, owasp_dt_client, context, finding_group, aggregation)
+            except deadlines.RequestTimeout as e:
+                # Skipped Findings are not marked as processed and will be retried
+                logger.error(f"Skipped: {e}")
+                stats.increment("findings_skipped")
+                return
+            except BaseException as e:
+                failures.append(e)
+                raise
+
+            stats.increment("findings_synced", len(finding_group))
+            context.complete(owasp_dt_helper.create_finding_key(finding) for finding, _ in finding_group)
+            # The Analyses are already written, an interrupted sync must not lose the WorkItem changes
+            context.flush(globals.apply_changes, globals.journal)
+
+        time_budget = scheduler.TimeBudget(options.max_duration)
+        # Orphans and stale WorkItems can only be determined when all Findings are synchronized
+        all_synced = complete and not options.resume
+        finding_groups = iter(finding_groups)
+        try:
+            for finding_group in finding_groups:
+                if len(failures) > 0:
+                    # Stop dispatching, the running Findings are completed
+                    all_synced = False
+                    break
+
+                if time_budget.exhausted:
+                    remaining = scheduler.count_severities(itertools.chain([finding_group], finding_groups))
+                    log.logger.warning(f"Time budget of {time_budget.max_duration}s exhausted, remaining Findings: {sum(remaining.values())} {remaining}")
+                    all_synced = False
+                    break
+
+                context = router.route(finding_group[0][0])
+                context.submit(functools.partial(_sync_group, context, finding_group))
+        finally:
+            for context in contexts:
+                context.join(cancel=len(failures) > 0)
+
+        for context in contexts:
+            context.flush(globals.apply_changes, globals.journal)
+            context.validator.report()
+
+        if len(failures) > 0:
+            raise failures[0]
+
+        kind = aggregation.value if aggregation else "finding"
+        if options.reference_index and all_synced:
+            if self.loads_all_findings:
+                for context in contexts:
+                    reference_index.report_orphans(context.reference_index, kind)
+            else:
+                log.logger.info("Orphaned WorkItems are only reported when all Findings are loaded (add --load-suppressed and --load-inactive parameters and remove the Finding filters)")
+
+        if seen_keys and all_synced:
+            for context in contexts:
+                reconcile.reconcile_stale_work_items(
+                    logger=log.get_logger(target=context.name) if len(contexts) > 1 else log.logger,
+                    work_item_tracking_client=context.work_item_tracking_client,
+                    azure_project=context.azure_project,
+                    seen_keys=seen_keys,
+                    target_name=context.name,
+                    kind=kind,
+                    action=options.reconcile,
+                    stale_state=options.stale_state,
+                    validator=context.validator,
+                )
+        elif seen_keys:
+            log.logger.warning("Skipped the reconciliation of stale WorkItems, because not all Findings have been synchronized")
+
+    def __observe(self, findings: Iterable[Finding], seen_keys: reconcile.KeySet = None) -> Iterator[Finding]:
+        for finding in findings:
+            context = self.__router.route(finding)
+            if context is not None:
+                if self.__options.aggregation:
+                    reference_tag = self.__options.aggregation.create_reference_tag(finding)
+                else:
+                    reference_tag = sync.get_finding_reference_tag(finding)
+                if context.reference_index is not None:
+                    context.reference_index.mark_seen(reference_tag)
+                if seen_keys:
+                    seen_keys.add(reconcile.create_seen_key(context.name, reference_tag))
+            yield finding
+
+    def close(self):
+        for context in self.__contexts:
+            context.shutdown()
+        if self.__request_policy:
+            self.__request_policy.shutdown()
+        if self.__pool:
+            self.__pool.shutdown()
+        if self.__response_store:
+            log.logger.info(f"Replayed {self.__response_store.hits} cached responses, recorded {self.__response_store.misses} responses to '{self.__options.cache_reads}'")
+            self.__response_store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load_selected_findings(args, sync_engine: SyncEngine) -> Iterator[Finding]:
+    selected = selection.Selection(sync_engine.owasp_dt_client, load_inactive=args.load_inactive)
+    if args.vulnerability:
+        for vulnerability in args.vulnerability:
+            selected.add_vulnerability(vulnerability)
+        if args.project:
+            # Projects restrict the selected vulnerabilities to their Findings
+            selected.restrict(set(itertools.chain.from_iterable(selected.find_projects(project) for project in args.project)))
+    else:
+        for project in args.project or []:
+            selected.add_project(project)
+    if args.work_item:
+        found_ids: set[int] = set()
+        for context in sync_engine.contexts:
+            found_ids |= selected.add_work_items(context.work_item_tracking_client, context.azure_project, args.work_item)
+        for work_item_id in sorted(set(args.work_item) - found_ids):
+            log.get_logger(work_item=work_item_id).warning("WorkItem not found")
+    if sync_engine.finding_filter.selects_projects:
+        selected.restrict(selection.find_tagged_project_uuids(sync_engine.owasp_dt_client, sync_engine.finding_filter, args.load_inactive))
+
+    log.logger.info(f"Loading selected Findings of {len(selected.project_uuids)} projects")
+    return selected.load_findings(load_suppressed=args.load_suppressed, finding_filter=sync_engine.finding_filter)
+
+
+def handle_sync(args):
+    if args.env:
+        assert dotenv.load_dotenv(args.env), f"Unable to load env file: '{args.env}'"
+
+    # Findings files and selectors may not contain the whole portfolio, the WorkItems of the other Findings would be stale
+    assert not args.reconcile or not (args.findings_from or args.project or args.vulnerability or args.work_item), "Reconciliation requires the Findings of the whole portfolio (remove --findings-from and the selectors)"
+
+    if args.targets:
+        sync_targets = targets.load_targets(args.targets)
+    else:
+        sync_targets = [targets.create_target_from_env(workers=args.workers)]
+
+    with SyncEngine(sync_targets, SyncOptions.from_args(args)) as sync_engine:
+        if args.project or args.vulnerability or args.work_item:
+            assert not args.findings_from, "Selectors cannot be combined with --findings-from"
+            sync_engine.sync_findings(load_selected_findings(args, sync_engine))
+        elif args.findings_from:
+            if sync_engine.finding_filter.selects_projects:
+                log.logger.warning("Project tags and classifiers are not filtered in Findings files")
+            sync_engine.sync_findings(findings_file.load_and_filter_findings(
+                paths=args.findings_from,
+                load_suppressed=args.load_suppressed,
+                finding_filter=sync_engine.finding_filter,
+            ))
+        else:
+            sync_engine.sync_all()
@@ -0,0 +1,149 @@
+import dataclasses
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+
+from owasp_dt.models import Finding, FindingAnalysisState
+
+from owasp_dt_sync import scheduler
+
+ANALYSIS_STATES = [state.value for state in FindingAnalysisState]
+
+
+def parse_list(values: str | list[str] | None) -> list[str]:
+    if values is None:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    return [value.strip().upper() for values_str in values for value in values_str.split(",") if len(value.strip()) > 0]
+
+
+def parse_date(value: str | date | None) -> date | None:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def get_analysis_state(finding: Finding) -> str:
+    state = getattr(finding.analysis, "state", None)
+    return str(state) if isinstance(state, FindingAnalysisState) else FindingAnalysisState.NOT_SET.value
+
+
+def get_attributed_date(finding: Finding) -> date | None:
+    attributed_on = getattr(finding.attribution, "attributed_on", None)
+    if not isinstance(attributed_on, int):
+        return None
+    return datetime.fromtimestamp(attributed_on / 1000, timezone.utc).date()
+
+
+def merge_lists(name: str, values: list[str], other_values: list[str]) -> list[str]:
+    if len(values) == 0 or len(other_values) == 0:
+        return values or other_values
+    merged_values = [value for value in values if value in other_values]
+    if len(merged_values) == 0:
+        raise ValueError(f"Finding filters of {name} {values} and {other_values} exclude all Findings")
+    return merged_values
+
+
+def merge_max(value, other_value):
+    if value is None or other_value is None:
+        return value if other_value is None else other_value
+    return max(value, other_value)
+
+
+def merge_min(value, other_value):
+    if value is None or other_value is None:
+        return value if other_value is None else other_value
+    return min(value, other_value)
+
+
+# Declarative Finding filters, which are applied by OWASP Dependency Track where possible.
+# Empty lists and None values don't filter.
+@dataclass
+class FindingFilter:
+    severities: list[str] = field(default_factory=list)
+    analysis_states: list[str] = field(default_factory=list)
+    attributed_from: date | None = None
+    attributed_to: date | None = None
+    cvss_min_score: float | None = None
+    epss_min_score: float | None = None
+    project_tags: list[str] = field(default_factory=list)
+    project_classifiers: list[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.severities = parse_list(self.severities)
+        self.analysis_states = parse_list(self.analysis_states)
+        self.project_classifiers = parse_list(self.project_classifiers)
+        self.project_tags = [tag.strip() for tag in self.project_tags or [] if len(tag.strip()) > 0]
+        self.attributed_from = parse_date(self.attributed_from)
+        self.attributed_to = parse_date(self.attributed_to)
+
+        for severity in self.severities:
+            if severity not in scheduler.SEVERITIES:
+                raise ValueError(f"Unknown severity '{severity}' (use one of {scheduler.SEVERITIES})")
+        for analysis_state in self.analysis_states:
+            if analysis_state not in ANALYSIS_STATES:
+                raise ValueError(f"Unknown analysis state '{analysis_state}' (use one of {ANALYSIS_STATES})")
+
+    @classmethod
+    def from_dict(cls, values: dict):
+        field_names = {filter_field.name for filter_field in dataclasses.fields(cls)}
+        unknown_names = set(values.keys()) - field_names
+        assert len(unknown_names) == 0, f"Unknown Finding filters: {sorted(unknown_names)} (use {sorted(field_names)})"
+        return cls(**values)
+
+    @property
+    def selects_projects(self) -> bool:
+        return len(self.project_tags) > 0 or len(self.project_classifiers) > 0
+
+    def merge(self, other: "FindingFilter | None") -> "FindingFilter":
+        # Findings have to match both filters
+        if other is None:
+            return self
+        return FindingFilter(
+            severities=merge_lists("severities", self.severities, other.severities),
+            analysis_states=merge_lists("analysis states", self.analysis_states, other.analysis_states),
+            attributed_from=merge_max(self.attributed_from, other.attributed_from),
+            attributed_to=merge_min(self.attributed_to, other.attributed_to),
+            cvss_min_score=merge_max(self.cvss_min_score, other.cvss_min_score),
+            epss_min_score=merge_max(self.epss_min_score, other.epss_min_score),
+            project_tags=merge_lists("project tags", self.project_tags, other.project_tags),
+            project_classifiers=merge_lists("project classifiers", self.project_classifiers, other.project_classifiers),
+        )
+
+    def get_query_params(self) -> dict[str, str]:
+        # Parameters of the findings API, EPSS scores and projects are not filtered by it
+        params = {}
+        if self.severities:
+            params["severity"] = ",".join(self.severities)
+        if self.analysis_states:
+            params["analysis_status"] = ",".join(self.analysis_states)
+        if self.attributed_from:
+            params["attributed_on_date_from"] = self.attributed_from.isoformat()
+        if self.attributed_to:
+            params["attributed_on_date_to"] = self.attributed_to.isoformat()
+        if self.cvss_min_score:
+            params["cvssv_2_from"] = str(self.cvss_min_score)
+            params["cvssv_3_from"] = str(self.cvss_min_score)
+        return params
+
+    def matches(self, finding: Finding) -> bool:
+        # Projects are selected before loading their Findings
+        if self.severities and str(finding.vulnerability.severity).upper() not in self.severities:
+            return False
+        if self.analysis_states and get_analysis_state(finding) not in self.analysis_states:
+            return False
+        if self.attributed_from or self.attributed_to:
+            attributed_date = get_attributed_date(finding)
+            if attributed_date is None:
+                return False
+            if self.attributed_from and attributed_date < self.attributed_from:
+                return False
+            if self.attributed_to and attributed_date > self.attributed_to:
+                return False
+        if self.cvss_min_score and scheduler.get_cvss(finding) < self.cvss_min_score:
+            return False
+        if self.epss_min_score is not None:
+            epss_score = finding.vulnerability.epss_score
+            if not isinstance(epss_score, (int, float)) or epss_score < self.epss_min_score:
+                return False
+        return True
@@ -0,0 +1,176 @@
+import gzip
+import json
+from pathlib import Path
+from typing import Iterator, TextIO, Iterable
+
+from owasp_dt.models import Finding
+
+from owasp_dt_sync import globals
+from owasp_dt_sync.filters import FindingFilter
+
+
+# Decodes JSON values one by one from a text stream, without loading the whole document
+class JsonStreamReader:
+    def __init__(self, file: TextIO, chunk_size: int = 64 * 1024, max_value_size: int = 16 * 1024 * 1024):
+        self.__file = file
+        self.__chunk_size = chunk_size
+        self.__max_value_size = max_value_size
+        self.__buffer = ""
+        self.__position = 0
+        self.__decoder = json.JSONDecoder()
+
+    def __fill(self) -> bool:
+        chunk = self.__file.read(self.__chunk_size)
+        if not chunk:
+            return False
+        self.__buffer = self.__buffer[self.__position:] + chunk
+        self.__position = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.__position < len(self.__buffer) and self.__buffer[self.__position].isspace():
+                self.__position += 1
+            if self.__position < len(self.__buffer):
+                return self.__buffer[self.__position]
+            if not self.__fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid JSON: expected '{char}' but found '{found}'")
+        self.__position += 1
+
+    def read_value(self) -> any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer, self.__position)
+            except json.JSONDecodeError as e:
+                # Invalid documents would be buffered until the end of the file
+                if len(self.__buffer) - self.__position > self.__max_value_size:
+                    raise ValueError(f"Invalid JSON: no value within {self.__max_value_size} characters ({e.msg})") from e
+                if self.__fill():
+                    continue
+                raise
+
+            # A value ending at the end of the buffer may continue in the next chunk
+            if end == len(self.__buffer) and self.__fill():
+                continue
+
+            self.__position = end
+            return value
+
+    def read_array(self) -> Iterator[any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.expect("]")
+            return
+
+        while True:
+            yield self.read_value()
+            if self.peek() == ",":
+                self.expect(",")
+            else:
+                self.expect("]")
+                return
+
+
+def open_text(path: Path) -> TextIO:
+    with open(path, "rb") as file:
+        magic = file.read(2)
+
+    if magic == b"\x1f\x8b":
+        return gzip.open(path, "rt", encoding="utf-8")
+    else:
+        return open(path, encoding="utf-8")
+
+
+def complete_fpf_finding(finding_dict: dict, project: dict):
+    # Findings in FPF exports don't contain the project details
+    component = finding_dict.setdefault("component", {})
+    component.setdefault("project", project.get("uuid"))
+    component.setdefault("projectName", project.get("name"))
+    component.setdefault("projectVersion", project.get("version"))
+    return finding_dict
+
+
+def read_fpf_keys(reader: JsonStreamReader) -> Iterator[str]:
+    # Yields the keys of a FPF document, the reader is positioned at their values
+    reader.expect("{")
+    while reader.peek() != "}":
+        key = reader.read_value()
+        reader.expect(":")
+        yield key
+        if reader.peek() == ",":
+            reader.expect(",")
+    reader.expect("}")
+
+
+def read_fpf_project(path: Path) -> dict:
+    # Reads the project of a FPF document, which follows its findings
+    with open_text(path) as file:
+        reader = JsonStreamReader(file)
+        for key in read_fpf_keys(reader):
+            if key == "findings":
+                for _ in reader.read_array():
+                    pass
+                continue
+
+            value = reader.read_value()
+            if key == "project" and isinstance(value, dict):
+                return value
+
+    raise ValueError(f"Invalid Findings Packaging Format: missing project in '{path}'")
+
+
+def read_findings(path: Path) -> Iterator[Finding]:
+    with open_text(path) as file:
+        reader = JsonStreamReader(file)
+        if reader.peek() == "[":
+            # Saved response of the findings API
+            for finding_dict in reader.read_array():
+                yield Finding.from_dict(finding_dict)
+        else:
+            # Findings Packaging Format
+            project = None
+            for key in read_fpf_keys(reader):
+                if key == "findings":
+                    if project is None:
+                        project = read_fpf_project(path)
+                    for finding_dict in reader.read_array():
+                        yield Finding.from_dict(complete_fpf_finding(finding_dict, project))
+                else:
+                    value = reader.read_value()
+                    if key == "project" and isinstance(value, dict):
+                        project = value
+
+
+def finding_matches_cvss_min_score(finding: Finding, cvss_min_score: float):
+    cvss = finding.vulnerability.cvss_v3_base_score
+    if not isinstance(cvss, (int, float)):
+        cvss = finding.vulnerability.cvss_v2_base_score
+    return isinstance(cvss, (int, float)) and cvss >= cvss_min_score
+
+
+def finding_is_suppressed(finding: Finding):
+    return getattr(finding.analysis, "is_suppressed", False) is True
+
+
+def load_and_filter_findings(
+    paths: Iterable[Path],
+    cvss_min_score: float = None,
+    load_suppressed: bool = False,
+    finding_filter: FindingFilter = None,
+) -> Iterator[Finding]:
+    for path in paths:
+        for finding in read_findings(path):
+            if not load_suppressed and finding_is_suppressed(finding):
+                continue
+            if cvss_min_score and not finding_matches_cvss_min_score(finding, cvss_min_score):
+                continue
+            if finding_filter and not finding_filter.matches(finding):
+                continue
+            if globals.mapper.process_finding(finding):
+                yield finding
@@ -1,8 +1,62 @@
+import contextvars
+import dataclasses
+import sys
+import types
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
 
-from owasp_dt_sync import mappers
+import jinja2
+from azure.devops.released.work_item_tracking import WorkItemType
 
-apply_changes: bool = False
-mapper = mappers.default_mapper
-template_path: Path = Path(__file__).parent / "templates/work_item.html.jinja2"
-fix_references: bool = False
+from owasp_dt_sync import mappers, models
+from owasp_dt_sync.journal import Journal
+
+DEFAULT_TEMPLATE_PATH: Path = Path(__file__).parent / "templates/work_item.html.jinja2"
+# Used instead of the default template for WorkItems of multiple Findings
+DEFAULT_AGGREGATED_TEMPLATE_PATH: Path = Path(__file__).parent / "templates/work_item_aggregated.html.jinja2"
+
+
+# Runtime settings of a sync, every SyncEngine runs with its own settings
+@dataclass
+class Settings:
+    apply_changes: bool = False
+    mapper: models.MapperModule = field(default_factory=lambda: dataclasses.replace(mappers.default_mapper))
+    template_path: Path = DEFAULT_TEMPLATE_PATH
+    fix_references: bool = False
+    workers: int = 4
+    journal: Journal | None = None
+    template_env: jinja2.Environment | None = None
+    # Preferred WorkItem types by organisation and project
+    work_item_types: dict[tuple[str, str], WorkItemType] = field(default_factory=dict)
+
+
+__default_settings = Settings(mapper=mappers.default_mapper)
+__settings: contextvars.ContextVar[Settings] = contextvars.ContextVar("settings")
+
+
+def get_settings() -> Settings:
+    return __settings.get(__default_settings)
+
+
+@contextmanager
+def use_settings(settings: Settings):
+    token = __settings.set(settings)
+    try:
+        yield settings
+    finally:
+        __settings.reset(token)
+
+
+class _SettingsModule(types.ModuleType):
+    pass
+
+
+for _field in dataclasses.fields(Settings):
+    setattr(_SettingsModule, _field.name, property(
+        lambda module, name=_field.name: getattr(get_settings(), name),
+        lambda module, value, name=_field.name: setattr(get_settings(), name, value),
+    ))
+
+# Attributes like globals.apply_changes read and write the settings of the current context
+sys.modules[__name__].__class__ = _SettingsModule
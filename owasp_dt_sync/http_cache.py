@@ -0,0 +1,140 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# POST requests which only read data
+__READ_POST_PATHS = ("/_apis/wit/wiql", "/_apis/wit/workitemsbatch")
+
+# Headers not matching the stored (decoded) body
+__SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class ReadOnlyError(Exception):
+    pass
+
+
+def is_read_request(method: str, url: str) -> bool:
+    # The Azure DevOps SDK reads the resource locations with OPTIONS requests
+    if method.upper() in ("GET", "HEAD", "OPTIONS"):
+        return True
+    path = url.split("?", 1)[0].rstrip("/")
+    return method.upper() == "POST" and path.endswith(__READ_POST_PATHS)
+
+
+def create_request_key(method: str, url: str, body: bytes | str | None) -> str:
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha256(f"{method.upper()} {url}\n".encode("utf-8"))
+    if body:
+        digest.update(body)
+    return digest.hexdigest()
+
+
+def filter_headers(headers) -> dict[str, str]:
+    return {name: value for name, value in headers.items() if name.lower() not in __SKIPPED_HEADERS}
+
+
+# On-disk store of compressed read responses, shared by the OWASP Dependency Track and Azure DevOps clients
+class ResponseStore:
+    def __init__(self, directory: Path, ttl: float = None):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.__ttl = ttl
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(directory / "responses.sqlite", check_same_thread=False)
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created REAL, status INTEGER, headers TEXT, body BLOB)")
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> tuple[int, dict[str, str], bytes] | None:
+        with self.__lock:
+            row = self.__connection.execute("SELECT created, status, headers, body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.__ttl is not None and time.time() - row[0] > self.__ttl):
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        created, status, headers, body = row
+        return status, json.loads(headers), zlib.decompress(body)
+
+    def put(self, key: str, status: int, headers: dict[str, str], body: bytes):
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, time.time(), status, json.dumps(headers), zlib.compress(body)),
+            )
+            self.__connection.commit()
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+
+# httpx transport of the OWASP Dependency Track client
+class CachingTransport(httpx.BaseTransport):
+    def __init__(self, transport: httpx.BaseTransport, store: ResponseStore):
+        self.__transport = transport
+        self.__store = store
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not is_read_request(request.method, str(request.url)):
+            raise ReadOnlyError(f"Writes are forbidden while replaying cached reads: {request.method} {request.url}")
+
+        key = create_request_key(request.method, str(request.url), request.read())
+        cached = self.__store.get(key)
+        if cached is not None:
+            status, headers, body = cached
+            return httpx.Response(status, headers=headers, content=body, request=request)
+
+        response = self.__transport.handle_request(request)
+        body = response.read()
+        response.close()
+        if response.is_success:
+            self.__store.put(key, response.status_code, filter_headers(response.headers), body)
+        return httpx.Response(response.status_code, headers=filter_headers(response.headers), content=body, request=request)
+
+    def close(self):
+        self.__transport.close()
+
+
+# requests adapter of the Azure DevOps clients
+class CachingAdapter(BaseAdapter):
+    def __init__(self, adapter: BaseAdapter, store: ResponseStore):
+        super().__init__()
+        self.__adapter = adapter
+        self.__store = store
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if not is_read_request(request.method, request.url):
+            raise ReadOnlyError(f"Writes are forbidden while replaying cached reads: {request.method} {request.url}")
+
+        key = create_request_key(request.method, request.url, request.body)
+        cached = self.__store.get(key)
+        if cached is not None:
+            status, headers, body = cached
+            response = requests.Response()
+            response.status_code = status
+            response.headers = CaseInsensitiveDict(headers)
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            response.url = request.url
+            response.request = request
+            response.reason = "OK"
+            response._content = body
+            response._content_consumed = True
+            return response
+
+        response = self.__adapter.send(request, **kwargs)
+        if response.ok:
+            self.__store.put(key, response.status_code, filter_headers(response.headers), response.content)
+        return response
+
+    def close(self):
+        self.__adapter.close()
@@ -1,26 +1,30 @@
+from pathlib import Path
+
 import jinja2
 
-__template_env: jinja2.Environment = None
+def create_template_env(template_path: Path) -> jinja2.Environment:
+    template_loader = jinja2.FileSystemLoader(searchpath=[template_path.parent])
+    return jinja2.Environment(
+        loader=template_loader,
+        trim_blocks=True,
+        lstrip_blocks=True
+    )
+    # template_env.filters['regex_replace'] = models.regex_replace
+    # template_env.tests['is_not_defined'] = models.is_not_defined
+    # template_env.tests['is_defined'] = models.is_defined
+    #__template_env.globals["env"] = lambda name, default=None: os.getenv(name, default)
 
 def setup_jina_env():
     from owasp_dt_sync import globals
-    global __template_env
-    if not __template_env:
-        search_paths = []
-        search_paths.append(globals.template_path.parent)
-        template_loader = jinja2.FileSystemLoader(searchpath=search_paths)
-        __template_env = jinja2.Environment(
-            loader=template_loader,
-            trim_blocks=True,
-            lstrip_blocks=True
-        )
-        # template_env.filters['regex_replace'] = models.regex_replace
-        # template_env.tests['is_not_defined'] = models.is_not_defined
-        # template_env.tests['is_defined'] = models.is_defined
-        #__template_env.globals["env"] = lambda name, default=None: os.getenv(name, default)
-    return __template_env
+    settings = globals.get_settings()
+    # The env of the current settings, recreated when the template path changed
+    if not settings.template_env or settings.template_env.loader.searchpath != [str(settings.template_path.parent)]:
+        settings.template_env = create_template_env(settings.template_path)
+    return settings.template_env
 
-def get_template():
+def get_template(aggregated: bool = False):
     env = setup_jina_env()
     from owasp_dt_sync import globals
+    if aggregated and globals.template_path == globals.DEFAULT_TEMPLATE_PATH:
+        return env.get_template(globals.DEFAULT_AGGREGATED_TEMPLATE_PATH.name)
     return env.get_template(globals.template_path.name)
@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+# Append-only journal of processed Findings and WorkItem creations.
+# Processed Finding keys are checkpointed periodically, WorkItem creations are written immediately,
+# so that creations without a linked Analysis can be reconciled when resuming.
+class Journal:
+    def __init__(self, path: Path, resume: bool = False, checkpoint_size: int = 100, checkpoint_seconds: float = 10):
+        self.__lock = threading.Lock()
+        self.__processed: set[str] = set()
+        self.__pending_creates: dict[str, dict] = {}
+        self.__buffer: list[dict] = []
+        self.__checkpoint_size = checkpoint_size
+        self.__checkpoint_seconds = checkpoint_seconds
+        self.__last_checkpoint = time.monotonic()
+
+        if resume:
+            assert path.exists(), f"Unable to resume from missing journal: '{path}'"
+            self.__read(path)
+        else:
+            # The journal of an interrupted sync must not get lost
+            assert not path.exists(), f"Journal already exists: '{path}' (add --resume parameter to continue or remove it)"
+
+        if resume and path.stat().st_size > 0:
+            with open(path, "rb") as file:
+                file.seek(-1, os.SEEK_END)
+                incomplete = file.read(1) != b"\n"
+        else:
+            incomplete = False
+
+        self.__file = open(path, "a" if resume else "w", encoding="utf-8")
+        if incomplete:
+            # Terminate the incomplete record of an interrupted run
+            self.__file.write("\n")
+
+    def __read(self, path: Path):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be incomplete after a crash
+                    continue
+
+                key = record["key"]
+                event = record["event"]
+                if event == "processed":
+                    self.__processed.add(key)
+                elif event == "creating":
+                    self.__pending_creates[key] = record
+                elif event == "created":
+                    self.__pending_creates.setdefault(key, {}).update(record)
+                elif event == "linked":
+                    self.__pending_creates.pop(key, None)
+
+    def __write(self, records: list[dict]):
+        for record in records:
+            self.__file.write(json.dumps(record) + "\n")
+        self.__file.flush()
+
+    def __append(self, record: dict, immediate: bool):
+        with self.__lock:
+            self.__buffer.append(record)
+            if (
+                immediate
+                or len(self.__buffer) >= self.__checkpoint_size
+                or time.monotonic() - self.__last_checkpoint >= self.__checkpoint_seconds
+            ):
+                self.__checkpoint()
+
+    def __checkpoint(self):
+        self.__write(self.__buffer)
+        self.__buffer.clear()
+        self.__last_checkpoint = time.monotonic()
+
+    def is_processed(self, key: str) -> bool:
+        return key in self.__processed
+
+    def get_pending_create(self, key: str) -> dict | None:
+        with self.__lock:
+            return self.__pending_creates.get(key)
+
+    @property
+    def processed_count(self):
+        return len(self.__processed)
+
+    @property
+    def pending_create_count(self):
+        return len(self.__pending_creates)
+
+    def mark_processed(self, key: str):
+        self.__append({"event": "processed", "key": key}, immediate=False)
+
+    def begin_create(self, key: str, reference_tag: str):
+        self.__append({"event": "creating", "key": key, "tag": reference_tag, "timestamp": datetime.now(timezone.utc).isoformat()}, immediate=True)
+
+    def mark_created(self, key: str, work_item_id: int, url: str):
+        self.__append({"event": "created", "key": key, "work_item": work_item_id, "url": url}, immediate=True)
+
+    def mark_linked(self, key: str):
+        with self.__lock:
+            self.__pending_creates.pop(key, None)
+        self.__append({"event": "linked", "key": key}, immediate=True)
+
+    def close(self):
+        with self.__lock:
+            self.__checkpoint()
+            self.__file.close()
@@ -0,0 +1,176 @@
+import dataclasses
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from azure.devops.released.work_item_tracking import WorkItem
+from owasp_dt.models import Finding, Analysis
+from owasp_dt.types import Unset
+
+from owasp_dt_sync import models, mappers
+
+# AnalysisRequest attributes changed by mappers and their AnalysisAdapter properties
+__ANALYSIS_PROPERTIES = {
+    "analysis_state": "state",
+    "analysis_justification": "justification",
+    "analysis_response": "response",
+    "analysis_details": "details",
+    "is_suppressed": "suppressed",
+}
+
+
+# Picklable state of a WorkItemAdapter
+@dataclass
+class WorkItemSnapshot:
+    id: int | None
+    url: str | None
+    fields: dict[str, any]
+    loaded_fields: list[str] | None
+    work_item_type: str
+    findings: list[dict]
+
+    @classmethod
+    def from_adapter(cls, work_item_adapter: models.WorkItemAdapter):
+        work_item = work_item_adapter.work_item
+        return cls(
+            id=work_item.id,
+            url=work_item.url,
+            fields=dict(work_item.fields or {}),
+            loaded_fields=work_item_adapter.loaded_fields,
+            work_item_type=work_item_adapter.work_item_type,
+            findings=[finding.to_dict() for finding in work_item_adapter.findings],
+        )
+
+    def to_adapter(self) -> models.WorkItemAdapter:
+        work_item_adapter = models.WorkItemAdapter(WorkItem(), findings=[Finding.from_dict(finding) for finding in self.findings])
+        work_item_adapter.set_work_item(WorkItem(id=self.id, url=self.url, fields=self.fields), loaded_fields=self.loaded_fields, field_loader=self.__fail_field_loader)
+        work_item_adapter.work_item_type = self.work_item_type
+        return work_item_adapter
+
+    def __fail_field_loader(self, field_names: list[str]):
+        # Workers have no client, a missing field would silently read as empty
+        raise ValueError(f"Fields {field_names} of WorkItem {self.id} are not loaded in the mapper process (declare them in 'work_item_fields' of your mapper)")
+
+
+# Picklable state of an AnalysisAdapter
+@dataclass
+class AnalysisSnapshot:
+    analysis: dict
+    finding: dict
+
+    @classmethod
+    def from_adapter(cls, analysis_adapter: models.AnalysisAdapter):
+        return cls(analysis=analysis_adapter.analysis.to_dict(), finding=analysis_adapter.finding.to_dict())
+
+    def to_adapter(self) -> models.AnalysisAdapter:
+        return models.AnalysisAdapter(Analysis.from_dict(self.analysis), Finding.from_dict(self.finding))
+
+
+@dataclass
+class MapperResult:
+    work_item_changes: dict[str, any]
+    work_item_type: str
+    analysis_changes: dict[str, any]
+
+
+def get_analysis_changes(analysis_adapter: models.AnalysisAdapter) -> dict[str, any]:
+    analysis_changes = {}
+    analysis_request = analysis_adapter.get_request()
+    for attribute, property_name in __ANALYSIS_PROPERTIES.items():
+        value = getattr(analysis_request, attribute)
+        if not isinstance(value, Unset):
+            analysis_changes[property_name] = getattr(value, "value", value)
+    return analysis_changes
+
+
+def merge_result(result: MapperResult, work_item_adapter: models.WorkItemAdapter, analysis_adapter: models.AnalysisAdapter = None):
+    if not work_item_adapter.work_item.fields:
+        work_item_adapter.work_item.fields = {}
+    for field_name, value in result.work_item_changes.items():
+        work_item_adapter.set_field(field_name, value)
+    work_item_adapter.work_item_type = result.work_item_type
+
+    if analysis_adapter is not None:
+        for property_name, value in result.analysis_changes.items():
+            setattr(analysis_adapter, property_name, value)
+
+
+def _init_worker(mapper_path: Path | None, template_path: Path):
+    from owasp_dt_sync import globals
+
+    globals.template_path = template_path
+    if mapper_path:
+        mappers.load_custom_mapper_module(mapper_path)
+
+
+def _process_finding(finding: dict) -> bool:
+    from owasp_dt_sync import globals
+
+    return bool(globals.mapper.process_finding(Finding.from_dict(finding)))
+
+
+def _call_hook(hook_name: str, work_item_snapshot: WorkItemSnapshot, analysis_snapshot: AnalysisSnapshot | None) -> MapperResult:
+    from owasp_dt_sync import globals
+
+    work_item_adapter = work_item_snapshot.to_adapter()
+    hook = getattr(globals.mapper, hook_name)
+    if analysis_snapshot is None:
+        hook(work_item_adapter)
+        analysis_changes = {}
+    else:
+        analysis_adapter = analysis_snapshot.to_adapter()
+        if hook_name == "map_analysis_to_work_item":
+            hook(analysis_adapter, work_item_adapter)
+        else:
+            hook(work_item_adapter, analysis_adapter)
+        analysis_changes = get_analysis_changes(analysis_adapter)
+
+    work_item_changes = {change.path.removeprefix("/fields/"): change.value for change in work_item_adapter.get_changes()}
+    return MapperResult(work_item_changes, work_item_adapter.work_item_type, analysis_changes)
+
+
+# Runs the mapper hooks in worker processes, which load the mapper module once
+class MapperPool:
+    def __init__(self, mapper_path: Path | None, processes: int, template_path: Path):
+        assert processes > 0, "Mapper processes must be greater than zero"
+        self.__processes = processes
+        self.__work_item_fields: list[str] = []
+        self.__executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(mapper_path, template_path),
+        )
+
+    def filter_findings(self, findings: Iterable[Finding], chunk_size: int = 100) -> Iterator[Finding]:
+        # Batches bound the number of Findings in flight
+        for batch in itertools.batched(findings, chunk_size * self.__processes):
+            results = self.__executor.map(_process_finding, [finding.to_dict() for finding in batch], chunksize=chunk_size)
+            for finding, result in zip(batch, results):
+                if result:
+                    yield finding
+
+    def __call_hook(self, hook_name: str, work_item_adapter: models.WorkItemAdapter, analysis_adapter: models.AnalysisAdapter = None):
+        # Loads declared fields which are missing in the WorkItem before it gets snapshotted
+        for field_name in self.__work_item_fields:
+            work_item_adapter.get_field(field_name)
+        analysis_snapshot = AnalysisSnapshot.from_adapter(analysis_adapter) if analysis_adapter else None
+        result = self.__executor.submit(_call_hook, hook_name, WorkItemSnapshot.from_adapter(work_item_adapter), analysis_snapshot).result()
+        merge_result(result, work_item_adapter, analysis_adapter)
+
+    def create_mapper(self, mapper: models.MapperModule) -> models.MapperModule:
+        self.__work_item_fields = list(mapper.work_item_fields)
+        # Findings are filtered in bulk by filter_findings()
+        return dataclasses.replace(
+            mapper,
+            process_finding=lambda finding: True,
+            new_work_item=lambda work_item_adapter: self.__call_hook("new_work_item", work_item_adapter),
+            map_work_item_to_analysis=lambda work_item_adapter, analysis_adapter: self.__call_hook("map_work_item_to_analysis", work_item_adapter, analysis_adapter),
+            map_analysis_to_work_item=lambda analysis_adapter, work_item_adapter: self.__call_hook("map_analysis_to_work_item", work_item_adapter, analysis_adapter),
+        )
+
+    def shutdown(self):
+        self.__executor.shutdown(wait=True, cancel_futures=True)
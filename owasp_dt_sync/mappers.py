@@ -1,7 +1,9 @@
+import dataclasses
 import importlib.util
 from pathlib import Path
 
 from owasp_dt_sync import models, log
+from owasp_dt_sync.filters import FindingFilter
 
 
 def map_work_item_to_analysis(
@@ -41,8 +43,12 @@ def map_analysis_to_work_item(
 def new_work_item(work_item_adapter: models.WorkItemAdapter):
     work_item_adapter.render_description()
 
-def load_custom_mapper_module(mapper_path: Path|str):
-    from owasp_dt_sync import globals
+def load_custom_mapper_module(mapper_path: Path|str, mapper: models.MapperModule = None) -> models.MapperModule:
+    if mapper is None:
+        # The shared default mapper is not changed, the current settings use a copy of it
+        from owasp_dt_sync import globals
+        mapper = dataclasses.replace(default_mapper)
+        globals.mapper = mapper
 
     if isinstance(mapper_path, Path):
         mapper_path = str(mapper_path)
@@ -56,7 +62,21 @@ def load_custom_mapper_module(mapper_path: Path|str):
         if mapper_function:
             assert callable(mapper_function), f"Mapper function '{modul.__name__}:{function_name}' is not callable"
             log.logger.info(f"Connect custom mapper function: '{mapper_path}:{function_name}'")
-            globals.mapper.__setattr__(function_name, mapper_function)
+            mapper.__setattr__(function_name, mapper_function)
+
+    work_item_fields = getattr(modul, "work_item_fields", None)
+    if work_item_fields:
+        assert isinstance(work_item_fields, (list, tuple, set)), f"Mapper attribute '{modul.__name__}:work_item_fields' is not a list of field names"
+        log.logger.info(f"Read custom mapper WorkItem fields: {list(work_item_fields)}")
+        mapper.work_item_fields = [*mapper.work_item_fields, *work_item_fields]
+
+    finding_filter = getattr(modul, "finding_filter", None)
+    if finding_filter:
+        assert isinstance(finding_filter, dict), f"Mapper attribute '{modul.__name__}:finding_filter' is not a dict of Finding filters"
+        log.logger.info(f"Read custom mapper Finding filter: {finding_filter}")
+        mapper.finding_filter = FindingFilter.from_dict(finding_filter).merge(mapper.finding_filter)
+
+    return mapper
 
 default_mapper = models.MapperModule(
     process_finding=lambda x: True,
@@ -1,5 +1,5 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import StrEnum
 from typing import Callable
@@ -9,7 +9,8 @@ from azure.devops.v7_1.work import WorkItem
 from owasp_dt.models import Finding, AnalysisRequest, AnalysisRequestAnalysisState, AnalysisRequestAnalysisJustification, AnalysisAnalysisResponse, AnalysisRequestAnalysisResponse, Analysis, AnalysisAnalysisState, AnalysisAnalysisJustification
 from tinystream import Opt
 
-from owasp_dt_sync import jinja, log
+from owasp_dt_sync import jinja, log, tracing
+from owasp_dt_sync.filters import FindingFilter
 
 
 class WorkItemField(StrEnum):
@@ -19,26 +20,101 @@ class WorkItemField(StrEnum):
     STATE = "System.State"
     CHANGED_DATE = "System.ChangedDate"
     REASON = "System.Reason"
+    TAGS = "System.Tags"
+    WORK_ITEM_TYPE = "System.WorkItemType"
 
     @property
     def field_path(self):
         return f"/fields/{self.value}"
 
+class Aggregation(StrEnum):
+    VULNERABILITY = "vulnerability"
+    PROJECT = "project"
+    PROJECT_VULNERABILITY = "project-vulnerability"
+
+    def create_reference_tag(self, finding: Finding):
+        return create_reference_tag(self.value, self.create_key(finding))
+
+    def create_key(self, finding: Finding):
+        if self == Aggregation.VULNERABILITY:
+            return finding.vulnerability.uuid
+        elif self == Aggregation.PROJECT:
+            return finding.component.project
+        else:
+            return f"{finding.component.project}/{finding.vulnerability.uuid}"
+
+# Tags linking WorkItems to their Findings (or aggregation keys), queryable by WIQL
+REFERENCE_TAG = "owasp-dt"
+
+def create_reference_tag(kind: str, key: str):
+    return f"{REFERENCE_TAG}:{kind}:{key}"
+
+def parse_reference_tag(tag: str) -> tuple[str, str] | None:
+    parts = tag.split(":", 2)
+    if len(parts) == 3 and parts[0] == REFERENCE_TAG:
+        return parts[1], parts[2]
+    else:
+        return None
+
+def format_project(finding: Finding):
+    return f"{finding.component.project_name}:{finding.component.project_version if isinstance(finding.component.project_version, str) else None}"
+
 def create_finding_logger(finding: Finding):
     return log.get_logger(
-        project=f"{finding.component.project_name}:{finding.component.project_version if isinstance(finding.component.project_version, str) else None}",
+        project=format_project(finding),
         component=f"{finding.component.name}:{finding.component.version}",
         vulnerability=finding.vulnerability.vuln_id,
     )
 
+def create_aggregation_logger(aggregation: Aggregation, findings: list[Finding]):
+    finding = findings[0]
+    if aggregation == Aggregation.VULNERABILITY:
+        return log.get_logger(vulnerability=finding.vulnerability.vuln_id, findings=len(findings))
+    elif aggregation == Aggregation.PROJECT:
+        return log.get_logger(project=format_project(finding), findings=len(findings))
+    else:
+        return log.get_logger(project=format_project(finding), vulnerability=finding.vulnerability.vuln_id, findings=len(findings))
+
+type FieldLoader = Callable[[list[str]], dict[str, any]]
+
 class WorkItemAdapter:
-    def __init__(self, work_item: WorkItem, finding: Finding = None):
+    # Fields read by the adapter properties, which are requested when loading WorkItems
+    read_fields = [
+        WorkItemField.TITLE,
+        WorkItemField.AREA,
+        WorkItemField.STATE,
+        WorkItemField.CHANGED_DATE,
+        WorkItemField.TAGS,
+        WorkItemField.WORK_ITEM_TYPE,
+    ]
+
+    def __init__(self, work_item: WorkItem, finding: Finding = None, findings: list[Finding] = None):
         self.__work_item = work_item
         self.__operations: dict[str, JsonPatchOperation] = {}
+        if findings is None:
+            findings = [finding] if finding is not None else []
+        elif finding is None and len(findings) > 0:
+            finding = findings[0]
         self.__finding = finding
+        self.__findings = findings
+        self.__loaded_fields: set[str] | None = None
+        self.__field_loader: FieldLoader | None = None
         self.work_item_type = ""
 
+    def __load_field(self, field_name: str):
+        if self.__loaded_fields is None or field_name in self.__loaded_fields or not self.__field_loader:
+            return
+
+        log.logger.warning(f"Lazy loading undeclared field '{field_name}' of WorkItem {self.__work_item.id} (declare it in 'work_item_fields' of your mapper)")
+        self.__loaded_fields.add(field_name)
+        loaded_fields = self.__field_loader([field_name])
+        if loaded_fields and field_name in loaded_fields:
+            if not self.__work_item.fields:
+                self.__work_item.fields = {}
+            self.__work_item.fields.setdefault(field_name, loaded_fields[field_name])
+
     def __opt_field_value(self, field: WorkItemField) -> Opt:
+        self.__load_field(field.value)
         return Opt(self.__work_item.fields).kmap(field.value)
 
     def __set_field_value(self, field: WorkItemField, value: any):
@@ -51,27 +127,43 @@ class WorkItemAdapter:
         return f"/fields/{field}"
 
     def set_field(self, field_name:str, value: any):
+        if self.__loaded_fields is not None:
+            self.__loaded_fields.add(field_name)
         self.__work_item.fields[field_name] = value
         self.__operations[field_name] = JsonPatchOperation(op="add", path=self.__get_field_path(field_name), value=value)
 
     def get_field(self, field_name: str) -> str|object:
+        self.__load_field(field_name)
         return Opt(self.__work_item.fields).kmap(field_name).get("")
 
     @property
     def finding(self):
         return self.__finding
 
+    @property
+    def findings(self) -> list[Finding]:
+        return self.__findings
+
     @property
     def owasp_dt_project_url(self):
-        return f"{os.getenv("OWASP_DTRACK_URL")}/projects/{self.finding.component.project}"
+        return self.get_owasp_dt_project_url(self.finding)
+
+    def get_owasp_dt_project_url(self, finding: Finding):
+        return f"{os.getenv("OWASP_DTRACK_URL")}/projects/{finding.component.project}"
 
     @property
     def work_item(self):
         return self.__work_item
 
-    def set_work_item(self, work_item: WorkItem):
+    @property
+    def loaded_fields(self) -> list[str] | None:
+        return sorted(self.__loaded_fields) if self.__loaded_fields is not None else None
+
+    def set_work_item(self, work_item: WorkItem, loaded_fields: list[str] = None, field_loader: FieldLoader = None):
         self.__work_item = work_item
         self.__operations.clear()
+        self.__loaded_fields = set(loaded_fields) if loaded_fields is not None else None
+        self.__field_loader = field_loader
 
     @property
     def title(self) -> str:
@@ -107,6 +199,16 @@ class WorkItemAdapter:
     def description(self, value: str):
         self.__set_field_value(WorkItemField.DESCRIPTION, value)
 
+    @property
+    def tags(self) -> list[str]:
+        tags = self.__opt_field_value(WorkItemField.TAGS).filter_type(str).get("")
+        return [tag.strip() for tag in tags.split(";") if len(tag.strip()) > 0]
+
+    def add_tag(self, tag: str):
+        tags = self.tags
+        if tag not in tags:
+            self.__set_field_value(WorkItemField.TAGS, "; ".join([*tags, tag]))
+
     @property
     def changed_date(self) -> datetime:
         field_value = self.__opt_field_value(WorkItemField.CHANGED_DATE)
@@ -118,15 +220,25 @@ class WorkItemAdapter:
     def get_changes(self):
         return list(self.__operations.values())
 
+    @tracing.traced("render_template")
     def render_description(self):
-        self.description = jinja.get_template().render(work_item_adapter=self)
+        self.description = jinja.get_template(aggregated=len(self.findings) > 1).render(work_item_adapter=self)
 
 
 class AnalysisAdapter:
     def __init__(self, analysis: Analysis, finding: Finding):
         self.__analysis = analysis
+        self.__finding = finding
         self.__analysis_request = AnalysisRequest(project=finding.component.project, component=finding.component.uuid, vulnerability=finding.vulnerability.uuid)
 
+    @property
+    def analysis(self):
+        return self.__analysis
+
+    @property
+    def finding(self) -> Finding:
+        return self.__finding
+
     @property
     def state(self) -> str:
         return Opt(self.__analysis).map_keys("analysis_state", "value").get("")
@@ -186,4 +298,7 @@ class MapperModule:
     new_work_item: Callable[[WorkItemAdapter], None]
     map_work_item_to_analysis: Callable[[WorkItemAdapter, AnalysisAdapter], None]
     map_analysis_to_work_item: Callable[[AnalysisAdapter, WorkItemAdapter], None]
-    function_names = ["process_finding", "new_work_item", "map_work_item_to_analysis", "map_analysis_to_work_item"]
+    route_finding: Callable[[Finding], str | None] = lambda finding: None
+    work_item_fields: list[str] = field(default_factory=list)
+    finding_filter: FindingFilter | None = None
+    function_names = ["process_finding", "new_work_item", "map_work_item_to_analysis", "map_analysis_to_work_item", "route_finding"]
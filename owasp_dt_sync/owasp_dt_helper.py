@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
 from typing import Iterable, Iterator
 
+import httpx
 from is_empty import not_empty
 from owasp_dt import Client, AuthenticatedClient
 from owasp_dt.api.analysis import update_analysis, retrieve_analysis
@@ -8,23 +9,38 @@ from owasp_dt.api.finding import get_all_findings_1
 from owasp_dt.models import Finding, AnalysisRequest, Analysis, AnalysisComment
 from tinystream import Stream, Opt
 
-from owasp_dt_sync import config, globals
+from owasp_dt_sync import config, globals, http_cache, deadlines, tracing
+from owasp_dt_sync.filters import FindingFilter
 
 __AZURE_DEVOPS_WORK_ITEM_PREFIX="Azure DevOps work item: "
 
-def create_client_from_env() -> AuthenticatedClient:
+def create_client_from_env(
+    response_store: http_cache.ResponseStore = None,
+    request_policy: deadlines.RequestPolicy = None,
+) -> AuthenticatedClient:
     base_url = config.reqenv("OWASP_DTRACK_URL")
+    verify_ssl = config.getenv("OWASP_DTRACK_VERIFY_SSL", "1", config.parse_true)
+    httpx_args = {
+        "proxy": config.getenv("HTTPS_PROXY", lambda: config.getenv("HTTP_PROXY", None)),
+        #"no_proxy": getenv("NO_PROXY", "")
+    }
+    if response_store or request_policy:
+        # A custom transport has to handle the proxy itself
+        transport = httpx.HTTPTransport(verify=verify_ssl, proxy=httpx_args.pop("proxy"))
+        if request_policy:
+            transport = deadlines.PolicyTransport(transport, request_policy)
+        if response_store:
+            transport = http_cache.CachingTransport(transport, response_store)
+        httpx_args["transport"] = transport
+
     client = Client(
         base_url=f"{base_url}/api",
         headers={
             "X-Api-Key": config.reqenv("OWASP_DTRACK_API_KEY")
         },
-        verify_ssl=config.getenv("OWASP_DTRACK_VERIFY_SSL", "1", config.parse_true),
+        verify_ssl=verify_ssl,
         raise_on_unexpected_status=False,
-        httpx_args={
-            "proxy": config.getenv("HTTPS_PROXY", lambda: config.getenv("HTTP_PROXY", None)),
-            #"no_proxy": getenv("NO_PROXY", "")
-        }
+        httpx_args=httpx_args,
     )
     return client
 
@@ -37,25 +53,37 @@ def pretty_analysis_request(analysis_request: AnalysisRequest):
 
 def load_and_filter_findings(
     client: AuthenticatedClient,
-    cvss2_min_score: float = 0,
-    cvss3_min_score: float = 0,
+    cvss2_min_score: float = None,
+    cvss3_min_score: float = None,
     load_suppressed: bool = False,
     load_inactive: bool = False,
+    finding_filter: FindingFilter = None,
 ) -> Iterator[Finding]:
+    params = finding_filter.get_query_params() if finding_filter else {}
+    if cvss2_min_score:
+        params["cvssv_2_from"] = str(cvss2_min_score)
+    if cvss3_min_score:
+        params["cvssv_3_from"] = str(cvss3_min_score)
+
     resp = get_all_findings_1.sync_detailed(
         client=client,
         show_inactive=load_inactive,
         show_suppressed=load_suppressed,
-        cvssv_2_from=cvss2_min_score if cvss2_min_score > 0 else None,
-        cvssv_3_from=cvss3_min_score if cvss3_min_score > 0 else None,
+        **params,
     )
     assert resp.status_code == 200
     findings = resp.parsed
+    if finding_filter:
+        # Older servers ignore unknown parameters and EPSS scores are not filtered by the server
+        findings = filter(finding_filter.matches, findings)
     return filter(globals.mapper.process_finding, findings)
 
 def finding_is_latest(finding: Finding):
     return finding.component.additional_properties["projectVersion"] == finding.component.additional_properties["latestVersion"]
 
+def create_finding_key(finding: Finding):
+    return f"{finding.component.project}/{finding.component.uuid}/{finding.vulnerability.uuid}"
+
 def create_analysis(finding: Finding):
     return AnalysisRequest(
         project=finding.component.project,
@@ -97,6 +125,7 @@ def read_comments_desc(analysis: Analysis) -> Stream[AnalysisComment]:
         .sort(_sort_oldest_first)
     )
 
+@tracing.traced()
 def get_analysis(client: AuthenticatedClient, finding: Finding) -> Analysis:
     resp = retrieve_analysis.sync_detailed(client=client, project=finding.component.project, component=finding.component.uuid, vulnerability=finding.vulnerability.uuid)
     if resp.status_code == 404:
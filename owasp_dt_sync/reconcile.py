@@ -0,0 +1,176 @@
+import hashlib
+import heapq
+import tempfile
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from azure.devops.exceptions import AzureDevOpsServiceError
+from azure.devops.released.work_item_tracking import WorkItemTrackingClient, WorkItem
+
+from owasp_dt_sync import azure_helper, models, log, globals, deadlines, stats, validation
+
+STALE_TAG = "owasp-dt-stale"
+ACTIONS = ["report", "tag", "close"]
+# Closed states of the default process templates, completed or removed states of the loaded types are closed too
+CLOSED_STATES = ["Closed", "Removed", "Done"]
+
+
+def hash_key(key: str) -> int:
+    # 64 bit digests, a collision keeps a stale WorkItem open
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def read_run(path: Path, chunk_size: int = 65536) -> Iterator[int]:
+    with open(path, "rb") as file:
+        while True:
+            chunk = array("Q")
+            try:
+                chunk.fromfile(file, chunk_size)
+            except EOFError:
+                # The last chunk is read partially
+                pass
+            yield from chunk
+            if len(chunk) < chunk_size:
+                return
+
+
+# Set of hashed keys, which spills sorted runs to disk when it exceeds the given number of keys in memory
+class KeySet:
+    def __init__(self, max_memory_keys: int = 1_000_000, spill_dir: Path = None):
+        assert max_memory_keys > 0, "Maximum number of keys in memory must be greater than zero"
+        self.__max_memory_keys = max_memory_keys
+        self.__spill_dir = spill_dir
+        self.__temp_dir: tempfile.TemporaryDirectory | None = None
+        self.__keys: set[int] = set()
+        self.__runs: list[Path] = []
+
+    @property
+    def spilled_runs(self) -> int:
+        return len(self.__runs)
+
+    def add(self, key: str):
+        self.__keys.add(hash_key(key))
+        if len(self.__keys) >= self.__max_memory_keys:
+            self.__spill()
+
+    def __spill(self):
+        if self.__temp_dir is None:
+            self.__temp_dir = tempfile.TemporaryDirectory(prefix="owasp-dt-keys-", dir=self.__spill_dir)
+        path = Path(self.__temp_dir.name) / f"run-{len(self.__runs)}.bin"
+        with open(path, "wb") as file:
+            array("Q", sorted(self.__keys)).tofile(file)
+        self.__runs.append(path)
+        self.__keys.clear()
+
+    def iter_sorted(self) -> Iterator[int]:
+        return heapq.merge(*(read_run(path) for path in self.__runs), sorted(self.__keys))
+
+    def find_missing[T](self, items: Iterable[tuple[int, T]]) -> Iterator[T]:
+        # Merges the sorted keys with the sorted items, so that every key is read once
+        keys = self.iter_sorted()
+        key = next(keys, None)
+        for item_key, item in sorted(items, key=lambda item: item[0]):
+            while key is not None and key < item_key:
+                key = next(keys, None)
+            if key != item_key:
+                yield item
+
+    def close(self):
+        self.__keys.clear()
+        self.__runs.clear()
+        if self.__temp_dir:
+            self.__temp_dir.cleanup()
+            self.__temp_dir = None
+
+
+def create_seen_key(target_name: str, reference_tag: str) -> str:
+    # WorkItems of a target are stale when their Findings are routed to other targets
+    return f"{target_name}:{reference_tag}"
+
+
+def find_stale_work_item_ids(
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    seen_keys: KeySet,
+    target_name: str,
+    kind: str,
+) -> list[int]:
+    # Only the key hashes of linked WorkItems are kept
+    linked_keys: list[tuple[int, int]] = []
+    work_item_ids = azure_helper.find_work_item_ids_by_tag(work_item_tracking_client, azure_project, models.REFERENCE_TAG)
+    for work_item in azure_helper.get_work_items(work_item_tracking_client, azure_project, work_item_ids, fields=[str(models.WorkItemField.TAGS)]):
+        for tag in models.WorkItemAdapter(work_item).tags:
+            reference = models.parse_reference_tag(tag)
+            if reference and reference[0] == kind:
+                linked_keys.append((hash_key(create_seen_key(target_name, tag)), work_item.id))
+
+    return sorted(set(seen_keys.find_missing(linked_keys)))
+
+
+def mark_stale_work_items(
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    work_item_ids: list[int],
+    action: str,
+    stale_state: str = "Closed",
+    validator: validation.WorkItemValidator = None,
+):
+    fields = [str(field) for field in models.WorkItemAdapter.read_fields]
+
+    def _mark(work_item: WorkItem):
+        logger = log.get_logger(work_item=work_item.id)
+        work_item_adapter = models.WorkItemAdapter(work_item)
+        work_item_type = work_item_adapter.get_field(models.WorkItemField.WORK_ITEM_TYPE)
+        # Closed WorkItems are never changed, their Findings may just be suppressed or inactive
+        rules = validator.get_rules(work_item_type) if validator and work_item_type else None
+        closed_states = set(CLOSED_STATES) | (rules.closed_states if rules else set())
+        if work_item_adapter.state == stale_state or work_item_adapter.state in closed_states:
+            return
+        if STALE_TAG in work_item_adapter.tags and action == "tag":
+            return
+
+        work_item_adapter.add_tag(STALE_TAG)
+        if action == "close":
+            work_item_adapter.state = stale_state
+        changes = work_item_adapter.get_changes()
+        if validator:
+            changes = validator.validate(logger, work_item.id, work_item_type, work_item.fields.get(models.WorkItemField.STATE), changes)
+        if len(changes) == 0:
+            return
+
+        stats.increment(f"stale_work_items.{action}")
+        if globals.apply_changes:
+            try:
+                work_item_tracking_client.update_work_item(id=work_item.id, document=changes, project=azure_project)
+                logger.info(f"Marked stale WorkItem: {azure_helper.pretty_changes(changes)}")
+            except AzureDevOpsServiceError as e:
+                logger.error(e)
+        else:
+            logger.info(f"Would mark stale WorkItem: {azure_helper.pretty_changes(changes)}")
+
+    work_items = azure_helper.get_work_items(work_item_tracking_client, azure_project, work_item_ids, fields=fields)
+    with ThreadPoolExecutor(max_workers=globals.workers) as executor:
+        for _ in executor.map(deadlines.bind_context(_mark), work_items):
+            pass
+
+
+def reconcile_stale_work_items(
+    logger: log.Logger,
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    seen_keys: KeySet,
+    target_name: str,
+    kind: str,
+    action: str,
+    stale_state: str = "Closed",
+    validator: validation.WorkItemValidator = None,
+):
+    stale_ids = find_stale_work_item_ids(work_item_tracking_client, azure_project, seen_keys, target_name, kind)
+    if len(stale_ids) == 0:
+        return
+
+    logger.warning(f"{len(stale_ids)} WorkItems reference Findings that disappeared: {stale_ids[:100]}")
+    if action != "report":
+        mark_stale_work_items(work_item_tracking_client, azure_project, stale_ids, action, stale_state, validator)
@@ -0,0 +1,58 @@
+from azure.devops.released.work_item_tracking import WorkItemTrackingClient, WorkItem
+
+from owasp_dt_sync import azure_helper, models, log, cache
+
+
+# Index of all tagged WorkItems by their reference tags, loaded with one paged WIQL query
+class ReferenceIndex:
+    def __init__(self):
+        self.__work_items: dict[str, WorkItem] = {}
+        self.__seen_tags: set[str] = set()
+
+    def add(self, tag: str, work_item: WorkItem):
+        self.__work_items.setdefault(tag, work_item)
+
+    def find(self, tag: str) -> WorkItem | None:
+        self.mark_seen(tag)
+        return self.__work_items.get(tag)
+
+    def mark_seen(self, tag: str):
+        self.__seen_tags.add(tag)
+
+    def __len__(self):
+        return len(self.__work_items)
+
+    def get_orphans(self, kind: str) -> dict[str, WorkItem]:
+        return {
+            tag: work_item
+            for tag, work_item in self.__work_items.items()
+            if tag not in self.__seen_tags and models.parse_reference_tag(tag)[0] == kind
+        }
+
+
+def load_reference_index(
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    fields: list[str],
+    work_item_cache: cache.WorkItemCache = None,
+) -> ReferenceIndex:
+    reference_index = ReferenceIndex()
+    work_item_ids = azure_helper.find_work_item_ids_by_tag(work_item_tracking_client, azure_project, models.REFERENCE_TAG)
+    for work_item in azure_helper.get_work_items(work_item_tracking_client, azure_project, work_item_ids, fields=fields):
+        if work_item_cache:
+            work_item_cache.put(work_item, loaded_fields=fields)
+
+        work_item_adapter = models.WorkItemAdapter(work_item)
+        for tag in work_item_adapter.tags:
+            if models.parse_reference_tag(tag):
+                reference_index.add(tag, work_item)
+
+    log.logger.info(f"Loaded reference index of {len(work_item_ids)} WorkItems")
+    return reference_index
+
+
+def report_orphans(reference_index: ReferenceIndex, kind: str):
+    orphans = reference_index.get_orphans(kind)
+    if len(orphans) > 0:
+        orphan_ids = sorted({work_item.id for work_item in orphans.values()})
+        log.logger.warning(f"{len(orphan_ids)} WorkItems reference Findings that have not been loaded: {orphan_ids}")
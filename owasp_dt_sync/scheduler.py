@@ -0,0 +1,78 @@
+import itertools
+import time
+from typing import Iterable, Iterator
+
+from owasp_dt.models import Finding, Analysis
+
+type FindingGroup = list[tuple[Finding, Analysis | None]]
+
+SEVERITIES = ["CRITICAL", "HIGH", "MEDIUM", "LOW", "INFO", "UNASSIGNED"]
+
+
+def get_severity_rank(finding: Finding) -> int:
+    severity = str(finding.vulnerability.severity).upper()
+    if severity in SEVERITIES:
+        return SEVERITIES.index(severity)
+    else:
+        return len(SEVERITIES)
+
+
+def get_severity(finding: Finding) -> str:
+    rank = get_severity_rank(finding)
+    return SEVERITIES[rank] if rank < len(SEVERITIES) else "UNASSIGNED"
+
+
+def get_cvss(finding: Finding) -> float:
+    vulnerability = finding.vulnerability
+    cvss = vulnerability.cvss_v3_base_score
+    if not isinstance(cvss, (int, float)):
+        cvss = vulnerability.cvss_v2_base_score
+    return cvss if isinstance(cvss, (int, float)) else 0
+
+
+def get_group_severity_rank(finding_group: FindingGroup) -> int:
+    return min(get_severity_rank(finding) for finding, _ in finding_group)
+
+
+def get_group_cvss(finding_group: FindingGroup) -> float:
+    return max(get_cvss(finding) for finding, _ in finding_group)
+
+
+def prioritize(finding_groups: Iterable[FindingGroup]) -> Iterator[FindingGroup]:
+    # Severity tiers first, within a tier round-robin across projects ordered by CVSS
+    # The Findings are not ordered by severity, so all groups are buffered before the first gets dispatched
+    tiers: dict[int, dict[str, list[FindingGroup]]] = {}
+    for finding_group in finding_groups:
+        project = finding_group[0][0].component.project
+        tiers.setdefault(get_group_severity_rank(finding_group), {}).setdefault(project, []).append(finding_group)
+
+    for rank in sorted(tiers):
+        queues = [sorted(queue, key=get_group_cvss, reverse=True) for queue in tiers[rank].values()]
+        queues.sort(key=lambda queue: get_group_cvss(queue[0]), reverse=True)
+        for finding_groups_round in itertools.zip_longest(*queues):
+            for finding_group in finding_groups_round:
+                if finding_group is not None:
+                    yield finding_group
+
+
+class TimeBudget:
+    def __init__(self, max_duration: float = None):
+        self.__max_duration = max_duration
+        self.__start = time.monotonic()
+
+    @property
+    def max_duration(self):
+        return self.__max_duration
+
+    @property
+    def exhausted(self) -> bool:
+        return self.__max_duration is not None and time.monotonic() - self.__start >= self.__max_duration
+
+
+def count_severities(finding_groups: Iterable[FindingGroup]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for finding_group in finding_groups:
+        for finding, _ in finding_group:
+            severity = get_severity(finding)
+            counts[severity] = counts.get(severity, 0) + 1
+    return counts
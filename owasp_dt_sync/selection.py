@@ -0,0 +1,236 @@
+import uuid
+from typing import Callable, Iterable, Iterator
+
+from azure.devops.released.work_item_tracking import WorkItemTrackingClient
+from owasp_dt import AuthenticatedClient
+from owasp_dt.api.finding import get_findings_by_project
+from owasp_dt.api.project import get_project, get_project_by_name_and_version, get_projects, get_projects_by_tag, get_projects_by_classifier
+from owasp_dt.api.vulnerability import get_affected_project, get_vulnerability_by_uuid
+from owasp_dt.models import Finding, Project, Vulnerability
+from owasp_dt.types import Unset
+
+from owasp_dt_sync import azure_helper, models, log, findings_file, globals
+from owasp_dt_sync.filters import FindingFilter
+
+type FindingPredicate = Callable[[Finding], bool]
+
+# Vulnerability sources by the prefix of their ids
+__VULNERABILITY_SOURCES = {
+    "CVE-": "NVD",
+    "GHSA-": "GITHUB",
+    "SNYK-": "SNYK",
+    "INT-": "INTERNAL",
+}
+
+
+def is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def parse_project_selector(selector: str) -> tuple[str, str | None]:
+    name, _, version = selector.partition(":")
+    return name, version if len(version) > 0 else None
+
+
+def parse_vulnerability_selector(selector: str) -> tuple[str, str]:
+    # Vulnerabilities are identified by their source, which is derived from the id if not given
+    source, _, vuln_id = selector.rpartition(":")
+    if len(source) == 0:
+        source = next((source for prefix, source in __VULNERABILITY_SOURCES.items() if vuln_id.upper().startswith(prefix)), "OSV")
+    return source.upper(), vuln_id
+
+
+def find_project_uuids(client: AuthenticatedClient, selector: str, load_inactive: bool = False) -> list[str]:
+    if is_uuid(selector):
+        return [selector]
+
+    name, version = parse_project_selector(selector)
+    if version is not None:
+        resp = get_project_by_name_and_version.sync_detailed(client=client, name=name, version=version)
+        if resp.status_code == 404:
+            return []
+        assert resp.status_code == 200
+        projects: list[Project] = [resp.parsed]
+    else:
+        projects = []
+        page_number = 1
+        while True:
+            resp = get_projects.sync_detailed(client=client, name=name, exclude_inactive=not load_inactive, page_number=str(page_number), page_size="100")
+            assert resp.status_code == 200
+            projects.extend(resp.parsed)
+            if len(resp.parsed) < 100:
+                break
+            page_number += 1
+
+    return [str(project.uuid) for project in projects if project.name == name]
+
+
+def find_affected_project_uuids(client: AuthenticatedClient, source: str, vuln_id: str, load_inactive: bool = False) -> list[str]:
+    resp = get_affected_project.sync_detailed(source=source, vuln=vuln_id, client=client, exclude_inactive=not load_inactive)
+    if resp.status_code == 404:
+        return []
+    assert resp.status_code == 200
+    return [str(project.uuid) for project in resp.parsed]
+
+
+def find_tagged_project_uuids(client: AuthenticatedClient, finding_filter: FindingFilter, load_inactive: bool = False) -> set[str]:
+    # Projects having any of the tags and any of the classifiers
+    def _load_project_uuids(api, value: str) -> set[str]:
+        project_uuids = set()
+        page_number = 1
+        while True:
+            resp = api.sync_detailed(value, client=client, exclude_inactive=not load_inactive, page_number=str(page_number), page_size="100")
+            assert resp.status_code == 200
+            project_uuids.update(str(project.uuid) for project in resp.parsed)
+            if len(resp.parsed) < 100:
+                return project_uuids
+            page_number += 1
+
+    project_uuid_sets = []
+    if finding_filter.project_tags:
+        project_uuid_sets.append(set().union(*(_load_project_uuids(get_projects_by_tag, tag) for tag in finding_filter.project_tags)))
+    if finding_filter.project_classifiers:
+        project_uuid_sets.append(set().union(*(_load_project_uuids(get_projects_by_classifier, classifier) for classifier in finding_filter.project_classifiers)))
+    return set.intersection(*project_uuid_sets)
+
+
+def get_vulnerability(client: AuthenticatedClient, vulnerability_uuid: str) -> Vulnerability | None:
+    resp = get_vulnerability_by_uuid.sync_detailed(uuid=uuid.UUID(vulnerability_uuid), client=client)
+    if resp.status_code == 404:
+        return None
+    assert resp.status_code == 200
+    return resp.parsed
+
+
+def load_project(client: AuthenticatedClient, project_uuid: str) -> Project | None:
+    resp = get_project.sync_detailed(uuid=uuid.UUID(project_uuid), client=client)
+    if resp.status_code == 404:
+        return None
+    assert resp.status_code == 200
+    return resp.parsed
+
+
+def complete_project_finding(finding: Finding, project: Project) -> Finding:
+    # Findings of a project don't contain the project details
+    component = finding.component
+    if isinstance(component.project, Unset):
+        component.project = str(project.uuid)
+    if isinstance(component.project_name, Unset):
+        component.project_name = project.name
+    if isinstance(component.project_version, Unset):
+        component.project_version = project.version
+    return finding
+
+
+def load_project_findings(client: AuthenticatedClient, project_uuid: str, load_suppressed: bool = False) -> list[Finding]:
+    resp = get_findings_by_project.sync_detailed(uuid=uuid.UUID(project_uuid), client=client, suppressed=load_suppressed)
+    assert resp.status_code == 200
+    findings: list[Finding] = resp.parsed
+    if len(findings) > 0:
+        project = load_project(client, project_uuid)
+        if project is not None:
+            for finding in findings:
+                complete_project_finding(finding, project)
+    return findings
+
+
+def read_work_item_reference_tags(
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    work_item_ids: Iterable[int],
+) -> dict[int, list[tuple[str, str]]]:
+    reference_tags: dict[int, list[tuple[str, str]]] = {}
+    for work_item in azure_helper.get_work_items(work_item_tracking_client, azure_project, work_item_ids, fields=[str(models.WorkItemField.TAGS)]):
+        work_item_adapter = models.WorkItemAdapter(work_item)
+        reference_tags[work_item.id] = [reference for reference in map(models.parse_reference_tag, work_item_adapter.tags) if reference is not None]
+    return reference_tags
+
+
+# Collects the Findings to load by project, so that every project is only loaded once
+class Selection:
+    def __init__(self, owasp_dt_client: AuthenticatedClient, load_inactive: bool = False):
+        self.__client = owasp_dt_client
+        self.__load_inactive = load_inactive
+        self.__predicates: dict[str, list[FindingPredicate] | None] = {}
+
+    @property
+    def project_uuids(self) -> list[str]:
+        return list(self.__predicates.keys())
+
+    def restrict(self, project_uuids: set[str]):
+        for project_uuid in self.project_uuids:
+            if project_uuid not in project_uuids:
+                del self.__predicates[project_uuid]
+
+    def add(self, project_uuid: str, predicate: FindingPredicate = None):
+        if predicate is None:
+            self.__predicates[project_uuid] = None
+        elif self.__predicates.get(project_uuid, []) is not None:
+            self.__predicates.setdefault(project_uuid, []).append(predicate)
+
+    def find_projects(self, selector: str) -> list[str]:
+        project_uuids = find_project_uuids(self.__client, selector, self.__load_inactive)
+        if len(project_uuids) == 0:
+            log.logger.warning(f"Project '{selector}' not found")
+        return project_uuids
+
+    def add_project(self, selector: str):
+        for project_uuid in self.find_projects(selector):
+            self.add(project_uuid)
+
+    def add_vulnerability(self, selector: str):
+        source, vuln_id = parse_vulnerability_selector(selector)
+        project_uuids = find_affected_project_uuids(self.__client, source, vuln_id, self.__load_inactive)
+        if len(project_uuids) == 0:
+            log.logger.warning(f"No projects affected by vulnerability '{source}:{vuln_id}'")
+        for project_uuid in project_uuids:
+            self.add(project_uuid, lambda finding: finding.vulnerability.source == source and finding.vulnerability.vuln_id == vuln_id)
+
+    def add_reference(self, kind: str, key: str):
+        if kind == "finding":
+            project_uuid, component_uuid, vulnerability_uuid = key.split("/")
+            self.add(project_uuid, lambda finding: finding.component.uuid == component_uuid and finding.vulnerability.uuid == vulnerability_uuid)
+        elif kind == models.Aggregation.PROJECT:
+            self.add(key)
+        elif kind == models.Aggregation.PROJECT_VULNERABILITY:
+            project_uuid, vulnerability_uuid = key.split("/")
+            self.add(project_uuid, lambda finding: finding.vulnerability.uuid == vulnerability_uuid)
+        elif kind == models.Aggregation.VULNERABILITY:
+            vulnerability = get_vulnerability(self.__client, key)
+            if vulnerability is not None:
+                for project_uuid in find_affected_project_uuids(self.__client, vulnerability.source, vulnerability.vuln_id, self.__load_inactive):
+                    self.add(project_uuid, lambda finding: finding.vulnerability.uuid == key)
+        else:
+            log.logger.warning(f"Unknown reference tag kind '{kind}'")
+
+    def add_work_items(
+        self,
+        work_item_tracking_client: WorkItemTrackingClient,
+        azure_project: str,
+        work_item_ids: list[int],
+    ) -> set[int]:
+        reference_tags = read_work_item_reference_tags(work_item_tracking_client, azure_project, work_item_ids)
+        for work_item_id, references in reference_tags.items():
+            if len(references) == 0:
+                log.get_logger(work_item=work_item_id).warning("WorkItem has no reference tags (only WorkItems created by the sync are tagged)")
+            for kind, key in references:
+                self.add_reference(kind, key)
+        return set(reference_tags.keys())
+
+    def load_findings(self, load_suppressed: bool = False, cvss_min_score: float = None, finding_filter: FindingFilter = None) -> Iterator[Finding]:
+        for project_uuid, predicates in self.__predicates.items():
+            for finding in load_project_findings(self.__client, project_uuid, load_suppressed):
+                if predicates is not None and not any(predicate(finding) for predicate in predicates):
+                    continue
+                if not load_suppressed and findings_file.finding_is_suppressed(finding):
+                    continue
+                if cvss_min_score and not findings_file.finding_matches_cvss_min_score(finding, cvss_min_score):
+                    continue
+                if finding_filter and not finding_filter.matches(finding):
+                    continue
+                if globals.mapper.process_finding(finding):
+                    yield finding
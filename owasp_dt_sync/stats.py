@@ -0,0 +1,59 @@
+import contextvars
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from owasp_dt_sync import log
+
+
+# Counters of a run, reported in the run summary
+class Stats:
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__counters: Counter = Counter()
+
+    def increment(self, name: str, amount: int = 1):
+        with self.__lock:
+            self.__counters[name] += amount
+
+    def get(self, name: str) -> int:
+        with self.__lock:
+            return self.__counters[name]
+
+    def reset(self):
+        with self.__lock:
+            self.__counters.clear()
+
+    def summary(self) -> dict[str, int]:
+        with self.__lock:
+            return dict(sorted(self.__counters.items()))
+
+
+__default_stats = Stats()
+__stats: contextvars.ContextVar[Stats] = contextvars.ContextVar("stats")
+
+def get_stats() -> Stats:
+    return __stats.get(__default_stats)
+
+@contextmanager
+def use_stats(stats: Stats):
+    token = __stats.set(stats)
+    try:
+        yield stats
+    finally:
+        __stats.reset(token)
+
+def increment(name: str, amount: int = 1):
+    get_stats().increment(name, amount)
+
+def get(name: str) -> int:
+    return get_stats().get(name)
+
+def reset():
+    get_stats().reset()
+
+def summary() -> dict[str, int]:
+    return get_stats().summary()
+
+def log_summary(logger: log.Logger = log.logger):
+    logger.info(f"Run summary: {summary()}")
@@ -1,62 +1,123 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from typing import Iterable, Iterator
 
-import dotenv
 from azure.devops.exceptions import AzureDevOpsServiceError
-from azure.devops.released.work_item_tracking import WorkItemTrackingClient, WorkItem
+from azure.devops.released.work_item_tracking import WorkItemTrackingClient, WorkItem, JsonPatchOperation
 from is_empty import empty
 from owasp_dt import AuthenticatedClient
 from owasp_dt.api.analysis import update_analysis
 from owasp_dt.models import Finding, Analysis
-from tinystream import Stream
+from tinystream import Stream, Opt
 
-from owasp_dt_sync import owasp_dt_helper, azure_helper, models, config, log, globals, mappers
+from owasp_dt_sync import owasp_dt_helper, azure_helper, models, config, log, globals, cache, reference_index, targets, deadlines, tracing
+from owasp_dt_sync.reference_index import ReferenceIndex
 
+def sync_target_finding_group(
+    logger: log.Logger,
+    owasp_dt_client: AuthenticatedClient,
+    context: targets.TargetContext,
+    finding_group: list[tuple[Finding, Analysis | None]],
+    aggregation: models.Aggregation = None,
+):
+    # Every Finding (group) starts a new trace with the attributes of its logger
+    with tracing.span("sync_finding_group" if aggregation else "sync_finding", root=True, attributes=getattr(logger, "extra", None)):
+        if aggregation:
+            reference_tag = aggregation.create_reference_tag(finding_group[0][0])
+            with context.lock_group(reference_tag):
+                work_item_id = sync_finding_group(
+                    logger,
+                    owasp_dt_client,
+                    context.work_item_tracking_client,
+                    context.azure_project,
+                    finding_group,
+                    aggregation,
+                    work_item_cache=context.work_item_cache,
+                    reference_index=context.reference_index,
+                    area_path=context.target.area_path,
+                    work_item_id=context.group_work_item_ids.get(reference_tag),
+                )
+                if work_item_id:
+                    context.group_work_item_ids[reference_tag] = work_item_id
+        else:
+            finding, analysis = finding_group[0]
+            sync_finding(
+                logger,
+                owasp_dt_client,
+                context.work_item_tracking_client,
+                context.azure_project,
+                finding,
+                analysis=analysis,
+                work_item_cache=context.work_item_cache,
+                reference_index=context.reference_index,
+                area_path=context.target.area_path,
+            )
 
-def handle_sync(args):
-    globals.apply_changes = args.apply
-    globals.fix_references = args.fix_references
-
-    if not globals.apply_changes:
-        log.logger.info("Running in dry-run mode (add --apply parameter to perform changes)")
-
-    if args.template:
-        globals.template_path = args.template
+def verify_references(
+    owasp_dt_client: AuthenticatedClient,
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    findings: Iterable[Finding],
+    area_path: str = None,
+) -> list[tuple[Finding, Analysis | None]]:
+    findings = list(findings)
+    with ThreadPoolExecutor(max_workers=globals.workers) as executor:
+        analyses = list(executor.map(deadlines.bind_context(lambda finding: owasp_dt_helper.get_analysis(owasp_dt_client, finding)), findings))
 
-    if args.env:
-        assert dotenv.load_dotenv(args.env), f"Unable to load env file: '{args.env}'"
+    referencing_findings: dict[int, list[int]] = {}
+    for index, analysis in enumerate(analyses):
+        opt_url = owasp_dt_helper.read_azure_devops_work_item_url(analysis)
+        if opt_url.present:
+            work_item_id = azure_helper.read_work_item_id(opt_url.get())
+            referencing_findings.setdefault(work_item_id, []).append(index)
 
-    if args.mapper:
-        mappers.load_custom_mapper_module(args.mapper)
+    existing_ids = azure_helper.find_existing_work_item_ids(work_item_tracking_client, azure_project, referencing_findings.keys())
+    broken_indices = [index for work_item_id, indices in referencing_findings.items() if work_item_id not in existing_ids for index in indices]
+    log.logger.info(f"Verified {len(referencing_findings)} WorkItem references of {len(findings)} Findings: {len(broken_indices)} broken")
 
-    azure_project = config.reqenv("AZURE_PROJECT")
-    azure_connection = azure_helper.create_connection_from_env()
-    work_item_tracking_client = azure_connection.clients.get_work_item_tracking_client()
-    owasp_dt_client = owasp_dt_helper.create_client_from_env()
-    findings = owasp_dt_helper.load_and_filter_findings(
-        client=owasp_dt_client,
-        cvss2_min_score=args.cvss_min_score,
-        cvss3_min_score=args.cvss_min_score,
-        load_suppressed=args.load_suppressed,
-        load_inactive=args.load_inactive,
-    )
-    for finding in findings:
+    def _repair(index: int):
+        finding = findings[index]
         logger = models.create_finding_logger(finding)
-        sync_finding(
-            logger,
-            owasp_dt_client,
-            work_item_tracking_client,
-            azure_project,
-            finding,
+        if not globals.fix_references:
+            logger.error("Referenced WorkItem does not exist (add --fix-references parameter to recreate)")
+            return
+
+        work_item_adapter = create_new_work_item_adapter(
+            work_item_tracking_client=work_item_tracking_client,
+            azure_project=azure_project,
+            finding=finding,
+            area_path=area_path,
         )
+        if globals.apply_changes:
+            create_work_item(
+                logger=logger,
+                work_item_tracking_client=work_item_tracking_client,
+                azure_project=azure_project,
+                work_item_adapter=work_item_adapter,
+                owasp_dt_client=owasp_dt_client,
+            )
+            # Force the sync to re-read the Analysis containing the new reference
+            analyses[index] = None
+        else:
+            logger.info(f"Would recreate missing WorkItem type '{work_item_adapter.work_item_type}': {azure_helper.pretty_changes(work_item_adapter.get_changes())}")
 
-def find_newer(work_item_adapter: models.WorkItemAdapter, analysis: Analysis) -> tuple[models.WorkItemAdapter | Analysis, datetime]:
-    work_item_changed_data = work_item_adapter.changed_date
+    with ThreadPoolExecutor(max_workers=globals.workers) as executor:
+        for _ in executor.map(deadlines.bind_context(_repair), broken_indices):
+            pass
+
+    return list(zip(findings, analyses))
+
+def get_last_comment_date(analysis: Analysis) -> datetime:
     comments = owasp_dt_helper.read_comments_desc(analysis).collect()
     if len(comments) > 0:
-        last_comment = comments[0]
-        last_comment_date = owasp_dt_helper.create_date_from_comment(last_comment)
+        return owasp_dt_helper.create_date_from_comment(comments[0])
     else:
-        last_comment_date = datetime.fromtimestamp(0, tz=timezone.utc)
+        return datetime.fromtimestamp(0, tz=timezone.utc)
+
+def find_newer(work_item_adapter: models.WorkItemAdapter, analysis: Analysis) -> tuple[models.WorkItemAdapter | Analysis, datetime]:
+    work_item_changed_data = work_item_adapter.changed_date
+    last_comment_date = get_last_comment_date(analysis)
 
     if work_item_changed_data > last_comment_date:
         return work_item_adapter, work_item_changed_data
@@ -69,17 +130,38 @@ def sync_finding(
     work_item_tracking_client: WorkItemTrackingClient,
     azure_project: str,
     finding: Finding,
+    analysis: Analysis = None,
+    work_item_cache: cache.WorkItemCache = None,
+    reference_index: ReferenceIndex = None,
+    area_path: str = None,
 ):
     work_item_logger = finding_logger
+    reference_tag = get_finding_reference_tag(finding)
 
-    analysis = owasp_dt_helper.get_analysis(owasp_dt_client, finding)
+    if analysis is None:
+        analysis = owasp_dt_helper.get_analysis(owasp_dt_client, finding)
     opt_url = owasp_dt_helper.read_azure_devops_work_item_url(analysis)
+    if reference_index is not None:
+        # Tagged WorkItems are linked by the index, untagged WorkItems by the link in their Analysis
+        indexed_work_item = reference_index.find(reference_tag)
+        if indexed_work_item is not None:
+            opt_url = Opt(indexed_work_item.url)
+
+    if opt_url.absent and globals.journal:
+        opt_url = reconcile_pending_create(
+            logger=finding_logger,
+            owasp_dt_client=owasp_dt_client,
+            work_item_tracking_client=work_item_tracking_client,
+            azure_project=azure_project,
+            finding=finding,
+        )
 
     if opt_url.absent:
         work_item_adapter = create_new_work_item_adapter(
             work_item_tracking_client=work_item_tracking_client,
             azure_project=azure_project,
             finding=finding,
+            area_path=area_path,
         )
 
         if globals.apply_changes:
@@ -89,9 +171,10 @@ def sync_finding(
                 work_item_adapter=work_item_adapter,
                 azure_project=azure_project,
                 owasp_dt_client=owasp_dt_client,
+                work_item_cache=work_item_cache,
             )
         else:
-            finding_logger.info(f"Would create WorkItem type '{work_item_adapter.work_item_type}': {azure_helper.pretty_changes(work_item_adapter.get_changes())}")
+            finding_logger.info(f"Would create WorkItem type '{work_item_adapter.work_item_type}': {azure_helper.pretty_changes(get_new_work_item_changes(finding_logger, work_item_adapter, work_item_cache))}")
             work_item_logger = log.get_logger(finding_logger, work_item=None)
             work_item_adapter.set_work_item(WorkItem())
     else:
@@ -99,8 +182,13 @@ def sync_finding(
         work_item_adapter = models.WorkItemAdapter(WorkItem(id=work_item_id), finding)
 
         try:
-            work_item: WorkItem = work_item_tracking_client.get_work_item(id=work_item_id, project=azure_project)
-            work_item_adapter.set_work_item(work_item)
+            load_work_item(
+                work_item_tracking_client=work_item_tracking_client,
+                azure_project=azure_project,
+                work_item_adapter=work_item_adapter,
+                work_item_id=work_item_id,
+                work_item_cache=work_item_cache,
+            )
             work_item_logger = log.get_logger(finding_logger, work_item=work_item_id)
         except AzureDevOpsServiceError as e:
             finding_logger.error(e)
@@ -109,6 +197,7 @@ def sync_finding(
                     work_item_tracking_client=work_item_tracking_client,
                     azure_project=azure_project,
                     finding=finding,
+                    area_path=area_path,
                 )
                 work_item_logger, analysis = create_work_item(
                     logger=finding_logger,
@@ -116,6 +205,7 @@ def sync_finding(
                     azure_project=azure_project,
                     work_item_adapter=work_item_adapter,
                     owasp_dt_client=owasp_dt_client,
+                    work_item_cache=work_item_cache,
                 )
 
     sync_items(
@@ -124,38 +214,293 @@ def sync_finding(
         work_item_tracking_client=work_item_tracking_client,
         azure_project=azure_project,
         work_item_adapter=work_item_adapter,
-        analysis=analysis
+        analysis=analysis,
+        work_item_cache=work_item_cache,
     )
 
+def group_findings(
+    aggregation: models.Aggregation,
+    findings_with_analysis: Iterable[tuple[Finding, Analysis | None]],
+    router: targets.Router = None,
+    max_buffered: int = 10_000,
+) -> Iterator[list[tuple[Finding, Analysis | None]]]:
+    # The least recently extended groups are synchronized when too many Findings are buffered,
+    # later Findings of their keys are linked to the same WorkItem in another group
+    finding_groups: OrderedDict[tuple[str, str], list[tuple[Finding, Analysis | None]]] = OrderedDict()
+    buffered = 0
+    for finding, analysis in findings_with_analysis:
+        # Findings routed to different targets never share a WorkItem
+        target_name = router.route(finding).name if router else None
+        group_key = (target_name, aggregation.create_key(finding))
+        finding_groups.setdefault(group_key, []).append((finding, analysis))
+        finding_groups.move_to_end(group_key)
+        buffered += 1
+        if buffered > max_buffered:
+            _, finding_group = finding_groups.popitem(last=False)
+            buffered -= len(finding_group)
+            yield finding_group
+
+    yield from finding_groups.values()
+
+def sync_finding_group(
+    logger: log.Logger,
+    owasp_dt_client: AuthenticatedClient,
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    findings_with_analysis: list[tuple[Finding, Analysis | None]],
+    aggregation: models.Aggregation,
+    work_item_cache: cache.WorkItemCache = None,
+    reference_index: ReferenceIndex = None,
+    area_path: str = None,
+    work_item_id: int = None,
+) -> int | None:
+    # The WorkItem of an earlier group of the same key is used when none of the Findings is linked yet
+    findings = [finding for finding, _ in findings_with_analysis]
+    reference_tag = aggregation.create_reference_tag(findings[0])
+
+    def _get_analysis(finding_with_analysis: tuple[Finding, Analysis | None]):
+        finding, analysis = finding_with_analysis
+        return analysis if analysis is not None else owasp_dt_helper.get_analysis(owasp_dt_client, finding)
+
+    with ThreadPoolExecutor(max_workers=globals.workers) as executor:
+        analyses = list(executor.map(deadlines.bind_context(_get_analysis), findings_with_analysis))
+
+    referenced_ids: list[int | None] = []
+    for analysis in analyses:
+        opt_url = owasp_dt_helper.read_azure_devops_work_item_url(analysis)
+        referenced_ids.append(opt_url.map(azure_helper.read_work_item_id).get(None))
+
+    work_item_ids = sorted(set(filter(None, referenced_ids)))
+    if reference_index is not None:
+        indexed_work_item = reference_index.find(reference_tag)
+        if indexed_work_item is not None:
+            work_item_ids = [indexed_work_item.id]
+    if len(work_item_ids) == 0 and work_item_id:
+        work_item_ids = [work_item_id]
+
+    if len(work_item_ids) > 1:
+        logger.warning(f"Findings reference multiple WorkItems {work_item_ids}, using the first one")
+
+    work_item_adapter = models.WorkItemAdapter(WorkItem(), findings=findings)
+    work_item_logger = logger
+    if len(work_item_ids) == 0 and globals.journal:
+        opt_url = reconcile_pending_create(
+            logger=logger,
+            owasp_dt_client=owasp_dt_client,
+            work_item_tracking_client=work_item_tracking_client,
+            azure_project=azure_project,
+            finding=findings[0],
+        )
+        if opt_url.present:
+            work_item_ids = [azure_helper.read_work_item_id(opt_url.get())]
+            referenced_ids[0] = work_item_ids[0]
+
+    if len(work_item_ids) > 0:
+        try:
+            load_work_item(
+                work_item_tracking_client=work_item_tracking_client,
+                azure_project=azure_project,
+                work_item_adapter=work_item_adapter,
+                work_item_id=work_item_ids[0],
+                work_item_cache=work_item_cache,
+            )
+            work_item_logger = log.get_logger(logger, work_item=work_item_ids[0])
+        except AzureDevOpsServiceError as e:
+            logger.error(e)
+            if not globals.fix_references:
+                return None
+            work_item_ids = []
+
+    if len(work_item_ids) == 0:
+        work_item_adapter = create_new_work_item_adapter(
+            work_item_tracking_client=work_item_tracking_client,
+            azure_project=azure_project,
+            findings=findings,
+            reference_tag=reference_tag,
+            area_path=area_path,
+        )
+        if globals.apply_changes:
+            work_item_logger, _ = create_work_item(
+                logger=logger,
+                work_item_tracking_client=work_item_tracking_client,
+                azure_project=azure_project,
+                work_item_adapter=work_item_adapter,
+                owasp_dt_client=owasp_dt_client,
+                work_item_cache=work_item_cache,
+            )
+            referenced_ids[0] = work_item_adapter.work_item.id
+        else:
+            logger.info(f"Would create WorkItem type '{work_item_adapter.work_item_type}': {azure_helper.pretty_changes(get_new_work_item_changes(logger, work_item_adapter, work_item_cache))}")
+            work_item_logger = log.get_logger(logger, work_item=None)
+            work_item_adapter.set_work_item(WorkItem())
+
+    def _link(index: int):
+        finding = findings[index]
+        if globals.apply_changes:
+            analysis_request = owasp_dt_helper.create_azure_devops_work_item_analysis(finding, work_item_adapter.work_item.url)
+            owasp_dt_helper.add_analysis(owasp_dt_client, analysis_request)
+
+    unlinked_indices = [index for index, work_item_id in enumerate(referenced_ids) if work_item_id != work_item_adapter.work_item.id]
+    if len(unlinked_indices) > 0:
+        with ThreadPoolExecutor(max_workers=globals.workers) as executor:
+            for _ in executor.map(deadlines.bind_context(_link), unlinked_indices):
+                pass
+        work_item_logger.info(f"{"Linked" if globals.apply_changes else "Would link"} {len(unlinked_indices)} Findings to WorkItem")
+
+    latest_index = max(range(len(analyses)), key=lambda index: get_last_comment_date(analyses[index]))
+    newer, reference_date = find_newer(work_item_adapter, analyses[latest_index])
+    if isinstance(newer, Analysis):
+        sync_analysis_to_work_item(
+            logger=work_item_logger,
+            owasp_dt_client=owasp_dt_client,
+            analysis_adapter=models.AnalysisAdapter(analyses[latest_index], findings[latest_index]),
+            work_item_tracking_client=work_item_tracking_client,
+            azure_project=azure_project,
+            work_item_adapter=work_item_adapter,
+            reference_date=reference_date,
+            work_item_cache=work_item_cache,
+        )
+    else:
+        def _sync_analysis(index: int):
+            sync_work_item_to_analysis(
+                logger=log.get_logger(models.create_finding_logger(findings[index]), work_item=work_item_adapter.work_item.id),
+                work_item_tracking_client=work_item_tracking_client,
+                azure_project=azure_project,
+                work_item_adapter=work_item_adapter,
+                owasp_dt_client=owasp_dt_client,
+                analysis_adapter=models.AnalysisAdapter(analyses[index], findings[index]),
+                reference_date=reference_date,
+            )
+
+        with ThreadPoolExecutor(max_workers=globals.workers) as executor:
+            for _ in executor.map(deadlines.bind_context(_sync_analysis), range(len(findings))):
+                pass
+
+    return work_item_adapter.work_item.id
+
+@tracing.traced("get_work_item")
+def load_work_item(
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    work_item_adapter: models.WorkItemAdapter,
+    work_item_id: int,
+    work_item_cache: cache.WorkItemCache = None,
+):
+    if work_item_cache:
+        work_item = work_item_cache.get(work_item_id)
+        work_item_adapter.set_work_item(
+            work_item,
+            loaded_fields=work_item_cache.fields,
+            field_loader=lambda fields: work_item_cache.load_fields(work_item_id, fields),
+        )
+    else:
+        read_fields = get_read_fields()
+        work_item: WorkItem = work_item_tracking_client.get_work_item(id=work_item_id, project=azure_project, fields=read_fields)
+        work_item_adapter.set_work_item(
+            work_item,
+            loaded_fields=read_fields,
+            field_loader=lambda fields: work_item_tracking_client.get_work_item(id=work_item_id, project=azure_project, fields=fields).fields,
+        )
+
+def get_read_fields() -> list[str]:
+    return sorted({str(field) for field in models.WorkItemAdapter.read_fields} | set(globals.mapper.work_item_fields))
+
 def create_new_work_item_adapter(
     work_item_tracking_client: WorkItemTrackingClient,
     azure_project: str,
-    finding: Finding = None
+    finding: Finding = None,
+    findings: list[Finding] = None,
+    reference_tag: str = None,
+    area_path: str = None,
 ):
-    work_item_adapter = models.WorkItemAdapter(WorkItem(), finding)
+    work_item_adapter = models.WorkItemAdapter(WorkItem(), finding, findings)
     work_item_adapter.title = "New Finding"
-    work_item_adapter.area = config.getenv("AZURE_WORK_ITEM_DEFAULT_AREA_PATH", "")
-    globals.mapper.new_work_item(work_item_adapter)
+    work_item_adapter.area = area_path if area_path is not None else config.getenv("AZURE_WORK_ITEM_DEFAULT_AREA_PATH", "")
+    with tracing.span("mapper.new_work_item"):
+        globals.mapper.new_work_item(work_item_adapter)
+    add_reference_tags(work_item_adapter, reference_tag or get_finding_reference_tag(work_item_adapter.finding))
 
     if empty(work_item_adapter.work_item_type):
-        work_item_type = azure_helper.find_best_work_item_type(work_item_tracking_client, azure_project)
+        work_item_type = azure_helper.find_best_work_item_type(work_item_tracking_client, azure_project, globals.work_item_types)
         work_item_adapter.work_item_type = work_item_type.reference_name
 
     return work_item_adapter
 
+def get_finding_reference_tag(finding: Finding):
+    return models.create_reference_tag("finding", owasp_dt_helper.create_finding_key(finding))
+
+def add_reference_tags(work_item_adapter: models.WorkItemAdapter, reference_tag: str):
+    work_item_adapter.add_tag(models.REFERENCE_TAG)
+    work_item_adapter.add_tag(reference_tag)
+
+def reconcile_pending_create(
+    logger: log.Logger,
+    owasp_dt_client: AuthenticatedClient,
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    finding: Finding,
+) -> Opt[str]:
+    finding_key = owasp_dt_helper.create_finding_key(finding)
+    pending_create = globals.journal.get_pending_create(finding_key)
+    if not pending_create:
+        return Opt(None)
+
+    url = pending_create.get("url")
+    if empty(url):
+        work_item_ids = azure_helper.find_work_item_ids_by_tag(work_item_tracking_client, azure_project, pending_create["tag"])
+        if len(work_item_ids) == 0:
+            logger.info("Interrupted WorkItem creation did not create a WorkItem")
+            return Opt(None)
+        elif len(work_item_ids) > 1:
+            logger.warning(f"Interrupted WorkItem creation matches multiple WorkItems {work_item_ids}, using the first one")
+
+        work_item: WorkItem = work_item_tracking_client.get_work_item(id=min(work_item_ids), project=azure_project, fields=["System.Id"])
+        url = work_item.url
+
+    if globals.apply_changes:
+        owasp_dt_helper.add_analysis(owasp_dt_client, owasp_dt_helper.create_azure_devops_work_item_analysis(finding, url))
+        globals.journal.mark_linked(finding_key)
+        logger.info(f"Reconciled interrupted WorkItem creation: {url}")
+    else:
+        logger.info(f"Would reconcile interrupted WorkItem creation: {url}")
+
+    return Opt(url)
+
+def get_new_work_item_changes(logger: log.Logger, work_item_adapter: models.WorkItemAdapter, work_item_cache: cache.WorkItemCache = None) -> list[JsonPatchOperation]:
+    changes = work_item_adapter.get_changes()
+    if work_item_cache and work_item_cache.validator:
+        changes = work_item_cache.validator.validate(logger, None, work_item_adapter.work_item_type, None, changes)
+    return changes
+
+@tracing.traced()
 def create_work_item(
     logger: log.Logger,
     work_item_tracking_client: WorkItemTrackingClient,
     azure_project: str,
     work_item_adapter: models.WorkItemAdapter,
-    owasp_dt_client: AuthenticatedClient
+    owasp_dt_client: AuthenticatedClient,
+    work_item_cache: cache.WorkItemCache = None,
 ):
-    work_item: WorkItem = work_item_tracking_client.create_work_item(document=work_item_adapter.get_changes(), project=azure_project, type=work_item_adapter.work_item_type)
+    finding_key = owasp_dt_helper.create_finding_key(work_item_adapter.finding)
+    if globals.journal:
+        reference_tag = Stream(work_item_adapter.tags).filter(models.parse_reference_tag).next().get(None)
+        globals.journal.begin_create(finding_key, reference_tag)
+
+    changes = get_new_work_item_changes(logger, work_item_adapter, work_item_cache)
+    work_item: WorkItem = work_item_tracking_client.create_work_item(document=changes, project=azure_project, type=work_item_adapter.work_item_type)
     work_item_adapter.set_work_item(work_item)
+    if work_item_cache:
+        work_item_cache.put(work_item)
+
+    if globals.journal:
+        globals.journal.mark_created(finding_key, work_item.id, work_item.url)
 
     analysis = owasp_dt_helper.create_azure_devops_work_item_analysis(work_item_adapter.finding, work_item.url)
     owasp_dt_helper.add_analysis(owasp_dt_client, analysis)
 
+    if globals.journal:
+        globals.journal.mark_linked(finding_key)
+
     logger = log.get_logger(logger, work_item=work_item_adapter.work_item.id)
     logger.info(f"Created new WorkItem type '{work_item_adapter.work_item_type}'")
 
@@ -168,6 +513,7 @@ def sync_items(
     azure_project: str,
     work_item_adapter: models.WorkItemAdapter,
     analysis: Analysis,
+    work_item_cache: cache.WorkItemCache = None,
 ):
     analysis_adapter = models.AnalysisAdapter(analysis, work_item_adapter.finding)
 
@@ -181,6 +527,7 @@ def sync_items(
             azure_project=azure_project,
             work_item_adapter=work_item_adapter,
             reference_date=reference_date,
+            work_item_cache=work_item_cache,
         )
     elif isinstance(newer, models.WorkItemAdapter):
         sync_work_item_to_analysis(
@@ -203,10 +550,12 @@ def sync_work_item_to_analysis(
     analysis_adapter: models.AnalysisAdapter,
     reference_date: datetime,
 ):
-    globals.mapper.map_work_item_to_analysis(work_item_adapter, analysis_adapter)
+    with tracing.span("mapper.map_work_item_to_analysis"):
+        globals.mapper.map_work_item_to_analysis(work_item_adapter, analysis_adapter)
 
     if globals.apply_changes:
-        resp = update_analysis.sync_detailed(client=owasp_dt_client, body=analysis_adapter.get_request())
+        with tracing.span("update_analysis"):
+            resp = update_analysis.sync_detailed(client=owasp_dt_client, body=analysis_adapter.get_request())
         assert resp.status_code == 200
         logger.info(f"Updated Analysis: {owasp_dt_helper.pretty_analysis_request(analysis_adapter.get_request())}")
     else:
@@ -220,12 +569,25 @@ def sync_analysis_to_work_item(
     azure_project: str,
     work_item_adapter: models.WorkItemAdapter,
     reference_date: datetime,
+    work_item_cache: cache.WorkItemCache = None,
 ):
-    globals.mapper.map_analysis_to_work_item(analysis_adapter, work_item_adapter)
+    with tracing.span("mapper.map_analysis_to_work_item"):
+        globals.mapper.map_analysis_to_work_item(analysis_adapter, work_item_adapter)
+    update_work_item(logger, work_item_tracking_client, azure_project, work_item_adapter, work_item_cache)
 
+@tracing.traced()
+def update_work_item(
+    logger: log.Logger,
+    work_item_tracking_client: WorkItemTrackingClient,
+    azure_project: str,
+    work_item_adapter: models.WorkItemAdapter,
+    work_item_cache: cache.WorkItemCache = None,
+):
     changes = work_item_adapter.get_changes()
     if len(changes) > 0:
-        if globals.apply_changes:
+        if work_item_cache and work_item_adapter.work_item.id:
+            work_item_cache.add_changes(logger, work_item_adapter.work_item.id, changes)
+        elif globals.apply_changes:
             try:
                 work_item_tracking_client.update_work_item(id=work_item_adapter.work_item.id, document=changes, project=azure_project)
                 logger.info(f"Updated WorkItem: {azure_helper.pretty_changes(changes)}")
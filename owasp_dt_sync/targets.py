@@ -0,0 +1,275 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from azure.devops.released.work_item_tracking import WorkItemTrackingClient
+from is_empty import empty
+from owasp_dt.models import Finding
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
+
+from owasp_dt_sync import config, azure_helper, cache, globals, log, http_cache, deadlines, validation
+from owasp_dt_sync.journal import Journal
+from owasp_dt_sync.reference_index import ReferenceIndex
+
+DEFAULT_TARGET = "default"
+
+
+@dataclass
+class Target:
+    name: str
+    org_url: str
+    project: str
+    api_key: str
+    area_path: str = ""
+    # Names or UUIDs of the OWASP Dependency Track projects routed to this target
+    projects: list[str] = field(default_factory=list)
+    workers: int = 1
+    requests_per_second: float | None = None
+
+
+def create_target_from_env(name: str = DEFAULT_TARGET, workers: int = 1) -> Target:
+    return Target(
+        name=name,
+        org_url=config.reqenv("AZURE_ORG_URL"),
+        project=config.reqenv("AZURE_PROJECT"),
+        api_key=config.reqenv("AZURE_API_KEY"),
+        area_path=config.getenv("AZURE_WORK_ITEM_DEFAULT_AREA_PATH", ""),
+        workers=workers,
+    )
+
+
+def create_target(name: str, target_dict: dict) -> Target:
+    # Settings not defined by the target fall back to the environment, API keys are only read from the environment
+    assert "api_key" not in target_dict, f"Target '{name}' must not contain a plaintext API key (use api_key_env to reference an environment variable)"
+    target = Target(
+        name=name,
+        org_url=target_dict.get("org_url") or config.reqenv("AZURE_ORG_URL"),
+        project=target_dict.get("project") or config.reqenv("AZURE_PROJECT"),
+        api_key=config.reqenv(target_dict.get("api_key_env", "AZURE_API_KEY")),
+        area_path=target_dict.get("area_path", config.getenv("AZURE_WORK_ITEM_DEFAULT_AREA_PATH", "")),
+        projects=list(target_dict.get("projects", [])),
+        workers=int(target_dict.get("workers", 1)),
+        requests_per_second=target_dict.get("requests_per_second"),
+    )
+    assert target.workers > 0, f"Target '{name}' requires at least one worker"
+    return target
+
+
+def load_targets(path: Path) -> list[Target]:
+    with open(path, encoding="utf-8") as file:
+        targets_dict = json.load(file)
+
+    assert isinstance(targets_dict, dict) and len(targets_dict) > 0, f"Targets file '{path}' must contain an object of named targets"
+    return [create_target(name, target_dict) for name, target_dict in targets_dict.items()]
+
+
+class RateLimiter:
+    def __init__(self, requests_per_second: float):
+        assert requests_per_second > 0, "Rate limit must be greater than zero"
+        self.__interval = 1 / requests_per_second
+        self.__lock = threading.Lock()
+        self.__next_time = time.monotonic()
+
+    def acquire(self):
+        with self.__lock:
+            now = time.monotonic()
+            wait_time = self.__next_time - now
+            self.__next_time = max(now, self.__next_time) + self.__interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+# Delegates to a client and limits the rate of its method calls
+class RateLimitedClient:
+    def __init__(self, client: any, rate_limiter: RateLimiter):
+        self.__client = client
+        self.__rate_limiter = rate_limiter
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.__client, name)
+        if not callable(attribute):
+            return attribute
+
+        def _call(*args, **kwargs):
+            self.__rate_limiter.acquire()
+            return attribute(*args, **kwargs)
+
+        return _call
+
+
+# Runtime state of a target: client, WorkItem cache and worker pool
+class TargetContext:
+    def __init__(
+        self,
+        target: Target,
+        fields: list[str] = None,
+        response_store: http_cache.ResponseStore = None,
+        request_policy: deadlines.RequestPolicy = None,
+    ):
+        self.target = target
+        connection = azure_helper.create_connection(target.org_url, target.api_key)
+        work_item_tracking_client = connection.clients.get_work_item_tracking_client()
+        if response_store or request_policy:
+            def _create_adapter(max_retries: Retry):
+                adapter = deadlines.PolicyAdapter(request_policy, max_retries=max_retries) if request_policy else HTTPAdapter(max_retries=max_retries)
+                return http_cache.CachingAdapter(adapter, response_store) if response_store else adapter
+
+            azure_helper.mount_adapter(work_item_tracking_client, _create_adapter)
+        if target.requests_per_second:
+            work_item_tracking_client = RateLimitedClient(work_item_tracking_client, RateLimiter(target.requests_per_second))
+        self.work_item_tracking_client: WorkItemTrackingClient = work_item_tracking_client
+        self.__fields = fields
+        # The worker threads keep their sessions and connection pools across runs
+        self.__executor = ThreadPoolExecutor(max_workers=target.workers, thread_name_prefix=f"target-{target.name}")
+        # Bounds the queued Findings, so that the dispatcher does not run ahead of the workers
+        self.__slots = threading.BoundedSemaphore(target.workers * 4)
+        self.__lock = threading.Lock()
+        self.__futures: set[Future] = set()
+        self.begin()
+
+    def begin(self):
+        # WorkItems, type rules and references are only cached for one run
+        self.validator = validation.WorkItemValidator(self.work_item_tracking_client, self.target.project)
+        self.work_item_cache = cache.WorkItemCache(self.work_item_tracking_client, self.target.project, fields=self.__fields, validator=self.validator)
+        self.reference_index: ReferenceIndex | None = None
+        # WorkItems of aggregation keys, whose Findings may be synchronized in multiple groups
+        self.group_work_item_ids: dict[str, int] = {}
+        with self.__lock:
+            self.__completed_keys: list[str] = []
+            self.__group_locks: dict[str, threading.Lock] = {}
+
+    @property
+    def name(self):
+        return self.target.name
+
+    @contextmanager
+    def lock_group(self, reference_tag: str):
+        with self.__lock:
+            group_lock = self.__group_locks.setdefault(reference_tag, threading.Lock())
+        with group_lock:
+            yield
+
+    @property
+    def azure_project(self):
+        return self.target.project
+
+    def __done(self, future: Future):
+        with self.__lock:
+            self.__futures.discard(future)
+        self.__slots.release()
+
+    def submit(self, fn: Callable[[], None]) -> Future:
+        self.__slots.acquire()
+        try:
+            future = self.__executor.submit(deadlines.bind_context(fn))
+        except BaseException:
+            self.__slots.release()
+            raise
+        with self.__lock:
+            self.__futures.add(future)
+        future.add_done_callback(self.__done)
+        return future
+
+    def join(self, cancel: bool = False):
+        with self.__lock:
+            futures = list(self.__futures)
+        if cancel:
+            for future in futures:
+                future.cancel()
+        wait(futures)
+
+    def complete(self, finding_keys: Iterable[str]):
+        with self.__lock:
+            self.__completed_keys.extend(finding_keys)
+
+    def flush(self, apply_changes: bool, journal: Journal | None):
+        # The changes of completed Findings are pending in the cache, when their keys are taken
+        with self.__lock:
+            completed_keys = self.__completed_keys
+            self.__completed_keys = []
+
+        self.work_item_cache.flush(apply_changes)
+        # Findings are only processed when their changes have been applied
+        if journal and apply_changes:
+            for finding_key in completed_keys:
+                journal.mark_processed(finding_key)
+
+    def shutdown(self, cancel: bool = False):
+        self.__executor.shutdown(wait=True, cancel_futures=cancel)
+
+
+class Router:
+    # Findings buffered longer than this number of routes are routed again
+    MAX_CACHED_ROUTES = 10_000
+
+    def __init__(self, contexts: Iterable[TargetContext]):
+        self.__contexts = {context.name: context for context in contexts}
+        self.__lock = threading.Lock()
+        # Routes of the recently routed Findings by their identity, the Findings are kept so that their ids are not reused
+        self.__routes: OrderedDict[int, tuple[Finding, TargetContext | None]] = OrderedDict()
+        self.__project_routes: dict[str, TargetContext] = {}
+        for context in self.__contexts.values():
+            for project in context.target.projects:
+                assert project not in self.__project_routes, f"Project '{project}' is routed to multiple targets"
+                self.__project_routes[project] = context
+
+        if DEFAULT_TARGET in self.__contexts:
+            self.__default = self.__contexts[DEFAULT_TARGET]
+        elif len(self.__contexts) == 1:
+            self.__default = next(iter(self.__contexts.values()))
+        else:
+            self.__default = None
+
+    @property
+    def contexts(self) -> list[TargetContext]:
+        return list(self.__contexts.values())
+
+    def route(self, finding: Finding) -> TargetContext | None:
+        # Every pipeline stage routes the Findings, the mapper is only called once per Finding
+        with self.__lock:
+            cached = self.__routes.get(id(finding))
+            if cached is not None and cached[0] is finding:
+                self.__routes.move_to_end(id(finding))
+                return cached[1]
+
+        context = self.__route(finding)
+        with self.__lock:
+            self.__routes[id(finding)] = (finding, context)
+            if len(self.__routes) > self.MAX_CACHED_ROUTES:
+                self.__routes.popitem(last=False)
+        return context
+
+    def __route(self, finding: Finding) -> TargetContext | None:
+        target_name = globals.mapper.route_finding(finding)
+        if not empty(target_name):
+            assert target_name in self.__contexts, f"Mapper routed Finding to unknown target '{target_name}'"
+            return self.__contexts[target_name]
+
+        return (
+            self.__project_routes.get(finding.component.project)
+            or self.__project_routes.get(finding.component.project_name)
+            or self.__default
+        )
+
+    def filter_routable(self, findings: Iterable[Finding]) -> Iterator[Finding]:
+        for finding in findings:
+            if self.route(finding) is None:
+                log.get_logger(project=finding.component.project_name, vulnerability=finding.vulnerability.vuln_id).warning("Finding is not routed to any target")
+            else:
+                yield finding
+
+    def partition(self, findings: Iterable[Finding]) -> dict[str, list[Finding]]:
+        partitions: dict[str, list[Finding]] = {}
+        for finding in findings:
+            partitions.setdefault(self.route(finding).name, []).append(finding)
+        return partitions
+
+    def get(self, name: str) -> TargetContext:
+        return self.__contexts[name]
@@ -0,0 +1,171 @@
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+FORMATS = ["chrome", "otlp"]
+SERVICE_NAME = "owasp-dtrack-azure-devops"
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: int
+    span_id: int
+    parent_id: int | None
+    start_ns: int
+    end_ns: int = 0
+    thread_id: int = 0
+    attributes: dict[str, str] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+
+# Collects the finished spans of a run, which are exported as Chrome trace events or OTLP JSON.
+# The spans are kept in memory until the export at the end of the run.
+class Tracer:
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__spans: list[Span] = []
+
+    @property
+    def spans(self) -> list[Span]:
+        with self.__lock:
+            return list(self.__spans)
+
+    def add(self, span: Span):
+        with self.__lock:
+            self.__spans.append(span)
+
+    def reset(self):
+        with self.__lock:
+            self.__spans.clear()
+
+    def export(self, path: Path, trace_format: str = "chrome"):
+        assert trace_format in FORMATS, f"Unknown trace format '{trace_format}' (use one of {FORMATS})"
+        document = create_chrome_trace(self.spans) if trace_format == "chrome" else create_otlp_trace(self.spans)
+        with open(path, "w") as file:
+            json.dump(document, file)
+
+
+__tracer: contextvars.ContextVar[Tracer | None] = contextvars.ContextVar("tracer", default=None)
+__current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+def get_tracer() -> Tracer | None:
+    return __tracer.get()
+
+@contextmanager
+def use_tracer(tracer: Tracer | None):
+    token = __tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        __tracer.reset(token)
+
+def get_current_span() -> Span | None:
+    return __current_span.get()
+
+@contextmanager
+def span(name: str, root: bool = False, attributes: dict[str, any] = None):
+    # Spans are only recorded when a tracer is active, root spans start a new trace
+    tracer = __tracer.get()
+    if tracer is None:
+        yield None
+        return
+
+    parent = None if root else __current_span.get()
+    current = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else random.getrandbits(128),
+        span_id=random.getrandbits(64),
+        parent_id=parent.span_id if parent else None,
+        start_ns=time.time_ns(),
+        thread_id=threading.get_native_id(),
+        attributes={key: str(value) for key, value in (attributes or {}).items()},
+    )
+    token = __current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        __current_span.reset(token)
+        current.end_ns = time.time_ns()
+        tracer.add(current)
+
+def traced(name: str = None) -> Callable[[Callable], Callable]:
+    def _decorate(fn: Callable) -> Callable:
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def _traced(*args, **kwargs):
+            if __tracer.get() is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        return _traced
+
+    return _decorate
+
+
+def create_chrome_trace(spans: list[Span]) -> dict:
+    pid = os.getpid()
+    events = []
+    for finished_span in sorted(spans, key=lambda finished_span: finished_span.start_ns):
+        args = dict(finished_span.attributes)
+        if finished_span.error:
+            args["error"] = finished_span.error
+        events.append({
+            "name": finished_span.name,
+            "cat": SERVICE_NAME,
+            "ph": "X",
+            "ts": finished_span.start_ns / 1000,
+            "dur": finished_span.duration_ns / 1000,
+            "pid": pid,
+            "tid": finished_span.thread_id,
+            "args": args,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def create_otlp_attributes(attributes: dict[str, str]) -> list[dict]:
+    return [{"key": key, "value": {"stringValue": value}} for key, value in attributes.items()]
+
+
+def create_otlp_trace(spans: list[Span]) -> dict:
+    otlp_spans = []
+    for finished_span in spans:
+        otlp_span = {
+            "traceId": f"{finished_span.trace_id:032x}",
+            "spanId": f"{finished_span.span_id:016x}",
+            "name": finished_span.name,
+            # SPAN_KIND_INTERNAL
+            "kind": 1,
+            "startTimeUnixNano": str(finished_span.start_ns),
+            "endTimeUnixNano": str(finished_span.end_ns),
+            "attributes": create_otlp_attributes({**finished_span.attributes, "thread.id": str(finished_span.thread_id)}),
+            # STATUS_CODE_ERROR or STATUS_CODE_UNSET
+            "status": {"code": 2, "message": finished_span.error} if finished_span.error else {},
+        }
+        if finished_span.parent_id is not None:
+            otlp_span["parentSpanId"] = f"{finished_span.parent_id:016x}"
+        otlp_spans.append(otlp_span)
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": create_otlp_attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": "owasp_dt_sync"}, "spans": otlp_spans}],
+        }],
+    }
@@ -0,0 +1,137 @@
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+from azure.devops.exceptions import AzureDevOpsServiceError
+from azure.devops.released.work_item_tracking import WorkItemTrackingClient, WorkItemType, JsonPatchOperation
+
+from owasp_dt_sync import log, models, stats
+
+
+CLOSED_STATE_CATEGORIES = ("Completed", "Removed")
+
+
+@dataclass
+class WorkItemTypeRules:
+    states: set[str]
+    # Allowed target states by current state, the empty state contains the initial states
+    transitions: dict[str, set[str]] | None
+    # Allowed values by lower case field reference name (None for any value)
+    fields: dict[str, set[str] | None]
+    # States of the completed and removed categories
+    closed_states: set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_work_item_type(cls, work_item_type: WorkItemType):
+        if work_item_type.transitions:
+            transitions = {state: {transition.to for transition in state_transitions or []} for state, state_transitions in work_item_type.transitions.items()}
+        else:
+            transitions = None
+
+        return cls(
+            states={state.name for state in work_item_type.states or []},
+            transitions=transitions,
+            fields={field.reference_name.lower(): set(field.allowed_values) if field.allowed_values else None for field in work_item_type.fields or []},
+            closed_states={state.name for state in work_item_type.states or [] if state.category in CLOSED_STATE_CATEGORIES},
+        )
+
+
+@dataclass
+class RejectedChange:
+    work_item_id: int | None
+    work_item_type: str
+    field: str
+    value: any
+    reason: str
+
+
+# Validates WorkItem changes against the rules of their type before writing them
+class WorkItemValidator:
+    def __init__(self, work_item_tracking_client: WorkItemTrackingClient, azure_project: str):
+        self.__client = work_item_tracking_client
+        self.__project = azure_project
+        self.__lock = threading.Lock()
+        self.__rules: dict[str, Future[WorkItemTypeRules | None]] = {}
+        self.__rejected: list[RejectedChange] = []
+
+    @property
+    def rejected(self) -> list[RejectedChange]:
+        return list(self.__rejected)
+
+    def get_rules(self, work_item_type: str) -> WorkItemTypeRules | None:
+        # Every type is loaded once outside of the lock, concurrent readers wait for the same load
+        with self.__lock:
+            future = self.__rules.get(work_item_type)
+            is_loader = future is None
+            if is_loader:
+                future = Future()
+                self.__rules[work_item_type] = future
+
+        if is_loader:
+            try:
+                future.set_result(WorkItemTypeRules.from_work_item_type(self.__client.get_work_item_type(self.__project, work_item_type)))
+            except AzureDevOpsServiceError as e:
+                log.logger.warning(f"Unable to load the rules of WorkItem type '{work_item_type}', changes are not validated: {e}")
+                future.set_result(None)
+            except Exception as e:
+                # Failed loads are not cached, so that they can be retried
+                with self.__lock:
+                    self.__rules.pop(work_item_type, None)
+                future.set_exception(e)
+
+        return future.result()
+
+    def __validate_change(self, rules: WorkItemTypeRules, current_state: str | None, change: JsonPatchOperation) -> str | None:
+        field = change.path.removeprefix("/fields/")
+        if field.lower() not in rules.fields:
+            return "Unknown field"
+
+        if field.lower() == models.WorkItemField.STATE.lower():
+            if change.value not in rules.states:
+                return "Unknown state"
+            if rules.transitions is not None and change.value != current_state:
+                allowed_states = rules.transitions.get(current_state or "", set())
+                if change.value not in allowed_states:
+                    return f"Invalid transition from '{current_state or 'New WorkItem'}'"
+        else:
+            allowed_values = rules.fields[field.lower()]
+            if allowed_values is not None and isinstance(change.value, str) and change.value not in allowed_values:
+                return "Value not allowed"
+
+        return None
+
+    def validate(
+        self,
+        logger: log.Logger,
+        work_item_id: int | None,
+        work_item_type: str,
+        current_state: str | None,
+        changes: list[JsonPatchOperation],
+    ) -> list[JsonPatchOperation]:
+        rules = self.get_rules(work_item_type) if work_item_type else None
+        if rules is None:
+            return changes
+
+        accepted_changes = []
+        for change in changes:
+            reason = self.__validate_change(rules, current_state, change) if change.path.startswith("/fields/") else None
+            if reason is None:
+                accepted_changes.append(change)
+            else:
+                rejected_change = RejectedChange(work_item_id, work_item_type, change.path.removeprefix("/fields/"), change.value, reason)
+                with self.__lock:
+                    self.__rejected.append(rejected_change)
+                stats.increment("rejected_changes")
+                logger.warning(f"Rejected change of WorkItem type '{work_item_type}' field '{rejected_change.field}' to '{change.value}': {reason}")
+
+        return accepted_changes
+
+    def report(self, logger: log.Logger = log.logger):
+        groups: dict[tuple[str, str, str], list[RejectedChange]] = {}
+        for rejected_change in self.__rejected:
+            groups.setdefault((rejected_change.work_item_type, rejected_change.field, rejected_change.reason), []).append(rejected_change)
+
+        for (work_item_type, field, reason), rejected_changes in groups.items():
+            work_item_ids = sorted({rejected_change.work_item_id for rejected_change in rejected_changes if rejected_change.work_item_id})
+            values = sorted({str(rejected_change.value) for rejected_change in rejected_changes})
+            logger.warning(f"Rejected {len(rejected_changes)} changes of WorkItem type '{work_item_type}' field '{field}' ({reason}): values {values[:10]}, WorkItems {work_item_ids[:10]}")
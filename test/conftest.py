@@ -1,15 +1,101 @@
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
 import pytest
 from azure.devops.connection import Connection
-from azure.devops.released.work_item_tracking import WorkItemTrackingClient
+from azure.devops.released.work_item_tracking import WorkItemTrackingClient, WorkItem, WorkItemType, WorkItemQueryResult, WorkItemReference
 from owasp_dt import AuthenticatedClient
-from owasp_dt.models import Finding, FindingAnalysis, FindingComponent, FindingVulnerability
+from owasp_dt.models import Finding, FindingAnalysis, FindingAnalysisState, FindingAttrib, FindingComponent, FindingVulnerability
+from owasp_dt.types import UNSET
 
-from owasp_dt_sync import owasp_dt_helper, azure_helper, config
+from owasp_dt_sync import owasp_dt_helper, azure_helper, config, targets
 
 @pytest.fixture
 def finding_stub():
     return Finding(analysis=FindingAnalysis(),component=FindingComponent(),vulnerability=FindingVulnerability())
 
+def create_finding(
+    project: str = "project",
+    project_name: str = None,
+    component: str = "component",
+    vuln_id: str = "CVE-1",
+    vulnerability: str = None,
+    severity: str = "HIGH",
+    cvss_v3: float = 7.5,
+    cvss_v2: float = None,
+    epss_score: float = None,
+    analysis_state: FindingAnalysisState = None,
+    attributed_on: date = None,
+    description: str = None,
+):
+    return Finding(
+        analysis=FindingAnalysis(state=analysis_state) if analysis_state else FindingAnalysis(),
+        attribution=FindingAttrib(attributed_on=int(datetime(attributed_on.year, attributed_on.month, attributed_on.day, 12, tzinfo=timezone.utc).timestamp() * 1000)) if attributed_on else UNSET,
+        component=FindingComponent(uuid=component, project=project, project_name=project_name or project, project_version="latest", name="urllib3", version="2.4.0", latest_version="2.5.0"),
+        vulnerability=FindingVulnerability(uuid=vulnerability or vuln_id, vuln_id=vuln_id, source="NVD", severity=severity, cvss_v3_base_score=cvss_v3, cvss_v2_base_score=cvss_v2, epss_score=epss_score, description=description),
+    )
+
+# Records the calls of the Azure DevOps client, WorkItems are paged by id like by azure_helper.query_work_item_ids()
+class WorkItemTrackingClientStub:
+    def __init__(self, work_items: list[WorkItem] = None, work_item_types: list[WorkItemType] = None):
+        self.work_items = {work_item.id: work_item for work_item in work_items or []}
+        self.work_item_types = {work_item_type.name: work_item_type for work_item_type in work_item_types or []}
+        self.queries = []
+        self.get_calls = []
+        self.batch_calls = []
+        self.type_calls = []
+        self.update_calls = []
+        self.create_calls = []
+
+    def query_by_wiql(self, wiql, team_context=None, top=None):
+        self.queries.append(wiql.query)
+        last_id = int(wiql.query.split("[System.Id] > ")[1].split(" ")[0])
+        ids = sorted(id for id in self.work_items if id > last_id)[:top]
+        return WorkItemQueryResult(work_items=[WorkItemReference(id=id) for id in ids])
+
+    def get_work_item(self, id, project=None, fields=None):
+        self.get_calls.append((id, fields))
+        work_item = self.work_items[id]
+        if fields is None:
+            return work_item
+        return WorkItem(id=id, url=work_item.url, fields={field: value for field, value in work_item.fields.items() if field in fields})
+
+    def get_work_items(self, ids, project=None, fields=None, error_policy=None):
+        self.batch_calls.append(ids)
+        return [self.work_items.get(id) for id in ids]
+
+    def get_work_item_type(self, project, type):
+        self.type_calls.append(type)
+        return self.work_item_types[type]
+
+    def update_work_item(self, document, id, project=None):
+        self.update_calls.append((id, document))
+
+    def create_work_item(self, document, project, type):
+        work_item_id = max(self.work_items, default=0) + 1
+        self.create_calls.append((type, document))
+        self.work_items[work_item_id] = WorkItem(id=work_item_id, url=f"https://dev.azure.com/org/project/_apis/wit/workItems/{work_item_id}", fields={})
+        return self.work_items[work_item_id]
+
+@pytest.fixture
+def finding_factory():
+    return create_finding
+
+@pytest.fixture
+def work_item_tracking_client_stub():
+    return WorkItemTrackingClientStub
+
+@pytest.fixture
+def stub_target_factory(monkeypatch):
+    # Connects the default target to the given WorkItem tracking client stub
+    def _create_stub_target(client) -> targets.Target:
+        client.config = SimpleNamespace()
+        client.normalized_url = "https://dev.azure.com/org"
+        monkeypatch.setattr(azure_helper, "create_connection", lambda org_url, api_key: SimpleNamespace(clients=SimpleNamespace(get_work_item_tracking_client=lambda: client)))
+        return targets.Target(name="default", org_url="https://dev.azure.com/org", project="project", api_key="")
+
+    return _create_stub_target
+
 @pytest.fixture
 def azure_connection() -> Connection:
     return azure_helper.create_connection_from_env()
@@ -29,3 +115,26 @@ def owasp_dt_client() -> AuthenticatedClient:
 @pytest.fixture
 def findings(owasp_dt_client: AuthenticatedClient):
     return owasp_dt_helper.load_and_filter_findings(owasp_dt_client, load_suppressed=True, load_inactive=True)
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", help="Run the benchmarks and compare them with the stored baselines", action="store_true", default=False)
+    parser.addoption("--benchmark-update", help="Run the benchmarks and store their results as baselines", action="store_true", default=False)
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: benchmark compared with the stored baselines (run with --benchmark)")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark") or config.getoption("--benchmark-update"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="Benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+def pytest_terminal_summary(terminalreporter):
+    # Absolute timings depend on the machine, they are reported for comparing runs on the same machine
+    timings = [(report.nodeid, dict(report.user_properties)["time_us"]) for reports in terminalreporter.stats.values() for report in reports if getattr(report, "when", None) == "call" and "time_us" in dict(report.user_properties)]
+    if len(timings) > 0:
+        terminalreporter.section("benchmark timings")
+        for nodeid, time_us in sorted(timings):
+            terminalreporter.write_line(f"{nodeid}: {time_us}us per call")
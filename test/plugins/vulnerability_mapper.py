@@ -2,6 +2,11 @@
 from owasp_dt_sync import models
 from test.plugins import filter
 
+work_item_fields = [
+    "Custom.FinalSolution2",
+    "Custom.NoSolutionavailableornecessary",
+]
+
 def process_finding(finding):
     return filter.process_finding(finding)
 
@@ -37,3 +37,9 @@ def test_create_and_destroy_work_item(
 
     work_item_tracking_client.delete_work_item(id=work_item.id, project=azure_project)
     #work_item_tracking_client.destroy_work_item(id=work_item.id, project=azure_project)  # does not work
+
+def test_find_existing_work_item_ids(work_item_tracking_client_stub):
+    client = work_item_tracking_client_stub([WorkItem(id=2), WorkItem(id=4)])
+    existing_ids = azure_helper.find_existing_work_item_ids(client, "project", range(1, 6), batch_size=2)
+    assert existing_ids == {2, 4}
+    assert client.batch_calls == [[1, 2], [3, 4], [5]]
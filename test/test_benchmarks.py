@@ -0,0 +1,169 @@
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from azure.devops.released.work_item_tracking import WorkItem
+from owasp_dt.models import Analysis, AnalysisComment
+
+from owasp_dt_sync import models, owasp_dt_helper, sync, azure_helper, log
+
+pytestmark = pytest.mark.benchmark
+
+BASELINES_PATH = Path(__file__).parent / "benchmarks.json"
+# Allowed regressions against the baselines, timings are compared relative to a calibration loop to be machine-independent
+MEMORY_THRESHOLD = float(os.getenv("BENCHMARK_MEMORY_THRESHOLD", "1.2"))
+TIME_THRESHOLD = float(os.getenv("BENCHMARK_TIME_THRESHOLD", "3"))
+SIZE = 2000
+
+
+@pytest.fixture
+def create_finding(finding_factory):
+    def _create_finding(index: int):
+        return finding_factory(
+            project=f"project-{index % 50}",
+            component=f"component-{index}",
+            vulnerability=f"vulnerability-{index}",
+            vuln_id=f"CVE-2025-{index}",
+            description="Vulnerability " * 20,
+        )
+
+    return _create_finding
+
+
+@pytest.fixture
+def create_work_item_adapter(create_finding):
+    def _create_work_item_adapter(index: int):
+        changed_date = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=index)
+        work_item = WorkItem(id=index, fields={
+            "System.Title": f"Vulnerability CVE-2025-{index}",
+            "System.State": "Active",
+            "System.AreaPath": "Project\\Security",
+            "System.ChangedDate": changed_date.isoformat(),
+            "System.Tags": f"owasp-dt; owasp-dt:finding:project/component-{index}/vulnerability-{index}",
+        })
+        return models.WorkItemAdapter(work_item, create_finding(index))
+
+    return _create_work_item_adapter
+
+
+def create_analysis(index: int, comments: int = 20):
+    timestamp = int(datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    return Analysis(analysis_comments=[AnalysisComment(timestamp=timestamp + (index * 7919 + offset * 104729) % 1000000, comment=f"Comment {offset}") for offset in range(comments)])
+
+
+@pytest.fixture(scope="module")
+def baselines(request):
+    baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    yield baselines
+    if request.config.getoption("--benchmark-update"):
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture(scope="module")
+def calibration_us():
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for index in range(SIZE):
+            values = {f"key-{offset}": offset * index for offset in range(20)}
+            sorted(values.items(), key=lambda item: item[1], reverse=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings) / SIZE * 1e6
+
+
+@pytest.fixture
+def benchmark(request, baselines, calibration_us):
+    def _benchmark(setup: Callable[[int], any], run: Callable[[any], any], size: int = SIZE, repeat: int = 5):
+        name = request.node.name.removeprefix("test_")
+        timings = []
+        for _ in range(repeat):
+            inputs = [setup(index) for index in range(size)]
+            start = time.perf_counter()
+            for item in inputs:
+                run(item)
+            timings.append(time.perf_counter() - start)
+        time_us = min(timings) / size * 1e6
+        relative_time = time_us / calibration_us
+
+        inputs = [setup(index) for index in range(size)]
+        tracemalloc.start()
+        try:
+            current, _ = tracemalloc.get_traced_memory()
+            results = [run(item) for item in inputs]
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del results
+        peak_kb = (peak - current) / 1024
+
+        request.node.user_properties.append(("time_us", round(time_us, 2)))
+        result = {"peak_kb": round(peak_kb, 1), "relative_time": round(relative_time, 3)}
+        if request.config.getoption("--benchmark-update"):
+            baselines[name] = result
+            return
+
+        baseline = baselines.get(name)
+        assert baseline, f"No baseline for benchmark '{name}' (run with --benchmark-update)"
+        assert peak_kb <= baseline["peak_kb"] * MEMORY_THRESHOLD + 16, f"Benchmark '{name}' regressed: {result['peak_kb']}KB peak memory (baseline {baseline['peak_kb']}KB)"
+        assert relative_time <= baseline["relative_time"] * TIME_THRESHOLD, f"Benchmark '{name}' regressed: {result['relative_time']} times the calibration loop (baseline {baseline['relative_time']})"
+
+    return _benchmark
+
+
+def test_work_item_adapter_properties(benchmark, create_work_item_adapter):
+    def _run(work_item_adapter: models.WorkItemAdapter):
+        return work_item_adapter.title, work_item_adapter.state, work_item_adapter.area, work_item_adapter.tags, work_item_adapter.changed_date
+
+    benchmark(create_work_item_adapter, _run)
+
+
+def test_analysis_adapter_enums(benchmark, create_finding):
+    def _setup(index: int):
+        return models.AnalysisAdapter(Analysis(), create_finding(index))
+
+    def _run(analysis_adapter: models.AnalysisAdapter):
+        analysis_adapter.state = "IN_TRIAGE"
+        analysis_adapter.justification = "CODE_NOT_REACHABLE"
+        analysis_adapter.response = "WILL_NOT_FIX"
+        return analysis_adapter.state, analysis_adapter.justification, analysis_adapter.response
+
+    benchmark(_setup, _run)
+
+
+def test_read_comments_desc(benchmark):
+    benchmark(create_analysis, lambda analysis: owasp_dt_helper.read_comments_desc(analysis).collect())
+
+
+def test_find_newer(benchmark, create_work_item_adapter):
+    def _setup(index: int):
+        return create_work_item_adapter(index), create_analysis(index)
+
+    benchmark(_setup, lambda item: sync.find_newer(*item))
+
+
+def test_pretty_changes(benchmark, create_work_item_adapter):
+    def _setup(index: int):
+        work_item_adapter = create_work_item_adapter(index)
+        work_item_adapter.state = "Closed"
+        work_item_adapter.description = "Description " * 50
+        work_item_adapter.add_tag("owasp-dt:vulnerability:CVE-2025-1")
+        return work_item_adapter.get_changes()
+
+    benchmark(_setup, azure_helper.pretty_changes)
+
+
+def test_logger_process(benchmark, create_finding):
+    def _setup(index: int):
+        finding = create_finding(index)
+        return log.get_logger(project=models.format_project(finding), vulnerability=finding.vulnerability.vuln_id)
+
+    benchmark(_setup, lambda logger: logger.process("Updated WorkItem", {}))
+
+
+def test_render_description(benchmark, create_work_item_adapter):
+    benchmark(create_work_item_adapter, lambda work_item_adapter: work_item_adapter.render_description(), size=500)
@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from azure.devops.released.work_item_tracking import WorkItem, JsonPatchOperation
+
+from owasp_dt_sync import log
+from owasp_dt_sync.cache import WorkItemCache
+
+
+def test_coalesce_concurrent_reads(work_item_tracking_client_stub):
+    client = work_item_tracking_client_stub([WorkItem(id=1, fields={"System.State": "New", "Custom.Lazy": "lazy"})])
+    get_started = threading.Event()
+    release = threading.Event()
+    get_work_item = client.get_work_item
+
+    def _blocking_get_work_item(*args, **kwargs):
+        get_started.set()
+        release.wait(5)
+        return get_work_item(*args, **kwargs)
+
+    client.get_work_item = _blocking_get_work_item
+    cache = WorkItemCache(client, "project", fields=["System.State"])
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(cache.get, 1) for _ in range(4)]
+        get_started.wait(5)
+        release.set()
+        work_items = [future.result() for future in futures]
+
+    assert len(client.get_calls) == 1
+    assert all(work_item is work_items[0] for work_item in work_items)
+
+    assert cache.load_fields(1, ["Custom.Lazy"]) == {"Custom.Lazy": "lazy"}
+    assert cache.load_fields(1, ["Custom.Lazy"]) == {"Custom.Lazy": "lazy"}
+    assert client.get_calls[1:] == [(1, ["Custom.Lazy"])]
+
+
+def test_failed_reads_are_retried(work_item_tracking_client_stub):
+    client = work_item_tracking_client_stub()
+    cache = WorkItemCache(client, "project", fields=["System.State"])
+    with pytest.raises(KeyError):
+        cache.get(1)
+
+    client.work_items[1] = WorkItem(id=1, fields={"System.State": "New"})
+    assert cache.get(1).fields == {"System.State": "New"}
+    assert len(client.get_calls) == 2
+
+
+def test_merge_changes_into_one_update(work_item_tracking_client_stub):
+    client = work_item_tracking_client_stub()
+    cache = WorkItemCache(client, "project")
+
+    cache.add_changes(log.logger, 1, [JsonPatchOperation(op="add", path="/fields/System.State", value="Active")])
+    cache.add_changes(log.logger, 1, [
+        JsonPatchOperation(op="add", path="/fields/System.State", value="Closed"),
+        JsonPatchOperation(op="add", path="/fields/System.Title", value="Title"),
+    ])
+    cache.add_changes(log.logger, 2, [JsonPatchOperation(op="add", path="/fields/System.State", value="New")])
+    assert cache.pending_count == 2
+
+    cache.flush(apply_changes=True)
+    assert cache.pending_count == 0
+    assert len(client.update_calls) == 2
+    work_item_id, changes = client.update_calls[0]
+    assert work_item_id == 1
+    assert [(change.path, change.value) for change in changes] == [("/fields/System.State", "Closed"), ("/fields/System.Title", "Title")]
@@ -0,0 +1,94 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from owasp_dt_sync import deadlines, stats
+
+
+def test_get_endpoint_class():
+    assert deadlines.get_endpoint_class("http://localhost/api/v1/finding?showInactive=false") == "findings"
+    assert deadlines.get_endpoint_class("http://localhost/api/v1/analysis?project=1") == "analysis"
+    assert deadlines.get_endpoint_class("https://dev.azure.com/org/project/_apis/wit/wiql") == "queries"
+    assert deadlines.get_endpoint_class("https://dev.azure.com/org/project/_apis/wit/workitems/1") == "work_items"
+    assert deadlines.get_endpoint_class("https://dev.azure.com/org/_apis/ResourceAreas") == "default"
+
+
+def test_parse_timeout():
+    assert deadlines.parse_timeout("30") == (30, 30)
+    assert deadlines.parse_timeout("5,60") == (5, 60)
+    with pytest.raises(ValueError):
+        deadlines.parse_timeout("0")
+
+
+def test_timeouts_defined_in_env(monkeypatch):
+    for endpoint_class in deadlines.DEFAULT_TIMEOUTS:
+        monkeypatch.delenv(f"HTTP_TIMEOUT_{endpoint_class.upper()}", raising=False)
+    assert not deadlines.timeouts_defined_in_env()
+
+    monkeypatch.setenv("HTTP_TIMEOUT_QUERIES", "10,120")
+    assert deadlines.timeouts_defined_in_env()
+    assert deadlines.load_timeouts_from_env()["queries"] == (10, 120)
+
+
+def test_deadline_limits_timeout():
+    policy = deadlines.RequestPolicy({"default": (10, 60)})
+    assert policy.get_timeout("default") == (10, 60)
+
+    with deadlines.deadline(5):
+        connect_timeout, read_timeout = policy.get_timeout("default")
+        assert connect_timeout <= 5 and read_timeout <= 5
+
+        # The deadline is propagated to executor threads
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(deadlines.bind_context(deadlines.get_remaining)).result() <= 5
+
+    with deadlines.deadline(0):
+        with pytest.raises(deadlines.DeadlineExceeded):
+            policy.get_timeout("default")
+
+    assert deadlines.get_remaining() is None
+
+
+def test_timeout_is_recorded():
+    stats.reset()
+    policy = deadlines.RequestPolicy()
+
+    def _send(timeout):
+        raise TimeoutError("timed out")
+
+    with pytest.raises(deadlines.RequestTimeout):
+        policy.execute("https://dev.azure.com/org/project/_apis/wit/workitems/1", True, _send, (TimeoutError,))
+    assert stats.get("timeouts.work_items") == 1
+
+
+def test_hedged_read():
+    stats.reset()
+    policy = deadlines.RequestPolicy(hedge_percentile=50)
+    url = "http://localhost/api/v1/analysis"
+    for _ in range(20):
+        policy.execute(url, True, lambda timeout: "fast", (TimeoutError,))
+
+    calls = []
+    lock = threading.Lock()
+
+    def _send(timeout):
+        with lock:
+            calls.append(timeout)
+            first = len(calls) == 1
+        if first:
+            time.sleep(1)
+            return "slow"
+        return "hedged"
+
+    assert policy.execute(url, True, _send, (TimeoutError,)) == "hedged"
+    assert len(calls) == 2
+    assert stats.get("hedges.analysis") == 1
+    assert stats.get("hedges_won.analysis") == 1
+
+    # Writes are never hedged
+    calls.clear()
+    assert policy.execute(url, False, _send, (TimeoutError,)) == "slow"
+    assert len(calls) == 1
+    policy.shutdown()
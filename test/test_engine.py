@@ -0,0 +1,181 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from azure.devops.released.work_item_tracking import WorkItem, JsonPatchOperation
+
+from owasp_dt_sync import engine, globals, jinja, mappers, stats, sync
+from owasp_dt_sync.args import create_parser
+
+MAPPER = """
+work_item_fields = ["Custom.Score"]
+
+def process_finding(finding):
+    return False
+"""
+
+
+def test_settings_are_context_local(tmp_path):
+    template_path = tmp_path / "custom.jinja2"
+    template_path.write_text("custom")
+    results = {}
+
+    def _run(name: str, settings: globals.Settings):
+        with globals.use_settings(settings):
+            results[name] = (globals.apply_changes, jinja.get_template().filename)
+
+    threads = [
+        threading.Thread(target=_run, args=("dry", globals.Settings())),
+        threading.Thread(target=_run, args=("apply", globals.Settings(apply_changes=True, template_path=template_path))),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results["dry"] == (False, str(globals.DEFAULT_TEMPLATE_PATH))
+    assert results["apply"] == (True, str(template_path))
+    assert globals.apply_changes is False
+
+
+def test_engine_owns_its_mapper(tmp_path, stub_target_factory):
+    client = SimpleNamespace()
+    mapper_path = tmp_path / "mapper.py"
+    mapper_path.write_text(MAPPER)
+    target = stub_target_factory(client)
+
+    with engine.SyncEngine([target], engine.SyncOptions(mapper_path=mapper_path), owasp_dt_client=object()) as sync_engine:
+        assert sync_engine.settings.mapper.work_item_fields == ["Custom.Score"]
+        assert mappers.default_mapper.work_item_fields == []
+        assert "Custom.Score" in sync_engine.contexts[0].work_item_cache.fields
+
+        mapper = globals.mapper
+        with sync_engine.activate():
+            assert globals.mapper is sync_engine.settings.mapper
+            stats.increment("findings_synced")
+        assert globals.mapper is mapper
+
+        sync_engine.sync_findings([])
+        assert sync_engine.stats.summary() == {}
+
+
+def test_load_custom_mapper_into_copy(tmp_path, monkeypatch):
+    mapper_path = tmp_path / "mapper.py"
+    mapper_path.write_text(MAPPER)
+    monkeypatch.setattr(globals, "mapper", globals.mapper)
+
+    mappers.load_custom_mapper_module(mapper_path)
+    mapper = mappers.load_custom_mapper_module(mapper_path)
+    assert globals.mapper is mapper
+    assert mapper.work_item_fields == ["Custom.Score"]
+    assert mappers.default_mapper.work_item_fields == []
+    assert mappers.default_mapper.process_finding is not mapper.process_finding
+
+
+def test_rejected_findings_are_not_orphaned(tmp_path, monkeypatch, finding_factory, work_item_tracking_client_stub, stub_target_factory):
+    finding = finding_factory()
+    client = work_item_tracking_client_stub([WorkItem(id=1, fields={"System.Tags": f"owasp-dt; {sync.get_finding_reference_tag(finding)}"})])
+    synced_groups = []
+    monkeypatch.setattr(sync, "sync_target_finding_group", lambda logger, owasp_dt_client, context, finding_group, aggregation: synced_groups.append(finding_group))
+    mapper_path = tmp_path / "mapper.py"
+    mapper_path.write_text(MAPPER)
+    target = stub_target_factory(client)
+    options = engine.SyncOptions(mapper_path=mapper_path, reference_index=True, load_suppressed=True, load_inactive=True)
+
+    with engine.SyncEngine([target], options, owasp_dt_client=object()) as sync_engine:
+        sync_engine.sync_findings([finding], complete=True)
+        assert synced_groups == []
+        assert sync_engine.contexts[0].reference_index.get_orphans("finding") == {}
+
+
+def test_default_target_uses_workers(monkeypatch):
+    monkeypatch.setenv("AZURE_ORG_URL", "https://dev.azure.com/org")
+    monkeypatch.setenv("AZURE_PROJECT", "project")
+    monkeypatch.setenv("AZURE_API_KEY", "key")
+    created_targets = []
+
+    class _SyncEngine:
+        def __init__(self, sync_targets, options):
+            created_targets.extend(sync_targets)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            pass
+
+        def sync_all(self):
+            pass
+
+    monkeypatch.setattr(engine, "SyncEngine", _SyncEngine)
+    args = create_parser().parse_args(["--workers", "2", "--mapper-processes", "8"])
+    args.func(args)
+    assert [target.workers for target in created_targets] == [2]
+
+
+def test_reconcile_rejected_findings(tmp_path, monkeypatch, finding_factory, work_item_tracking_client_stub, stub_target_factory):
+    finding = finding_factory()
+    client = work_item_tracking_client_stub([WorkItem(id=1, fields={"System.Tags": f"owasp-dt; {sync.get_finding_reference_tag(finding)}", "System.State": "Active"})])
+    mapper_path = tmp_path / "mapper.py"
+    mapper_path.write_text(MAPPER)
+    target = stub_target_factory(client)
+
+    with pytest.raises(AssertionError, match="--load-suppressed"):
+        engine.SyncEngine([target], engine.SyncOptions(reconcile="close"), owasp_dt_client=object())
+
+    options = engine.SyncOptions(apply_changes=True, mapper_path=mapper_path, reconcile="close", load_suppressed=True, load_inactive=True)
+    with engine.SyncEngine([target], options, owasp_dt_client=object()) as sync_engine:
+        sync_engine.sync_findings([finding], complete=True)
+    # The WorkItem of the rejected Finding is not stale
+    assert client.update_calls == []
+
+
+def test_findings_files_are_incomplete(tmp_path, monkeypatch):
+    monkeypatch.setenv("AZURE_ORG_URL", "https://dev.azure.com/org")
+    monkeypatch.setenv("AZURE_PROJECT", "project")
+    monkeypatch.setenv("AZURE_API_KEY", "key")
+    path = tmp_path / "findings.json"
+    path.write_text("[]")
+    synced = []
+
+    class _SyncEngine:
+        finding_filter = engine.FindingFilter()
+
+        def __init__(self, sync_targets, options):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            pass
+
+        def sync_findings(self, findings, complete: bool = False):
+            synced.append(complete)
+
+    monkeypatch.setattr(engine, "SyncEngine", _SyncEngine)
+    args = create_parser().parse_args(["--findings-from", str(path)])
+    args.func(args)
+    # Findings files may not contain the whole portfolio
+    assert synced == [False]
+
+    args = create_parser().parse_args(["--findings-from", str(path), "--reconcile", "close", "--load-suppressed", "--load-inactive"])
+    with pytest.raises(AssertionError, match="whole portfolio"):
+        args.func(args)
+
+
+def test_work_item_changes_are_written_per_group(monkeypatch, finding_factory, work_item_tracking_client_stub, stub_target_factory):
+    client = work_item_tracking_client_stub([WorkItem(id=1, fields={"System.State": "Active"})])
+    pending_counts = []
+
+    def _sync_target_finding_group(logger, owasp_dt_client, context, finding_group, aggregation):
+        pending_counts.append(context.work_item_cache.pending_count)
+        context.work_item_cache.add_changes(logger, 1, [JsonPatchOperation(op="add", path="/fields/System.Title", value=finding_group[0][0].vulnerability.vuln_id)])
+
+    monkeypatch.setattr(sync, "sync_target_finding_group", _sync_target_finding_group)
+    target = stub_target_factory(client)
+
+    with engine.SyncEngine([target], engine.SyncOptions(apply_changes=True), owasp_dt_client=object()) as sync_engine:
+        sync_engine.sync_findings([finding_factory(vuln_id="CVE-1"), finding_factory(vuln_id="CVE-2")])
+    assert pending_counts == [0, 0]
+    assert [document[0].value for _, document in client.update_calls] == ["CVE-1", "CVE-2"]
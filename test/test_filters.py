@@ -0,0 +1,72 @@
+import dataclasses
+import functools
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from owasp_dt.api.finding import get_all_findings_1
+from owasp_dt.models import Finding, FindingAnalysis, FindingAnalysisState, FindingComponent, FindingVulnerability
+
+from owasp_dt_sync import owasp_dt_helper, globals, mappers
+from owasp_dt_sync.filters import FindingFilter
+
+MAPPER = """
+finding_filter = {"severities": ["CRITICAL", "HIGH"], "epss_min_score": 0.1}
+"""
+
+
+@pytest.fixture
+def create_finding(finding_factory):
+    return functools.partial(finding_factory, analysis_state=FindingAnalysisState.IN_TRIAGE, epss_score=0.5, attributed_on=date(2025, 6, 1))
+
+
+def test_matches(create_finding):
+    finding_filter = FindingFilter(severities=["critical,high"], analysis_states=["IN_TRIAGE"], attributed_from="2025-01-01", attributed_to=date(2025, 6, 1), epss_min_score=0.1, cvss_min_score=7)
+
+    assert finding_filter.matches(create_finding())
+    assert not finding_filter.matches(create_finding(severity="LOW"))
+    assert not finding_filter.matches(create_finding(analysis_state=FindingAnalysisState.NOT_AFFECTED))
+    assert not finding_filter.matches(create_finding(epss_score=0.01))
+    assert not finding_filter.matches(create_finding(attributed_on=date(2025, 6, 2)))
+    assert FindingFilter(analysis_states=["NOT_SET"]).matches(Finding(analysis=FindingAnalysis(), component=FindingComponent(), vulnerability=FindingVulnerability()))
+
+    with pytest.raises(ValueError):
+        FindingFilter(severities=["URGENT"])
+
+
+def test_merge():
+    merged = FindingFilter(severities=["CRITICAL", "HIGH"], cvss_min_score=5).merge(FindingFilter(severities=["HIGH", "LOW"], cvss_min_score=7, attributed_to="2025-01-01"))
+    assert merged.severities == ["HIGH"]
+    assert merged.cvss_min_score == 7
+    assert merged.attributed_to == date(2025, 1, 1)
+
+    with pytest.raises(ValueError):
+        FindingFilter(severities=["CRITICAL"]).merge(FindingFilter(severities=["LOW"]))
+
+
+def test_load_and_filter_findings(monkeypatch, create_finding):
+    requests = []
+
+    def _sync_detailed(**kwargs):
+        requests.append(kwargs)
+        return SimpleNamespace(status_code=200, parsed=[create_finding(), create_finding(epss_score=0.01)])
+
+    monkeypatch.setattr(get_all_findings_1, "sync_detailed", _sync_detailed)
+    monkeypatch.setattr(globals, "mapper", dataclasses.replace(mappers.default_mapper, process_finding=lambda finding: True))
+
+    findings = list(owasp_dt_helper.load_and_filter_findings(client=None, finding_filter=FindingFilter(severities=["HIGH", "CRITICAL"], analysis_states=["NOT_SET", "IN_TRIAGE"], epss_min_score=0.1)))
+    assert len(findings) == 1
+    assert requests[0] == {"client": None, "show_inactive": False, "show_suppressed": False, "severity": "HIGH,CRITICAL", "analysis_status": "NOT_SET,IN_TRIAGE"}
+
+    assert len(list(owasp_dt_helper.load_and_filter_findings(client=None))) == 2
+    assert "cvssv_2_from" not in requests[1]
+
+
+def test_mapper_finding_filter(tmp_path):
+    mapper_path = tmp_path / "mapper.py"
+    mapper_path.write_text(MAPPER)
+    mapper = dataclasses.replace(mappers.default_mapper)
+    mappers.load_custom_mapper_module(mapper_path, mapper)
+
+    assert mapper.finding_filter == FindingFilter(severities=["CRITICAL", "HIGH"], epss_min_score=0.1)
+    assert mappers.default_mapper.finding_filter is None
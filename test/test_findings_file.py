@@ -0,0 +1,89 @@
+import dataclasses
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from owasp_dt_sync import findings_file, globals, mappers
+
+
+def create_finding_dict(vuln_id: str, cvss: float, suppressed: bool = False):
+    return {
+        "component": {"uuid": f"component-{vuln_id}", "name": "urllib3", "version": "2.4.0"},
+        "vulnerability": {"uuid": f"vulnerability-{vuln_id}", "vulnId": vuln_id, "cvssV3BaseScore": cvss},
+        "analysis": {"isSuppressed": suppressed},
+    }
+
+
+def test_read_fpf_gzip(tmp_path: Path):
+    fpf = {
+        "version": "1.2",
+        "meta": {"application": "Dependency-Track"},
+        "project": {"uuid": "project-uuid", "name": "test-project", "version": "latest"},
+        "findings": [create_finding_dict(f"CVE-{i}", 5.0) for i in range(10)],
+    }
+    path = tmp_path / "findings.fpf.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        json.dump(fpf, file, indent=2)
+
+    findings = list(findings_file.read_findings(path))
+    assert len(findings) == 10
+    assert findings[3].vulnerability.vuln_id == "CVE-3"
+    assert findings[3].component.project == "project-uuid"
+    assert findings[3].component.project_name == "test-project"
+    assert findings[3].component.project_version == "latest"
+
+
+def test_read_fpf_with_trailing_project(tmp_path: Path):
+    path = tmp_path / "findings.fpf"
+    path.write_text(json.dumps({
+        "findings": [create_finding_dict(f"CVE-{i}", 5.0) for i in range(3)],
+        "project": {"uuid": "project-uuid", "name": "test-project", "version": "latest"},
+    }))
+
+    findings = list(findings_file.read_findings(path))
+    assert [finding.component.project_name for finding in findings] == ["test-project"] * 3
+
+    path.write_text(json.dumps({"findings": [create_finding_dict("CVE-1", 5.0)]}))
+    with pytest.raises(ValueError, match="missing project"):
+        list(findings_file.read_findings(path))
+
+
+def test_invalid_json_is_not_buffered(tmp_path: Path):
+    path = tmp_path / "findings.json"
+    path.write_text("[" + json.dumps(create_finding_dict("CVE-1", 5.0)) + ", {\"broken\": " + "1" * 1000)
+
+    with findings_file.open_text(path) as file:
+        reader = findings_file.JsonStreamReader(file, chunk_size=64, max_value_size=256)
+        values = reader.read_array()
+        assert next(values)["vulnerability"]["vulnId"] == "CVE-1"
+        with pytest.raises(ValueError, match="no value within 256 characters"):
+            next(values)
+
+
+def test_stream_json_array_in_small_chunks(tmp_path: Path):
+    path = tmp_path / "findings.json"
+    path.write_text(json.dumps([create_finding_dict(f"CVE-{i}", i) for i in range(20)]))
+
+    with findings_file.open_text(path) as file:
+        reader = findings_file.JsonStreamReader(file, chunk_size=7)
+        vuln_ids = [finding_dict["vulnerability"]["vulnId"] for finding_dict in reader.read_array()]
+
+    assert vuln_ids == [f"CVE-{i}" for i in range(20)]
+
+
+def test_load_and_filter_findings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(globals, "mapper", dataclasses.replace(mappers.default_mapper, process_finding=lambda finding: True))
+    path = tmp_path / "findings.json"
+    path.write_text(json.dumps([
+        create_finding_dict("CVE-1", 9.8),
+        create_finding_dict("CVE-2", 3.1),
+        create_finding_dict("CVE-3", 9.1, suppressed=True),
+    ]))
+
+    findings = findings_file.load_and_filter_findings([path], cvss_min_score=5)
+    assert [finding.vulnerability.vuln_id for finding in findings] == ["CVE-1"]
+
+    findings = findings_file.load_and_filter_findings([path], cvss_min_score=5, load_suppressed=True)
+    assert [finding.vulnerability.vuln_id for finding in findings] == ["CVE-1", "CVE-3"]
@@ -0,0 +1,88 @@
+import httpx
+import pytest
+import requests
+from requests.adapters import HTTPAdapter, BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from owasp_dt_sync import http_cache
+
+
+def test_is_read_request():
+    assert http_cache.is_read_request("GET", "https://dev.azure.com/org/project/_apis/wit/workitems/1")
+    assert http_cache.is_read_request("POST", "https://dev.azure.com/org/project/_apis/wit/wiql?$top=100")
+    assert http_cache.is_read_request("OPTIONS", "https://dev.azure.com/org/_apis/wit")
+    assert not http_cache.is_read_request("PATCH", "https://dev.azure.com/org/project/_apis/wit/workitems/1")
+    assert not http_cache.is_read_request("PUT", "http://localhost:8081/api/v1/analysis")
+
+
+def test_response_store_ttl(tmp_path):
+    store = http_cache.ResponseStore(tmp_path, ttl=60)
+    store.put("key", 200, {"Content-Type": "application/json"}, b"[]")
+    assert store.get("key") == (200, {"Content-Type": "application/json"}, b"[]")
+    assert store.get("missing") is None
+    store.close()
+
+    expired_store = http_cache.ResponseStore(tmp_path, ttl=-1)
+    assert expired_store.get("key") is None
+    assert (expired_store.hits, expired_store.misses) == (0, 1)
+    expired_store.close()
+
+
+def test_caching_transport(tmp_path):
+    requests_sent = []
+
+    def _handle(request: httpx.Request):
+        requests_sent.append(request)
+        return httpx.Response(200, json={"uuid": "1"})
+
+    store = http_cache.ResponseStore(tmp_path)
+    client = httpx.Client(transport=http_cache.CachingTransport(httpx.MockTransport(_handle), store))
+
+    assert client.get("http://localhost/api/v1/analysis?project=1").json() == {"uuid": "1"}
+    assert client.get("http://localhost/api/v1/analysis?project=1").json() == {"uuid": "1"}
+    assert len(requests_sent) == 1
+    assert (store.hits, store.misses) == (1, 1)
+
+    with pytest.raises(http_cache.ReadOnlyError):
+        client.put("http://localhost/api/v1/analysis", json={})
+    assert len(requests_sent) == 1
+    store.close()
+
+
+def test_caching_adapter_replay(tmp_path):
+    store = http_cache.ResponseStore(tmp_path)
+    url = "https://dev.azure.com/org/project/_apis/wit/workitems/1"
+    store.put(http_cache.create_request_key("GET", url, None), 200, {"Content-Type": "application/json; charset=utf-8"}, b'{"id": 1}')
+
+    session = requests.Session()
+    session.mount("https://", http_cache.CachingAdapter(HTTPAdapter(), store))
+    assert session.get(url).json() == {"id": 1}
+
+    with pytest.raises(http_cache.ReadOnlyError):
+        session.patch(url, json=[])
+    store.close()
+
+
+def test_caching_adapter_records_options(tmp_path):
+    store = http_cache.ResponseStore(tmp_path)
+    requests_sent = []
+
+    class _Adapter(BaseAdapter):
+        def send(self, request, **kwargs):
+            requests_sent.append(request)
+            response = requests.Response()
+            response.status_code = 200
+            response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+            response._content = b'{"count": 0, "value": []}'
+            return response
+
+        def close(self):
+            pass
+
+    session = requests.Session()
+    session.mount("https://", http_cache.CachingAdapter(_Adapter(), store))
+    url = "https://dev.azure.com/org/_apis/wit"
+    assert session.options(url).json() == {"count": 0, "value": []}
+    assert session.options(url).json() == {"count": 0, "value": []}
+    assert len(requests_sent) == 1
+    store.close()
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+from owasp_dt_sync import engine, sync
+from owasp_dt_sync.journal import Journal
+
+
+def test_resume_journal(tmp_path: Path):
+    journal_path = tmp_path / "sync.journal"
+    journal = Journal(journal_path, checkpoint_size=2)
+    journal.mark_processed("a")
+    journal.begin_create("b", "owasp-dt:finding:b")
+    journal.begin_create("c", "owasp-dt:finding:c")
+    journal.mark_created("c", 1, "http://test/workItems/1")
+    journal.begin_create("d", "owasp-dt:finding:d")
+    journal.mark_created("d", 2, "http://test/workItems/2")
+    journal.mark_linked("d")
+    journal.mark_processed("d")
+    journal.close()
+
+    journal = Journal(journal_path, resume=True)
+    assert journal.is_processed("a")
+    assert journal.is_processed("d")
+    assert not journal.is_processed("b")
+    assert journal.get_pending_create("b")["tag"] == "owasp-dt:finding:b"
+    assert journal.get_pending_create("c")["url"] == "http://test/workItems/1"
+    assert journal.get_pending_create("d") is None
+    assert journal.pending_create_count == 2
+    journal.close()
+
+
+def test_resume_journal_ignores_incomplete_record(tmp_path: Path):
+    journal_path = tmp_path / "sync.journal"
+    journal_path.write_text('{"event": "processed", "key": "a"}\n{"event": "proc')
+
+    journal = Journal(journal_path, resume=True)
+    assert journal.processed_count == 1
+    journal.mark_processed("b")
+    journal.close()
+
+    journal = Journal(journal_path, resume=True)
+    assert journal.is_processed("b")
+    journal.close()
+
+
+def test_refuse_to_overwrite_journal(tmp_path: Path):
+    journal_path = tmp_path / "sync.journal"
+    journal_path.write_text('{"event": "processed", "key": "a"}\n')
+
+    with pytest.raises(AssertionError, match="Journal already exists"):
+        Journal(journal_path)
+    assert journal_path.read_text() == '{"event": "processed", "key": "a"}\n'
+
+
+@pytest.mark.parametrize("apply_changes", [False, True])
+def test_processed_only_when_applied(tmp_path: Path, monkeypatch, apply_changes: bool, finding_factory, work_item_tracking_client_stub, stub_target_factory):
+    client = work_item_tracking_client_stub()
+    monkeypatch.setattr(sync, "sync_target_finding_group", lambda logger, owasp_dt_client, context, finding_group, aggregation: None)
+    target = stub_target_factory(client)
+    journal_path = tmp_path / "sync.journal"
+
+    with engine.SyncEngine([target], engine.SyncOptions(apply_changes=apply_changes, journal_path=journal_path), owasp_dt_client=object()) as sync_engine:
+        sync_engine.sync_findings([finding_factory()])
+
+    journal = Journal(journal_path, resume=True)
+    # Dry-runs must not skip the Findings of a later applying run
+    assert journal.processed_count == (1 if apply_changes else 0)
+    journal.close()
@@ -0,0 +1,102 @@
+import dataclasses
+
+import pytest
+
+from azure.devops.released.work_item_tracking import WorkItem
+from owasp_dt.models import Analysis
+
+from owasp_dt_sync import mapper_pool, models, mappers, globals
+
+MAPPER = """
+def process_finding(finding):
+    return finding.component.project_name == "selected"
+
+def new_work_item(work_item_adapter):
+    work_item_adapter.title = f"Vulnerability {work_item_adapter.finding.vulnerability.vuln_id}"
+    work_item_adapter.work_item_type = "Bug"
+
+def map_work_item_to_analysis(work_item_adapter, analysis_adapter):
+    analysis_adapter.state = "IN_TRIAGE"
+    analysis_adapter.details = work_item_adapter.title
+
+def map_analysis_to_work_item(analysis_adapter, work_item_adapter):
+    work_item_adapter.set_field("Custom.Result", work_item_adapter.get_field("Custom.Score") * 2)
+"""
+
+
+def test_snapshot_and_merge(monkeypatch, finding_factory):
+    def _map_analysis_to_work_item(analysis_adapter, work_item_adapter):
+        work_item_adapter.state = "Active"
+        work_item_adapter.set_field("Custom.Score", 7.5)
+
+    monkeypatch.setattr(globals, "mapper", dataclasses.replace(mappers.default_mapper, map_analysis_to_work_item=_map_analysis_to_work_item))
+    finding = finding_factory(project_name="selected")
+    work_item_adapter = models.WorkItemAdapter(WorkItem(id=1, fields={"System.State": "New"}), finding)
+    analysis_adapter = models.AnalysisAdapter(Analysis(), finding)
+
+    work_item_snapshot = mapper_pool.WorkItemSnapshot.from_adapter(work_item_adapter)
+    analysis_snapshot = mapper_pool.AnalysisSnapshot.from_adapter(analysis_adapter)
+    result = mapper_pool._call_hook("map_analysis_to_work_item", work_item_snapshot, analysis_snapshot)
+    assert result.work_item_changes == {"System.State": "Active", "Custom.Score": 7.5}
+
+    mapper_pool.merge_result(result, work_item_adapter, analysis_adapter)
+    assert work_item_adapter.state == "Active"
+    assert {change.path for change in work_item_adapter.get_changes()} == {"/fields/System.State", "/fields/Custom.Score"}
+
+
+def test_mapper_pool(tmp_path, finding_factory):
+    mapper_path = tmp_path / "mapper.py"
+    mapper_path.write_text(MAPPER)
+    pool = mapper_pool.MapperPool(mapper_path, 2, globals.template_path)
+    try:
+        findings = [finding_factory(project_name="selected"), finding_factory(project_name="other"), finding_factory(project_name="selected", vuln_id="CVE-2")]
+        filtered = list(pool.filter_findings(findings, chunk_size=1))
+        assert [finding.vulnerability.vuln_id for finding in filtered] == ["CVE-1", "CVE-2"]
+
+        mapper = pool.create_mapper(dataclasses.replace(mappers.default_mapper, work_item_fields=["Custom.Score"]))
+        work_item_adapter = models.WorkItemAdapter(WorkItem(), filtered[0])
+        mapper.new_work_item(work_item_adapter)
+        assert work_item_adapter.title == "Vulnerability CVE-1"
+        assert work_item_adapter.work_item_type == "Bug"
+
+        analysis_adapter = models.AnalysisAdapter(Analysis(), filtered[0])
+        mapper.map_work_item_to_analysis(work_item_adapter, analysis_adapter)
+        assert analysis_adapter.state == "IN_TRIAGE"
+        assert analysis_adapter.details == "Vulnerability CVE-1"
+        assert analysis_adapter.get_request().analysis_state.value == "IN_TRIAGE"
+
+        # Declared fields missing in the WorkItem are loaded before snapshotting
+        work_item_adapter = models.WorkItemAdapter(WorkItem(), filtered[0])
+        work_item_adapter.set_work_item(WorkItem(id=2, fields={}), loaded_fields=[], field_loader=lambda field_names: {"Custom.Score": 2})
+        mapper.map_analysis_to_work_item(analysis_adapter, work_item_adapter)
+        assert work_item_adapter.get_field("Custom.Result") == 4
+    finally:
+        pool.shutdown()
+
+
+def test_analysis_snapshot_keeps_its_finding(monkeypatch, finding_factory):
+    def _map_work_item_to_analysis(work_item_adapter, analysis_adapter):
+        analysis_adapter.details = analysis_adapter.finding.vulnerability.vuln_id
+
+    monkeypatch.setattr(globals, "mapper", dataclasses.replace(mappers.default_mapper, map_work_item_to_analysis=_map_work_item_to_analysis))
+    findings = [finding_factory(vuln_id="CVE-1"), finding_factory(vuln_id="CVE-2")]
+    work_item_adapter = models.WorkItemAdapter(WorkItem(id=1, fields={}), findings=findings)
+    analysis_adapter = models.AnalysisAdapter(Analysis(), findings[1])
+
+    analysis_snapshot = mapper_pool.AnalysisSnapshot.from_adapter(analysis_adapter)
+    result = mapper_pool._call_hook("map_work_item_to_analysis", mapper_pool.WorkItemSnapshot.from_adapter(work_item_adapter), analysis_snapshot)
+    assert result.analysis_changes == {"details": "CVE-2"}
+
+
+def test_snapshot_fails_for_unloaded_fields(monkeypatch, finding_factory):
+    def _map_analysis_to_work_item(analysis_adapter, work_item_adapter):
+        work_item_adapter.get_field("Custom.Undeclared")
+
+    monkeypatch.setattr(globals, "mapper", dataclasses.replace(mappers.default_mapper, map_analysis_to_work_item=_map_analysis_to_work_item))
+    finding = finding_factory()
+    work_item_adapter = models.WorkItemAdapter(WorkItem(), finding)
+    work_item_adapter.set_work_item(WorkItem(id=1, fields={"System.State": "New"}), loaded_fields=["System.State"])
+    analysis_snapshot = mapper_pool.AnalysisSnapshot.from_adapter(models.AnalysisAdapter(Analysis(), finding))
+
+    with pytest.raises(ValueError, match="Custom.Undeclared"):
+        mapper_pool._call_hook("map_analysis_to_work_item", mapper_pool.WorkItemSnapshot.from_adapter(work_item_adapter), analysis_snapshot)
@@ -1,6 +1,7 @@
+from azure.devops.v7_1.work_item_tracking import WorkItem
 from owasp_dt.models import Analysis, AnalysisAnalysisState, AnalysisAnalysisJustification, AnalysisAnalysisResponse, Finding
 
-from owasp_dt_sync import models
+from owasp_dt_sync import models, jinja, globals
 
 
 def test_analysis_adapter(finding_stub: Finding):
@@ -16,3 +17,51 @@ def test_analysis_adapter(finding_stub: Finding):
     assert adapter.justification == analysis.analysis_justification.CODE_NOT_REACHABLE.value
     assert adapter.response == analysis.analysis_response.CAN_NOT_FIX.value
     assert adapter.details == analysis.analysis_details
+
+
+def test_work_item_adapter_lazy_loads_undeclared_fields():
+    requested_fields = []
+
+    def load_fields(fields: list[str]):
+        requested_fields.extend(fields)
+        return {"Custom.Field": "lazy"}
+
+    adapter = models.WorkItemAdapter(WorkItem(id=1))
+    adapter.set_work_item(WorkItem(id=1, fields={"System.State": "Active"}), loaded_fields=["System.State"], field_loader=load_fields)
+
+    assert adapter.state == "Active"
+    assert adapter.get_field("Custom.Field") == "lazy"
+    assert adapter.get_field("Custom.Field") == "lazy"
+    assert requested_fields == ["Custom.Field"]
+
+    adapter.set_field("Custom.Other", "set")
+    assert adapter.get_field("Custom.Other") == "set"
+    assert requested_fields == ["Custom.Field"]
+
+
+def test_aggregation_key(finding_factory):
+    finding = finding_factory(project="project", vuln_id="CVE-1")
+    assert models.Aggregation.VULNERABILITY.create_key(finding) == "CVE-1"
+    assert models.Aggregation.PROJECT.create_key(finding) == "project"
+    assert models.Aggregation.PROJECT_VULNERABILITY.create_key(finding) == "project/CVE-1"
+
+
+def test_aggregated_template(tmp_path, monkeypatch):
+    assert jinja.get_template().filename == str(globals.DEFAULT_TEMPLATE_PATH)
+    assert jinja.get_template(aggregated=True).filename == str(globals.DEFAULT_AGGREGATED_TEMPLATE_PATH)
+
+    # Custom templates render single and aggregated WorkItems
+    template_path = tmp_path / "custom.jinja2"
+    template_path.write_text("custom")
+    monkeypatch.setattr(globals, "template_path", template_path)
+    assert jinja.get_template(aggregated=True).filename == str(template_path)
+
+
+def test_render_aggregated_description(finding_factory):
+    findings = [finding_factory(project="project-a", vuln_id="CVE-1"), finding_factory(project="project-b", vuln_id="CVE-1")]
+    adapter = models.WorkItemAdapter(WorkItem(), findings=findings)
+    assert adapter.finding is findings[0]
+
+    adapter.render_description()
+    assert "project-a:latest" in adapter.description
+    assert "project-b:latest" in adapter.description
@@ -0,0 +1,47 @@
+from azure.devops.released.work_item_tracking import WorkItem, WorkItemType, WorkItemStateColor
+
+from owasp_dt_sync import reconcile, globals, log, validation
+
+
+def test_key_set_spills_sorted_runs(tmp_path):
+    key_set = reconcile.KeySet(max_memory_keys=3, spill_dir=tmp_path)
+    try:
+        for index in range(10):
+            key_set.add(f"key-{index}")
+        assert key_set.spilled_runs == 3
+
+        keys = list(key_set.iter_sorted())
+        assert keys == sorted(reconcile.hash_key(f"key-{index}") for index in range(10))
+
+        items = [(reconcile.hash_key(f"key-{index}"), index) for index in range(5, 15)]
+        assert sorted(key_set.find_missing(items)) == list(range(10, 15))
+    finally:
+        key_set.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_reconcile_stale_work_items(monkeypatch, work_item_tracking_client_stub):
+    client = work_item_tracking_client_stub([
+        WorkItem(id=1, fields={"System.Tags": "owasp-dt; owasp-dt:finding:p/c/v1", "System.State": "Active"}),
+        WorkItem(id=2, fields={"System.Tags": "owasp-dt; owasp-dt:finding:p/c/v2", "System.State": "Active"}),
+        WorkItem(id=3, fields={"System.Tags": "owasp-dt; owasp-dt:vulnerability:v3", "System.State": "Active"}),
+        WorkItem(id=4, fields={"System.Tags": f"owasp-dt; owasp-dt:finding:p/c/v4; {reconcile.STALE_TAG}", "System.State": "Closed"}),
+        WorkItem(id=5, fields={"System.Tags": "owasp-dt; owasp-dt:finding:p/c/v5", "System.State": "Removed", "System.WorkItemType": "Bug"}),
+        WorkItem(id=6, fields={"System.Tags": "owasp-dt; owasp-dt:finding:p/c/v6", "System.State": "Fixed", "System.WorkItemType": "Bug"}),
+    ], [WorkItemType(name="Bug", states=[WorkItemStateColor(name="Active", category="InProgress"), WorkItemStateColor(name="Fixed", category="Completed")])])
+    key_set = reconcile.KeySet()
+    key_set.add(reconcile.create_seen_key("default", "owasp-dt:finding:p/c/v1"))
+
+    assert reconcile.find_stale_work_item_ids(client, "project", key_set, "default", "finding") == [2, 4, 5, 6]
+    assert reconcile.find_stale_work_item_ids(client, "project", key_set, "other", "finding") == [1, 2, 4, 5, 6]
+
+    monkeypatch.setattr(globals, "apply_changes", True)
+    reconcile.reconcile_stale_work_items(log.logger, client, "project", key_set, "default", "finding", "report")
+    assert client.update_calls == []
+
+    # Closed WorkItems keep their state and tags, also in the states of the type's completed category
+    reconcile.mark_stale_work_items(client, "project", [2, 4, 5, 6], "close", validator=validation.WorkItemValidator(client, "project"))
+    assert [work_item_id for work_item_id, _ in client.update_calls] == [2]
+    paths = {operation.path: operation.value for operation in client.update_calls[0][1]}
+    assert paths["/fields/System.State"] == "Closed"
+    assert reconcile.STALE_TAG in paths["/fields/System.Tags"]
@@ -0,0 +1,37 @@
+from azure.devops.released.work_item_tracking import WorkItem
+
+from owasp_dt_sync import reference_index, models, azure_helper
+from owasp_dt_sync.cache import WorkItemCache
+
+
+def test_load_reference_index(work_item_tracking_client_stub):
+    client = work_item_tracking_client_stub([
+        WorkItem(id=1, fields={"System.Tags": "owasp-dt; owasp-dt:finding:p/c/v1"}),
+        WorkItem(id=2, fields={"System.Tags": "other; owasp-dt; owasp-dt:finding:p/c/v2"}),
+        WorkItem(id=3, fields={"System.Tags": "owasp-dt; owasp-dt:vulnerability:v1"}),
+    ])
+    work_item_cache = WorkItemCache(client, "project", fields=["System.Tags"])
+    index = reference_index.load_reference_index(client, "project", fields=["System.Tags"], work_item_cache=work_item_cache)
+
+    assert len(index) == 3
+    assert index.find("owasp-dt:finding:p/c/v1").id == 1
+    assert index.find("owasp-dt:finding:p/c/v3") is None
+    assert list(index.get_orphans("finding")) == ["owasp-dt:finding:p/c/v2"]
+    assert work_item_cache.get(2) is client.work_items[2]
+
+
+def test_query_pages_by_id(work_item_tracking_client_stub):
+    client = work_item_tracking_client_stub([WorkItem(id=id) for id in range(1, 6)])
+    assert list(azure_helper.query_work_item_ids(client, "project", "[System.Tags] CONTAINS 'owasp-dt'", page_size=2)) == [1, 2, 3, 4, 5]
+    assert len(client.queries) == 3
+
+
+def test_reference_tags():
+    adapter = models.WorkItemAdapter(WorkItem())
+    adapter.add_tag(models.REFERENCE_TAG)
+    adapter.add_tag(models.create_reference_tag("finding", "p/c/v"))
+    adapter.add_tag(models.REFERENCE_TAG)
+    assert adapter.tags == ["owasp-dt", "owasp-dt:finding:p/c/v"]
+    assert adapter.get_field("System.Tags") == "owasp-dt; owasp-dt:finding:p/c/v"
+    assert models.parse_reference_tag("owasp-dt:finding:p/c/v") == ("finding", "p/c/v")
+    assert models.parse_reference_tag("owasp-dt") is None
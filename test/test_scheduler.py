@@ -0,0 +1,49 @@
+import pytest
+
+from owasp_dt_sync import scheduler
+
+
+@pytest.fixture
+def create_finding_group(finding_factory):
+    def _create_finding_group(project: str, vuln_id: str, severity: str, cvss_v3: float = None, cvss_v2: float = None):
+        return [(finding_factory(project=project, vuln_id=vuln_id, severity=severity, cvss_v3=cvss_v3, cvss_v2=cvss_v2), None)]
+
+    return _create_finding_group
+
+
+def get_vuln_ids(finding_groups):
+    return [finding_group[0][0].vulnerability.vuln_id for finding_group in finding_groups]
+
+
+def test_prioritize_by_severity_and_cvss(create_finding_group):
+    finding_groups = [
+        create_finding_group("a", "low", "LOW", 2.0),
+        create_finding_group("a", "high-v2", "HIGH", cvss_v2=7.5),
+        create_finding_group("a", "critical", "CRITICAL", 9.8),
+        create_finding_group("a", "high-v3", "HIGH", 8.1),
+        create_finding_group("a", "unknown", None),
+    ]
+    assert get_vuln_ids(scheduler.prioritize(finding_groups)) == ["critical", "high-v3", "high-v2", "low", "unknown"]
+
+
+def test_prioritize_round_robin_across_projects(create_finding_group):
+    finding_groups = [create_finding_group("huge", f"huge-{i}", "HIGH", 9.0 - i / 10) for i in range(4)]
+    finding_groups.append(create_finding_group("small", "small-0", "HIGH", 7.0))
+    finding_groups.append(create_finding_group("other", "other-0", "HIGH", 8.0))
+
+    assert get_vuln_ids(scheduler.prioritize(finding_groups)) == ["huge-0", "other-0", "small-0", "huge-1", "huge-2", "huge-3"]
+
+
+def test_count_severities(create_finding_group):
+    finding_groups = [
+        create_finding_group("a", "1", "HIGH"),
+        create_finding_group("a", "2", "HIGH"),
+        create_finding_group("a", "3", "low"),
+    ]
+    assert scheduler.count_severities(finding_groups) == {"HIGH": 2, "LOW": 1}
+
+
+def test_time_budget():
+    assert not scheduler.TimeBudget().exhausted
+    assert scheduler.TimeBudget(0).exhausted
+    assert not scheduler.TimeBudget(60).exhausted
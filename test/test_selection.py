@@ -0,0 +1,75 @@
+import dataclasses
+from types import SimpleNamespace
+
+from azure.devops.released.work_item_tracking import WorkItem
+from owasp_dt.models import Project
+from owasp_dt.types import UNSET
+
+from owasp_dt_sync import selection, globals, mappers, engine
+from owasp_dt_sync.filters import FindingFilter
+
+
+def test_parse_selectors():
+    assert selection.parse_project_selector("my-project") == ("my-project", None)
+    assert selection.parse_project_selector("my-project:1.0") == ("my-project", "1.0")
+    assert selection.parse_vulnerability_selector("CVE-2024-1") == ("NVD", "CVE-2024-1")
+    assert selection.parse_vulnerability_selector("GHSA-abcd") == ("GITHUB", "GHSA-abcd")
+    assert selection.parse_vulnerability_selector("osv:PYSEC-2024-1") == ("OSV", "PYSEC-2024-1")
+    assert selection.is_uuid("0b6ae2d2-8e5b-4d5b-a9f6-3cf1c2d3e4f5")
+    assert not selection.is_uuid("my-project")
+
+
+def test_load_selected_findings(monkeypatch, finding_factory, work_item_tracking_client_stub):
+    project_findings = {
+        "p1": [finding_factory(project="p1", component="c1", vulnerability="v1"), finding_factory(project="p1", component="c2", vulnerability="v2", vuln_id="CVE-2024-2")],
+        "p2": [finding_factory(project="p2", component="c1", vulnerability="v1"), finding_factory(project="p2", component="c3", vulnerability="v3", vuln_id="CVE-2024-3")],
+        "p3": [finding_factory(project="p3", component="c1", vulnerability="v1")],
+    }
+    loaded_projects = []
+
+    def _load_project_findings(client, project_uuid, load_suppressed=False):
+        loaded_projects.append(project_uuid)
+        return project_findings[project_uuid]
+
+    monkeypatch.setattr(globals, "mapper", dataclasses.replace(mappers.default_mapper, process_finding=lambda finding: True))
+    monkeypatch.setattr(selection, "load_project_findings", _load_project_findings)
+    monkeypatch.setattr(selection, "find_affected_project_uuids", lambda client, source, vuln_id, load_inactive=False: ["p1", "p2"] if vuln_id == "CVE-2024-2" else [])
+
+    client = work_item_tracking_client_stub([
+        WorkItem(id=1, fields={"System.Tags": "owasp-dt; owasp-dt:finding:p2/c3/v3"}),
+        WorkItem(id=2, fields={"System.Tags": "other"}),
+    ])
+    selected = selection.Selection(None)
+    selected.add_vulnerability("CVE-2024-2")
+    assert selected.add_work_items(client, "project", [1, 2, 3]) == {1, 2}
+    selected.add("p3")
+
+    findings = list(selected.load_findings())
+    assert sorted(loaded_projects) == ["p1", "p2", "p3"]
+    assert [(finding.component.project, finding.component.uuid) for finding in findings] == [("p1", "c2"), ("p2", "c3"), ("p3", "c1")]
+
+
+def test_complete_project_findings(monkeypatch, finding_factory):
+    finding = finding_factory(project="0b6ae2d2-8e5b-4d5b-a9f6-3cf1c2d3e4f5")
+    finding.component.project_name = UNSET
+    finding.component.project_version = UNSET
+    monkeypatch.setattr(selection.get_findings_by_project, "sync_detailed", lambda uuid, client, suppressed: SimpleNamespace(status_code=200, parsed=[finding]))
+    monkeypatch.setattr(selection.get_project, "sync_detailed", lambda uuid, client: SimpleNamespace(status_code=200, parsed=Project(uuid=uuid, name="my-project", version="1.0")))
+
+    [loaded] = selection.load_project_findings(None, "0b6ae2d2-8e5b-4d5b-a9f6-3cf1c2d3e4f5")
+    assert (loaded.component.project, loaded.component.project_name, loaded.component.project_version) == ("0b6ae2d2-8e5b-4d5b-a9f6-3cf1c2d3e4f5", "my-project", "1.0")
+
+
+def test_projects_restrict_vulnerabilities(monkeypatch, finding_factory):
+    project_findings = {project: [finding_factory(project=project, vuln_id="CVE-2024-1"), finding_factory(project=project, vuln_id="CVE-2024-2")] for project in ["p1", "p2"]}
+    monkeypatch.setattr(globals, "mapper", dataclasses.replace(mappers.default_mapper, process_finding=lambda finding: True))
+    monkeypatch.setattr(selection, "load_project_findings", lambda client, project_uuid, load_suppressed=False: project_findings[project_uuid])
+    monkeypatch.setattr(selection, "find_project_uuids", lambda client, selector, load_inactive=False: [selector])
+    monkeypatch.setattr(selection, "find_affected_project_uuids", lambda client, source, vuln_id, load_inactive=False: ["p1", "p2"])
+    sync_engine = SimpleNamespace(owasp_dt_client=None, contexts=[], finding_filter=FindingFilter())
+
+    args = SimpleNamespace(project=["p1"], vulnerability=["CVE-2024-1"], work_item=None, load_inactive=False, load_suppressed=False)
+    assert [(finding.component.project, finding.vulnerability.vuln_id) for finding in engine.load_selected_findings(args, sync_engine)] == [("p1", "CVE-2024-1")]
+
+    args = SimpleNamespace(project=["p1"], vulnerability=None, work_item=None, load_inactive=False, load_suppressed=False)
+    assert [(finding.component.project, finding.vulnerability.vuln_id) for finding in engine.load_selected_findings(args, sync_engine)] == [("p1", "CVE-2024-1"), ("p1", "CVE-2024-2")]
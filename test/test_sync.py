@@ -0,0 +1,129 @@
+import dataclasses
+
+import pytest
+from azure.devops.released.work_item_tracking import WorkItem, WorkItemType, WorkItemStateColor, WorkItemTypeFieldInstance
+from owasp_dt.models import Analysis, AnalysisComment
+
+from owasp_dt_sync import sync, engine, owasp_dt_helper, targets, globals, mappers, models, log
+from owasp_dt_sync.reference_index import ReferenceIndex
+
+
+def create_linked_analysis(work_item_id: int):
+    return Analysis(analysis_comments=[AnalysisComment(timestamp=1, comment=f"Azure DevOps work item: https://dev.azure.com/org/project/_apis/wit/workItems/{work_item_id}")])
+
+
+@pytest.fixture
+def linked_findings(monkeypatch, finding_factory):
+    # The first Finding references an existing, the second a deleted WorkItem and the third none
+    findings = [finding_factory(vuln_id=f"CVE-{index}") for index in range(1, 4)]
+    analyses = {"CVE-1": create_linked_analysis(1), "CVE-2": create_linked_analysis(2), "CVE-3": Analysis()}
+    monkeypatch.setattr(owasp_dt_helper, "get_analysis", lambda client, finding: analyses[finding.vulnerability.vuln_id])
+    new_work_items = []
+
+    def _new_work_item(work_item_adapter):
+        new_work_items.append(work_item_adapter)
+        work_item_adapter.work_item_type = "Bug"
+
+    monkeypatch.setattr(globals, "mapper", dataclasses.replace(mappers.default_mapper, new_work_item=_new_work_item))
+    return findings, analyses, new_work_items
+
+
+def test_verify_references_reports_broken(linked_findings, work_item_tracking_client_stub):
+    findings, analyses, new_work_items = linked_findings
+    client = work_item_tracking_client_stub([WorkItem(id=1)])
+
+    verified = sync.verify_references(None, client, "project", findings)
+    assert [analysis for _, analysis in verified] == [analyses["CVE-1"], analyses["CVE-2"], analyses["CVE-3"]]
+    # Broken references are only reported without rendering new WorkItems
+    assert new_work_items == []
+    assert client.create_calls == []
+
+
+def test_verify_references_repairs_broken(monkeypatch, linked_findings, work_item_tracking_client_stub):
+    findings, analyses, _ = linked_findings
+    client = work_item_tracking_client_stub([WorkItem(id=1)])
+    added_analyses = []
+    monkeypatch.setattr(owasp_dt_helper, "add_analysis", lambda owasp_dt_client, analysis: added_analyses.append(analysis))
+    monkeypatch.setattr(globals, "fix_references", True)
+
+    verified = sync.verify_references(None, client, "project", findings)
+    assert client.create_calls == []
+    assert verified[1][1] is analyses["CVE-2"]
+
+    monkeypatch.setattr(globals, "apply_changes", True)
+    verified = sync.verify_references(None, client, "project", findings)
+    assert [work_item_type for work_item_type, _ in client.create_calls] == ["Bug"]
+    assert added_analyses[0].vulnerability == findings[1].vulnerability.uuid
+    # The Analysis with the new reference is read again by the sync
+    assert [analysis for _, analysis in verified] == [analyses["CVE-1"], None, analyses["CVE-3"]]
+
+
+@pytest.mark.parametrize("mode", ["before", "only"])
+def test_verify_references_modes(monkeypatch, mode, linked_findings, work_item_tracking_client_stub, stub_target_factory):
+    findings, analyses, _ = linked_findings
+    client = work_item_tracking_client_stub([WorkItem(id=1)])
+    synced_groups = []
+    monkeypatch.setattr(sync, "sync_target_finding_group", lambda logger, owasp_dt_client, context, finding_group, aggregation: synced_groups.append(finding_group))
+    target = stub_target_factory(client)
+
+    with engine.SyncEngine([target], engine.SyncOptions(verify_references=mode), owasp_dt_client=object()) as sync_engine:
+        sync_engine.sync_findings(findings)
+
+    if mode == "only":
+        assert synced_groups == []
+    else:
+        # The verified Analyses are not read again
+        assert sorted((finding.vulnerability.vuln_id, analysis) for [(finding, analysis)] in synced_groups) == sorted((vuln_id, analysis) for vuln_id, analysis in analyses.items())
+
+
+def test_group_findings_streams(finding_factory):
+    consumed = []
+
+    def _findings():
+        for index, project in enumerate(["a", "a", "b", "c", "a", "d"]):
+            consumed.append(index)
+            yield finding_factory(project=project, vuln_id=f"CVE-{index}"), None
+
+    finding_groups = sync.group_findings(models.Aggregation.PROJECT, _findings(), max_buffered=3)
+    # The least recently extended group is synchronized before the stream is consumed
+    assert [finding.vulnerability.vuln_id for finding, _ in next(finding_groups)] == ["CVE-0", "CVE-1"]
+    assert consumed == [0, 1, 2, 3]
+
+    remaining = [[finding.vulnerability.vuln_id for finding, _ in finding_group] for finding_group in finding_groups]
+    assert remaining == [["CVE-2"], ["CVE-3"], ["CVE-4"], ["CVE-5"]]
+
+
+def test_split_groups_share_work_item(monkeypatch, finding_factory, work_item_tracking_client_stub, stub_target_factory):
+    bug = WorkItemType(
+        name="Bug",
+        states=[WorkItemStateColor(name="New")],
+        fields=[WorkItemTypeFieldInstance(reference_name=field) for field in ["System.Title", "System.Description", "System.Tags", "System.AreaPath", "System.State"]],
+    )
+    client = work_item_tracking_client_stub(work_item_types=[bug])
+    monkeypatch.setattr(owasp_dt_helper, "get_analysis", lambda owasp_dt_client, finding: Analysis())
+    monkeypatch.setattr(owasp_dt_helper, "add_analysis", lambda owasp_dt_client, analysis: None)
+    monkeypatch.setattr(globals, "mapper", dataclasses.replace(mappers.default_mapper, new_work_item=lambda work_item_adapter: setattr(work_item_adapter, "work_item_type", "Bug")))
+    monkeypatch.setattr(globals, "apply_changes", True)
+    context = targets.TargetContext(stub_target_factory(client))
+    try:
+        for vuln_id in ["CVE-1", "CVE-2"]:
+            finding_group = [(finding_factory(vuln_id=vuln_id), None)]
+            sync.sync_target_finding_group(log.logger, None, context, finding_group, models.Aggregation.PROJECT)
+    finally:
+        context.shutdown()
+
+    assert len(client.create_calls) == 1
+    assert context.validator.rejected == []
+    assert context.group_work_item_ids == {models.Aggregation.PROJECT.create_reference_tag(finding_factory()): 1}
+
+
+def test_reference_index_falls_back_to_analysis_link(monkeypatch, finding_factory, work_item_tracking_client_stub):
+    client = work_item_tracking_client_stub([WorkItem(id=1, url="https://dev.azure.com/org/project/_apis/wit/workItems/1", fields={"System.Tags": "other"})])
+    synced_work_items = []
+    monkeypatch.setattr(sync, "sync_items", lambda work_item_adapter, **kwargs: synced_work_items.append(work_item_adapter))
+
+    sync.sync_finding(log.logger, None, client, "project", finding_factory(), create_linked_analysis(1), reference_index=ReferenceIndex())
+    assert client.create_calls == []
+    # Loaded WorkItems are not tagged, the tag change would be synchronized as a newer WorkItem
+    assert [work_item_adapter.work_item.id for work_item_adapter in synced_work_items] == [1]
+    assert synced_work_items[0].get_changes() == []
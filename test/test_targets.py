@@ -0,0 +1,94 @@
+import dataclasses
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from owasp_dt_sync import targets, mappers, globals
+
+
+def create_context(name: str, projects: list[str] = None):
+    target = targets.Target(name=name, org_url="https://dev.azure.com/org", project=name, api_key="", projects=projects or [])
+    return SimpleNamespace(name=name, target=target)
+
+
+def test_load_targets(tmp_path, monkeypatch):
+    monkeypatch.setenv("AZURE_ORG_URL", "https://dev.azure.com/org")
+    monkeypatch.setenv("AZURE_API_KEY", "default-key")
+    monkeypatch.setenv("TEAM_KEY", "team-key")
+    path = tmp_path / "targets.json"
+    path.write_text(json.dumps({
+        "default": {"project": "main"},
+        "team": {"org_url": "https://dev.azure.com/team", "project": "team", "api_key_env": "TEAM_KEY", "projects": ["team-project"], "workers": 2},
+    }))
+
+    default, team = targets.load_targets(path)
+    assert default.org_url == "https://dev.azure.com/org"
+    assert default.api_key == "default-key"
+    assert team.org_url == "https://dev.azure.com/team"
+    assert team.api_key == "team-key"
+    assert team.projects == ["team-project"]
+    assert team.workers == 2
+
+
+def test_reject_plaintext_api_key(tmp_path):
+    path = tmp_path / "targets.json"
+    path.write_text(json.dumps({"default": {"org_url": "https://dev.azure.com/org", "project": "main", "api_key": "secret"}}))
+
+    with pytest.raises(AssertionError, match="plaintext API key"):
+        targets.load_targets(path)
+
+
+def test_route_once(monkeypatch, finding_factory):
+    routed = []
+    monkeypatch.setattr(globals, "mapper", dataclasses.replace(mappers.default_mapper, route_finding=lambda finding: routed.append(finding)))
+    monkeypatch.setattr(targets.Router, "MAX_CACHED_ROUTES", 1)
+    default = create_context("default")
+    router = targets.Router([default])
+    findings = [finding_factory(vuln_id="CVE-1"), finding_factory(vuln_id="CVE-2")]
+
+    assert list(router.filter_routable(findings[:1])) == findings[:1]
+    assert router.partition(findings[:1]) == {"default": findings[:1]}
+    assert router.route(findings[0]) is default
+    assert routed == findings[:1]
+    # Routes are only cached for the recently routed Findings
+    router.route(findings[1])
+    router.route(findings[0])
+    assert routed == [findings[0], findings[1], findings[0]]
+
+
+def test_route_by_project_table(finding_factory):
+    default = create_context("default")
+    team = create_context("team", projects=["team-project", "uuid-2"])
+    router = targets.Router([default, team])
+
+    assert router.route(finding_factory(project="uuid-1", project_name="team-project")) is team
+    assert router.route(finding_factory(project="uuid-2", project_name="other")) is team
+    assert router.route(finding_factory(project="uuid-3", project_name="other")) is default
+
+
+def test_route_by_mapper(monkeypatch, finding_factory):
+    monkeypatch.setattr(globals, "mapper", dataclasses.replace(mappers.default_mapper, route_finding=lambda finding: "team" if finding.component.project_name == "mapped" else None))
+    team = create_context("team", projects=["team-project"])
+    other = create_context("other")
+    router = targets.Router([team, other])
+
+    assert router.route(finding_factory(project="uuid-1", project_name="mapped")) is team
+    assert router.route(finding_factory(project="uuid-2", project_name="team-project")) is team
+    # Without a default target, unrouted Findings are skipped
+    assert router.route(finding_factory(project="uuid-3", project_name="other")) is None
+    assert len(list(router.filter_routable([finding_factory(project="uuid-3", project_name="other")]))) == 0
+
+
+def test_rate_limited_client():
+    calls = []
+    client = targets.RateLimitedClient(SimpleNamespace(call=lambda value: calls.append(value), name="client"), targets.RateLimiter(50))
+
+    start = time.monotonic()
+    for index in range(6):
+        client.call(index)
+
+    assert calls == list(range(6))
+    assert client.name == "client"
+    assert time.monotonic() - start >= 0.09
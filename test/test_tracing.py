@@ -0,0 +1,69 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from owasp_dt_sync import tracing, deadlines
+
+
+@tracing.traced("child")
+def run_child(fail: bool = False):
+    if fail:
+        raise ValueError("failed")
+
+
+def test_disabled_tracing():
+    assert tracing.get_tracer() is None
+    with tracing.span("root") as span:
+        assert span is None
+    run_child()
+
+
+def test_spans_are_nested_across_threads():
+    tracer = tracing.Tracer()
+    with tracing.use_tracer(tracer):
+        with tracing.span("sync_finding", root=True, attributes={"vulnerability": "CVE-1"}) as root:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(deadlines.bind_context(run_child), [False, False]))
+            with pytest.raises(ValueError):
+                run_child(fail=True)
+        with tracing.span("sync_finding", root=True) as other_root:
+            pass
+
+    spans = {span.span_id: span for span in tracer.spans}
+    assert len(spans) == 5
+    children = [span for span in spans.values() if span.name == "child"]
+    assert all(span.parent_id == root.span_id and span.trace_id == root.trace_id for span in children)
+    assert [span.error for span in children if span.error] == ["ValueError: failed"]
+    assert root.attributes == {"vulnerability": "CVE-1"}
+    assert other_root.parent_id is None and other_root.trace_id != root.trace_id
+    assert root.start_ns <= min(span.start_ns for span in children) and root.end_ns >= max(span.end_ns for span in children)
+
+
+def test_reserved_attribute_names():
+    tracer = tracing.Tracer()
+    with tracing.use_tracer(tracer):
+        with tracing.span("sync_finding", root=True, attributes={"name": "urllib3", "root": "project"}) as root:
+            pass
+    assert (root.name, root.attributes) == ("sync_finding", {"name": "urllib3", "root": "project"})
+
+
+def test_export(tmp_path):
+    tracer = tracing.Tracer()
+    with tracing.use_tracer(tracer):
+        with tracing.span("sync_finding", root=True, attributes={"vulnerability": "CVE-1"}):
+            run_child()
+
+    chrome_path = tmp_path / "trace.json"
+    tracer.export(chrome_path)
+    events = json.loads(chrome_path.read_text())["traceEvents"]
+    assert [event["name"] for event in events] == ["sync_finding", "child"]
+    assert events[0]["ph"] == "X" and events[0]["args"] == {"vulnerability": "CVE-1"}
+
+    otlp_path = tmp_path / "trace.otlp.json"
+    tracer.export(otlp_path, "otlp")
+    spans = json.loads(otlp_path.read_text())["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    spans_by_name = {span["name"]: span for span in spans}
+    assert spans_by_name["child"]["parentSpanId"] == spans_by_name["sync_finding"]["spanId"]
+    assert len(spans_by_name["sync_finding"]["traceId"]) == 32
+    assert "parentSpanId" not in spans_by_name["sync_finding"]
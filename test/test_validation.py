@@ -0,0 +1,101 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from azure.devops.released.work_item_tracking import WorkItem, JsonPatchOperation, WorkItemType, WorkItemStateColor, WorkItemStateTransition, WorkItemTypeFieldInstance
+
+from owasp_dt_sync import log, validation
+from owasp_dt_sync.cache import WorkItemCache
+
+
+BUG = WorkItemType(
+    name="Bug",
+    states=[WorkItemStateColor(name=state) for state in ["New", "Active", "Closed"]],
+    transitions={
+        "": [WorkItemStateTransition(to="New")],
+        "New": [WorkItemStateTransition(to="Active"), WorkItemStateTransition(to="Closed")],
+        "Active": [WorkItemStateTransition(to="Closed")],
+    },
+    fields=[
+        WorkItemTypeFieldInstance(reference_name="System.State"),
+        WorkItemTypeFieldInstance(reference_name="System.Title"),
+        WorkItemTypeFieldInstance(reference_name="Microsoft.VSTS.Common.Severity", allowed_values=["1 - Critical", "2 - High"]),
+    ],
+)
+
+
+def create_change(field: str, value: str):
+    return JsonPatchOperation(op="add", path=f"/fields/{field}", value=value)
+
+
+def test_validate_changes(work_item_tracking_client_stub):
+    client = work_item_tracking_client_stub(work_item_types=[BUG])
+    validator = validation.WorkItemValidator(client, "project")
+
+    changes = validator.validate(log.logger, 1, "Bug", "New", [
+        create_change("System.State", "Active"),
+        create_change("System.Title", "Title"),
+        create_change("Microsoft.VSTS.Common.Severity", "2 - High"),
+    ])
+    assert len(changes) == 3
+
+    changes = validator.validate(log.logger, 1, "Bug", "Active", [
+        create_change("System.State", "Investigation"),
+        create_change("Custom.Unknown", "value"),
+        create_change("Microsoft.VSTS.Common.Severity", "5 - Unknown"),
+        create_change("system.title", "Title"),
+    ])
+    assert [change.path for change in changes] == ["/fields/system.title"]
+    assert [rejected.reason for rejected in validator.rejected] == ["Unknown state", "Unknown field", "Value not allowed"]
+
+    changes = validator.validate(log.logger, None, "Bug", None, [create_change("System.State", "Active")])
+    assert changes == []
+    assert validator.rejected[-1].reason == "Invalid transition from 'New WorkItem'"
+
+    # Field names are case-insensitive, also for the state transitions
+    changes = validator.validate(log.logger, 1, "Bug", "Active", [create_change("system.state", "New")])
+    assert changes == []
+    assert validator.rejected[-1].reason == "Invalid transition from 'Active'"
+    assert client.type_calls == ["Bug"]
+
+
+def test_load_rules_once(work_item_tracking_client_stub):
+    client = work_item_tracking_client_stub(work_item_types=[BUG, WorkItemType(name="Task")])
+    get_started = threading.Event()
+    release = threading.Event()
+    get_work_item_type = client.get_work_item_type
+
+    def _blocking_get_work_item_type(project, type):
+        if type == "Bug":
+            get_started.set()
+            release.wait(5)
+        return get_work_item_type(project, type)
+
+    client.get_work_item_type = _blocking_get_work_item_type
+    validator = validation.WorkItemValidator(client, "project")
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(validator.get_rules, "Bug") for _ in range(4)]
+        get_started.wait(5)
+        # Other types are not blocked by the running load
+        assert executor.submit(validator.get_rules, "Task").result(timeout=1) is not None
+        release.set()
+        rules = [future.result() for future in futures]
+
+    assert client.type_calls.count("Bug") == 1
+    assert all(rule is rules[0] for rule in rules)
+
+
+def test_skip_rejected_updates(work_item_tracking_client_stub):
+    client = work_item_tracking_client_stub([WorkItem(id=1, fields={"System.State": "Active", "System.WorkItemType": "Bug"})], [BUG])
+    cache = WorkItemCache(client, "project", validator=validation.WorkItemValidator(client, "project"))
+
+    work_item = cache.get(1)
+    # Adapters change the cached WorkItem, the transition is validated against the persisted state
+    work_item.fields["System.State"] = "New"
+    cache.add_changes(log.logger, 1, [create_change("System.State", "New")])
+    cache.flush(apply_changes=True)
+    assert client.update_calls == []
+
+    cache.add_changes(log.logger, 1, [create_change("System.State", "Closed")])
+    cache.flush(apply_changes=True)
+    assert len(client.update_calls) == 1
+    assert len(cache.validator.rejected) == 1